@@ -1,24 +1,17 @@
 import sqlite3
+from migrations import migrate
 
 # Define database path
 DB_PATH = "real_estate.db"
 
+# Create "Flyp_contact" table (and its unique index) through the migrations
+migrate(DB_PATH)
+
 # Connect to the SQLite database
 conn = sqlite3.connect(DB_PATH)
 cursor = conn.cursor()
 
-# Create "Flyp_contact" table
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS "Flyp_contact" (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    property_id INTEGER NOT NULL,
-    fly_person_name TEXT NOT NULL,
-    meeting_link TEXT NOT NULL,
-    FOREIGN KEY (property_id) REFERENCES Property(property_id)
-);
-""")
-
-# Insert 5 mock records
+# Insert 5 mock records (skipped if they already exist)
 mock_data = [
     (1, "Alice Johnson", "https://calendly.com/alice-johnson"),
     (2, "Bob Smith", "https://calendly.com/bob-smith"),
@@ -28,7 +21,7 @@ mock_data = [
 ]
 
 cursor.executemany("""
-INSERT INTO "Flyp_contact" (property_id, fly_person_name, meeting_link)
+INSERT OR IGNORE INTO "Flyp_contact" (property_id, fly_person_name, meeting_link)
 VALUES (?, ?, ?);
 """, mock_data)
 
@@ -0,0 +1,82 @@
+import asyncio
+import contextvars
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Blocking SQLite calls run on at most this many threads, shared by all sessions
+DB_WORKERS = 4
+
+
+class AsyncRuntime:
+    """A single event loop on a daemon thread shared by every session.
+
+    LLM requests are awaited on this loop over one keep-alive HTTP pool, so a
+    slow generation holds a coroutine rather than a thread. Blocking database
+    tools are pushed to a small bounded executor.
+    """
+
+    def __init__(self, db_workers=DB_WORKERS):
+        self.loop = asyncio.new_event_loop()
+        self.db_executor = ThreadPoolExecutor(max_workers=db_workers, thread_name_prefix="db")
+        self._thread = threading.Thread(target=self._run_loop, name="async-runtime", daemon=True)
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def run(self, coro, timeout=None):
+        """Run ``coro`` on the shared loop and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def iterate(self, agen):
+        """Expose an async generator running on the shared loop as a plain iterator."""
+        items = queue.Queue()
+        done = object()
+
+        async def pump():
+            try:
+                async for item in agen:
+                    items.put(item)
+            except BaseException as e:
+                items.put(e)
+            finally:
+                items.put(done)
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self.loop)
+        try:
+            while True:
+                item = items.get()
+                if item is done:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            future.cancel()
+
+    async def to_db(self, func, *args):
+        """Await a blocking database call on the bounded executor."""
+        # Executor threads do not inherit context variables; carry the
+        # caller's (e.g. the current tracing span) across explicitly.
+        context = contextvars.copy_context()
+        return await self.loop.run_in_executor(self.db_executor, context.run, func, *args)
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.db_executor.shutdown(wait=False)
+
+
+_runtime = None
+_runtime_lock = threading.Lock()
+
+
+def get_runtime():
+    """Return the process-wide runtime, starting it on first use."""
+    global _runtime
+    with _runtime_lock:
+        if _runtime is None:
+            _runtime = AsyncRuntime()
+        return _runtime
@@ -0,0 +1,409 @@
+import argparse
+import ast
+import importlib
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from mock_ollama import MockOllama
+
+STAGES = ("fast_path", "router", "prompt", "llm", "parse", "tool", "db", "total")
+SELECTION_LINE = re.compile(r"Model selected tool: (?P<name>\w+) with arguments: (?P<arguments>\{.*\})\s*$")
+
+# ReAct entry points replayed next to the flyp_agent chain: label -> module.
+# Their stages are reported as "<label>.llm", "<label>.tool", ...
+REACT_ENTRY_POINTS = {"react": "chatbot_agent", "venkat": "chatbot_agent_venkat"}
+ENTRY_POINTS = ("flyp", *REACT_ENTRY_POINTS)
+# The ReAct prompts end with the user's message, then the scratchpad of earlier
+# steps; once a tool has answered, the mock model finishes the turn
+REACT_OBSERVATION = r"\nObservation: "
+REACT_FINAL_STEP = json.dumps({"thought": "The tool answered the question.", "final_answer": "Done."})
+
+# A stage regresses when its p50 or p90 exceeds the baseline by this fraction,
+# plus a small absolute allowance so sub-millisecond noise does not fail runs.
+TOLERANCE = 0.25
+NOISE_FLOOR_MS = 0.5
+
+
+def cases_from_jsonl(path):
+    """Inputs from a JSONL file: ``input`` (or ``text``/``title``), optionally a scripted ``response``."""
+    cases = []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            text = record.get("input") or record.get("text") or record.get("title")
+            if not text:
+                continue
+            response = record.get("response") or record.get("selection")
+            if response is not None and not isinstance(response, str):
+                response = json.dumps(response)
+            cases.append({"input": text, "response": response})
+    return cases
+
+
+def cases_from_log(path):
+    """Rebuild inputs from the tool selections logged in chatbot_logs.log.
+
+    User text is not logged, so the input is derived from the arguments and
+    the mock model is scripted to answer it with the logged selection.
+    Selections of tools or arguments that no longer exist stay in; the replay
+    counts them as skipped when the parser rejects them.
+    """
+    cases = []
+    with open(path, errors="replace") as f:
+        for line in f:
+            if line.startswith("{"):
+                # JSON-lines log written by event_log
+                try:
+                    line = json.loads(line).get("msg", "")
+                except ValueError:
+                    continue
+            match = SELECTION_LINE.search(line)
+            if not match:
+                continue
+            try:
+                arguments = ast.literal_eval(match["arguments"])
+            except (ValueError, SyntaxError):
+                continue
+            name = match["name"]
+            if name == "converse":
+                text = arguments.get("input") or arguments.get("response") or ""
+                # Two-pass converse logged {"input"}; the single-pass tool takes the reply itself
+                arguments = {"response": text}
+            else:
+                text = " ".join([name] + [str(value) for value in arguments.values()])
+            if text:
+                cases.append({"input": text, "response": json.dumps({"name": name, "arguments": arguments})})
+    return cases
+
+
+def load_cases(paths):
+    cases = []
+    for path in paths:
+        cases.extend(cases_from_jsonl(path) if path.endswith(".jsonl") else cases_from_log(path))
+    return cases
+
+
+def with_confidence(response, confidence):
+    """Add the router's ``confidence`` key to a scripted tool call; the large model's parser ignores it."""
+    try:
+        selection = json.loads(response)
+    except ValueError:
+        return response
+    if not isinstance(selection, dict) or "name" not in selection:
+        return response
+    return json.dumps({**selection, "confidence": confidence})
+
+
+def react_prompt(text):
+    """Pattern matching the first ReAct prompt of a turn for the user message ``text``."""
+    return r"USER QUERY:\n" + re.escape(text.strip()) + r"\s*$"
+
+
+def react_step(response):
+    """ReAct step the mock answers with, derived from a case's scripted tool selection.
+
+    Searches become a SearchText action, so the replay runs a tool and a
+    second model round trip; anything else is answered directly.
+    """
+    try:
+        selection = json.loads(response) if response else None
+    except ValueError:
+        selection = None
+    arguments = selection.get("arguments") if isinstance(selection, dict) else None
+    arguments = arguments if isinstance(arguments, dict) else {}
+    if selection and selection.get("name") == "search_records" and arguments.get("query"):
+        return json.dumps({"thought": "Search the records.", "action": "SearchText",
+                           "action_input": str(arguments["query"])})
+    return json.dumps({"thought": "I can answer directly.", "final_answer": str(arguments.get("response") or "OK")})
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of ``values`` (0 < q <= 100)."""
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, round(q / 100 * len(ordered)) - 1))]
+
+
+class Recorder:
+    """Collects per-stage durations in milliseconds."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.enabled = True
+
+    def add(self, stage, seconds):
+        if self.enabled:
+            self.samples[stage].append(seconds * 1000)
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            if self.enabled:
+                self.errors[name] += 1
+            raise
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def report(self):
+        report = {}
+        for stage in sorted(self.samples, key=lambda s: STAGES.index(s) if s in STAGES else len(STAGES)):
+            values = self.samples[stage]
+            report[stage] = {
+                "n": len(values),
+                "mean": sum(values) / len(values),
+                "p50": percentile(values, 50),
+                "p90": percentile(values, 90),
+                "p99": percentile(values, 99),
+                "max": max(values),
+                "errors": self.errors.get(stage, 0),
+            }
+        return report
+
+
+def replay_flyp(cases, recorder, use_fast_path=True):
+    """Push each case through the flyp_agent turn: fast path, else router, else select; then dispatch.
+
+    Returns ``(skipped, failures)``: how many selections the current tools
+    reject, and the exceptions raised per input as ``{input: [error, ...]}``.
+    """
+    import db
+    import flyp_agent as agent
+    from fast_path import FastPathRouter
+    from langchain_core.exceptions import OutputParserException
+
+    router = FastPathRouter() if use_fast_path else None
+    skipped = 0
+    failures = defaultdict(list)
+    for case in cases:
+        text = case["input"]
+        db_start = db.busy_time()
+        start = time.perf_counter()
+        try:
+            with recorder.stage("fast_path"):
+                route = router.route(text) if router else None
+            selection = {"name": route.name, "arguments": route.arguments} if route else None
+            if selection is None and agent.cascade.enabled:
+                # As in the Streamlit app: the small model routes first, None escalates
+                with recorder.stage("router"):
+                    selection = agent.cascade.route(agent.router_stream.stream({"input": text}))
+            if selection is None:
+                with recorder.stage("prompt"):
+                    messages = agent.prompt.invoke({"input": text})
+                with recorder.stage("llm"):
+                    raw = agent.selection_model.invoke(messages)
+                with recorder.stage("parse"):
+                    try:
+                        selection = agent.parser.invoke(raw)
+                    except OutputParserException:
+                        # A logged selection of a tool, or arguments, the agent no longer has
+                        selection = None
+                if selection is None:
+                    skipped += 1
+                    continue
+
+            name, arguments = selection["name"], selection["arguments"]
+            if name == "converse" and "response" not in arguments:
+                with recorder.stage("llm"):
+                    agent.model.invoke(arguments["input"])
+            elif name not in agent.tool_map:
+                skipped += 1
+                continue
+            else:
+                with recorder.stage("tool"):
+                    agent.tool_map[name].invoke(arguments)
+        except Exception as e:
+            failures[text].append(f"{type(e).__name__}: {e}")
+            continue
+        recorder.add("db", db.busy_time() - db_start)
+        recorder.add("total", time.perf_counter() - start)
+    return skipped, failures
+
+
+class StageTimer(BaseCallbackHandler):
+    """Times the model calls and tool runs inside an agent executor as ``<prefix>.llm`` and ``<prefix>.tool``."""
+
+    def __init__(self, recorder, prefix):
+        self.recorder = recorder
+        self.prefix = prefix
+        self._started = {}  # run id -> start time
+
+    def _start(self, run_id):
+        self._started[run_id] = time.perf_counter()
+
+    def _end(self, stage, run_id, failed=False):
+        start = self._started.pop(run_id, None)
+        if start is None:
+            return
+        stage = f"{self.prefix}.{stage}"
+        if failed and self.recorder.enabled:
+            self.recorder.errors[stage] += 1
+        self.recorder.add(stage, time.perf_counter() - start)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._end("llm", run_id)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end("llm", run_id, failed=True)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self._start(run_id)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end("tool", run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end("tool", run_id, failed=True)
+
+
+def replay_react(cases, recorder, entry):
+    """Push each case through one ReAct bot's turn (``answer``), as its chat loop does.
+
+    Returns the exceptions raised per input as ``{input: [error, ...]}``.
+    """
+    import db
+
+    bot = importlib.import_module(REACT_ENTRY_POINTS[entry])
+    timer = StageTimer(recorder, entry)
+    failures = defaultdict(list)
+    for case in cases:
+        text = case["input"]
+        db_start = db.busy_time()
+        start = time.perf_counter()
+        try:
+            bot.answer(text, callbacks=[timer])
+        except Exception as e:
+            failures[text].append(f"{type(e).__name__}: {e}")
+            continue
+        recorder.add(f"{entry}.db", db.busy_time() - db_start)
+        recorder.add(f"{entry}.total", time.perf_counter() - start)
+    return failures
+
+
+def regressions(report, baseline, tolerance=TOLERANCE):
+    found = []
+    for stage, current in report.items():
+        previous = baseline.get(stage)
+        if not previous:
+            continue
+        for key in ("p50", "p90"):
+            limit = previous[key] * (1 + tolerance) + NOISE_FLOOR_MS
+            if current[key] > limit:
+                found.append(f"{stage} {key}: {current[key]:.2f}ms > {limit:.2f}ms (baseline {previous[key]:.2f}ms)")
+    return found
+
+
+def print_report(report):
+    print(f"{'stage':<14}{'n':>6}{'mean':>10}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}{'errors':>8}")
+    for stage, row in report.items():
+        print(f"{stage:<14}{row['n']:>6}" + "".join(f"{row[k]:>10.2f}" for k in ("mean", "p50", "p90", "p99", "max"))
+              + f"{row['errors']:>8}")
+    print("(milliseconds)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded inputs against a mock Ollama and report stage latencies.")
+    parser.add_argument("sources", nargs="*", default=["chatbot_logs.log"],
+                        help="JSONL files of inputs, or chatbot logs to rebuild inputs from")
+    parser.add_argument("--db", default="real_estate.db", help="database to copy and replay against")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--warmup", type=int, default=1, help="unrecorded passes before measuring")
+    parser.add_argument("--ttft", type=float, default=0.0, help="mock seconds before the first token")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="mock seconds between tokens")
+    parser.add_argument("--entry", action="append", choices=ENTRY_POINTS,
+                        help="entry point to replay, repeatable (default: all)")
+    parser.add_argument("--no-fast-path", action="store_true")
+    parser.add_argument("--no-router", action="store_true", help="send every turn to the large model")
+    parser.add_argument("--router-confidence", type=float, default=1.0,
+                        help="confidence the mock router reports; below the threshold every turn escalates")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--baseline", help="report from an earlier run; exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args()
+
+    cases = load_cases(args.sources)
+    if not cases:
+        sys.exit("No replayable inputs found")
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    output = os.path.abspath(args.json) if args.json else None
+
+    entries = args.entry or list(ENTRY_POINTS)
+    server = MockOllama(ttft=args.ttft, token_delay=args.token_delay).start()
+    server.add(REACT_OBSERVATION, REACT_FINAL_STEP)
+    for case in cases:
+        if case["response"]:
+            server.add_exact(case["input"], with_confidence(case["response"], args.router_confidence))
+        server.add(react_prompt(case["input"]), react_step(case["response"]))
+    os.environ["OLLAMA_URL"] = server.url
+    if args.no_router:
+        os.environ["FLYP_ROUTER_MODEL"] = ""
+
+    # Replay against a scratch copy: tools write to the database and the log
+    workdir = tempfile.mkdtemp(prefix="flyp-bench-")
+    if os.path.exists(args.db):
+        shutil.copy(args.db, os.path.join(workdir, "real_estate.db"))
+    os.chdir(workdir)
+
+    def replay(recorder):
+        """One pass over every entry point; returns (skipped, {(entry, input): [error, ...]})."""
+        skipped, failures = 0, defaultdict(list)
+        for entry in entries:
+            if entry == "flyp":
+                skipped, entry_failures = replay_flyp(cases, recorder, not args.no_fast_path)
+            else:
+                entry_failures = replay_react(cases, recorder, entry)
+            for text, errors in entry_failures.items():
+                failures[entry, text].extend(errors)
+        return skipped, failures
+
+    recorder = Recorder()
+    recorder.enabled = False
+    for _ in range(args.warmup):
+        replay(recorder)
+    recorder.enabled = True
+    skipped, failures = 0, defaultdict(list)
+    for _ in range(args.repeat):
+        run_skipped, run_failures = replay(recorder)
+        skipped += run_skipped
+        for key, errors in run_failures.items():
+            failures[key].extend(errors)
+
+    report = recorder.report()
+    print(f"Replayed {len(cases)} inputs x{args.repeat} through {', '.join(entries)} "
+          f"({skipped} selections of unknown tools or arguments skipped), "
+          f"{server.requests} mock model requests")
+    print_report(report)
+    for (entry, text), errors in failures.items():
+        print(f"FAILED x{len(errors)} [{entry}] {text!r}: {errors[0]}")
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+    server.stop()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    found = regressions(report, baseline, args.tolerance) if baseline else []
+    for line in found:
+        print("REGRESSION", line)
+    sys.exit(1 if found or failures else 0)
@@ -0,0 +1,86 @@
+from collections import namedtuple
+
+import db
+from property_resolver import get_resolver
+from write_queue import get_write_queue
+
+# Outcome of one property in a bulk update; ``label`` names the row that was changed
+ItemResult = namedtuple("ItemResult", ["identifier", "property_id", "ok", "message", "label"], defaults=(None,))
+
+# SQLite's default limit on host parameters per statement is 999
+CHUNK_SIZE = 900
+
+
+def _chunks(items, size=CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _apply(conn, targets, new_status, status_detail, current_status):
+    """Writer-thread half of ``bulk_update_status``: returns the ids that existed and were updated."""
+    if current_status:
+        for property_id, shortcode in conn.execute(
+            "SELECT property_id, shortcode FROM Property WHERE status = ?", (current_status,)
+        ):
+            targets.setdefault(property_id, shortcode)
+
+    # Resolved ids may be stale if rows were deleted since the index was built
+    existing = set()
+    for chunk in _chunks(list(targets)):
+        existing.update(row[0] for row in conn.execute(
+            f"SELECT property_id FROM Property WHERE property_id IN ({','.join('?' * len(chunk))})", chunk
+        ))
+
+    conn.executemany(
+        "UPDATE Property SET status = ?, status_detail = ? WHERE property_id = ?",
+        [(new_status, status_detail, property_id) for property_id in targets if property_id in existing],
+    )
+    return existing
+
+
+def bulk_update_status(new_status, status_detail="", identifiers=(), current_status=None, path=db.DB_PATH):
+    """Set status and status_detail on many properties in one transaction on the shared writer.
+
+    Properties are chosen by ``identifiers`` (ids, shortcodes, addresses or
+    names, which must match exactly) and/or by ``current_status``. Returns one
+    ItemResult per requested identifier or matched property.
+    """
+    resolver = get_resolver(path)
+    results = []
+    targets = {}  # property_id -> identifier it was requested by
+
+    for identifier in identifiers:
+        property_id = resolver.exact(identifier)
+        if property_id is None:
+            results.append(ItemResult(identifier, None, False, resolver.describe(identifier, resolver.resolve(identifier, 3))))
+        elif property_id in targets:
+            results.append(ItemResult(identifier, property_id, False, f"Duplicate of '{targets[property_id]}'"))
+        else:
+            targets[property_id] = identifier
+
+    # The shared writer runs this in one savepoint, group-committed with other sessions' writes
+    existing = get_write_queue(path).submit(_apply, targets, new_status, status_detail, current_status).result()
+
+    for property_id, identifier in targets.items():
+        if property_id in existing:
+            results.append(ItemResult(identifier, property_id, True, f"Updated to '{new_status}'",
+                                      resolver.label(property_id)))
+        else:
+            results.append(ItemResult(identifier, property_id, False, "Property no longer exists"))
+    return results
+
+
+def summarize(results, new_status, limit=20):
+    """Render bulk update results as a short message for the user."""
+    updated = [r for r in results if r.ok]
+    failed = [r for r in results if not r.ok]
+    lines = [f"Updated {len(updated)} propert{'y' if len(updated) == 1 else 'ies'} to '{new_status}'"]
+    if updated:
+        shown = ", ".join(r.label or r.identifier for r in updated[:limit])
+        more = f" and {len(updated) - limit} more" if len(updated) > limit else ""
+        lines[0] += f": {shown}{more}"
+    for r in failed[:limit]:
+        lines.append(f"Failed '{r.identifier}': {r.message}")
+    if len(failed) > limit:
+        lines.append(f"... and {len(failed) - limit} more failures")
+    return "\n".join(lines)
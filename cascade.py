@@ -0,0 +1,154 @@
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from streaming import ToolCallStream
+from tool_calls import ToolCallError, validate_call
+
+# Small model that picks the tool and extracts its arguments. Set
+# FLYP_ROUTER_MODEL to an empty string to send every turn to the large model.
+ROUTER_MODEL = os.environ.get("FLYP_ROUTER_MODEL", "llama3.1:8b")
+# Router selections reporting less confidence than this are escalated
+CONFIDENCE_THRESHOLD = float(os.environ.get("FLYP_ESCALATE_BELOW", "0.7"))
+# Tools whose output is text written by the model; these get the large model's wording
+QUALITY_TOOLS = frozenset({"converse"})
+
+# Appended to the router's system prompt, after the part it shares with the large model
+CONFIDENCE_INSTRUCTIONS = "Set 'confidence' to how sure you are, from 0 to 1, that this is the right tool and arguments."
+
+
+class Cascade:
+    """Routes turns with a small model and escalates to the large one when unsure.
+
+    A router selection is escalated when it cannot be parsed, names an unknown
+    tool, has arguments that do not fit the tool's signature, reports low or no
+    confidence, or picks a tool in ``quality_tools``. Latency is kept per tier
+    and every escalation is counted by reason.
+    """
+
+    def __init__(self, tool_map, router_model=ROUTER_MODEL, threshold=CONFIDENCE_THRESHOLD,
+                 quality_tools=QUALITY_TOOLS):
+        self.tool_map = tool_map
+        self.router_model = router_model
+        self.threshold = threshold
+        self.quality_tools = frozenset(quality_tools)
+        self.turns = 0
+        self.escalations = Counter()
+        # Running per-tier totals; a list per tier would grow with every turn
+        self.calls = Counter()
+        self.seconds = Counter()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return bool(self.router_model)
+
+    def check(self, selection):
+        """Return why ``selection`` must be escalated, or None to accept it.
+
+        Removes the router-only ``confidence`` key so the selection can be
+        dispatched like one from the large model.
+        """
+        if not isinstance(selection, dict) or not isinstance(selection.get("arguments"), dict):
+            return "parse_error"
+        confidence = selection.pop("confidence", None)
+        tool = self.tool_map.get(selection.get("name"))
+        if tool is None:
+            return "unknown_tool"
+        if selection["name"] in self.quality_tools:
+            return "quality"
+        try:
+            selection["arguments"] = validate_call(selection, self.tool_map)["arguments"]
+        except ToolCallError:
+            return "invalid_arguments"
+        try:
+            confidence = float(confidence)
+        except (TypeError, ValueError):
+            return "no_confidence"
+        if confidence < self.threshold:
+            return "low_confidence"
+        return None
+
+    def route(self, chunks):
+        """Read a streamed router selection; return it, or None to escalate.
+
+        The stream is abandoned as soon as the tool name shows the turn will be
+        escalated anyway, so the router does not finish writing a reply nobody
+        will see.
+        """
+        start = time.perf_counter()
+        call = ToolCallStream(chunks)
+        try:
+            name = call.name()
+            if name in self.quality_tools:
+                selection = {"name": name, "arguments": {}}
+                if hasattr(chunks, "close"):
+                    chunks.close()
+            else:
+                selection = call.result()
+        except Exception as e:
+            logging.warning(f"Router model failed: {e}")
+            selection = None
+        reason = self.check(selection)
+        self.record("router", time.perf_counter() - start, reason)
+        return selection if reason is None else None
+
+    def run(self, tiers, reject):
+        """Call each ``(tier, func)`` in turn until ``reject(result)`` returns None.
+
+        ``reject`` returns the escalation reason for results that are not good
+        enough; the last tier's result is returned regardless.
+        """
+        for position, (tier, func) in enumerate(tiers):
+            start = time.perf_counter()
+            last = position == len(tiers) - 1
+            try:
+                result = func()
+            except Exception as e:
+                if last:
+                    raise
+                logging.warning(f"Cascade tier {tier} failed: {e}")
+                result, reason = None, "error"
+            else:
+                reason = None if last else reject(result)
+            self.record(tier, time.perf_counter() - start, reason, counts_turn=position == 0)
+            if reason is None:
+                return result
+
+    @contextmanager
+    def timed(self, tier):
+        """Time a call to ``tier`` that was not routed through this cascade's methods."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(tier, time.perf_counter() - start, counts_turn=not self.enabled)
+
+    def record(self, tier, seconds, reason=None, counts_turn=True):
+        with self._lock:
+            self.calls[tier] += 1
+            self.seconds[tier] += seconds
+            if counts_turn:
+                self.turns += 1
+            if reason:
+                self.escalations[reason] += 1
+            rate = self.escalation_rate()
+        outcome = f"escalated ({reason})" if reason else "answered"
+        logging.info(f"Cascade tier={tier} {seconds * 1000:.0f}ms {outcome}; "
+                     f"escalation rate {rate:.1%} of {self.turns} turns")
+
+    def escalation_rate(self):
+        return sum(self.escalations.values()) / self.turns if self.turns else 0.0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "turns": self.turns,
+                "escalation_rate": self.escalation_rate(),
+                "escalations": dict(self.escalations),
+                "tiers": {tier: {"calls": calls, "mean_ms": self.seconds[tier] / calls * 1000}
+                          for tier, calls in self.calls.items()},
+            }
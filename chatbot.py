@@ -1,4 +1,6 @@
-import sqlite3
+from db import get_pool
+from context_builder import ContextBuilder, CONTEXT_TOKEN_BUDGET
+from token_budget import estimate_tokens
 from langchain.llms import Ollama
 from langchain.chains import ConversationChain
 from langchain.memory import ConversationBufferMemory
@@ -7,51 +9,46 @@ from langchain_community.agent_toolkits import create_sql_agent
 # Database Connection
 DB_PATH = "real_estate.db"  # Update with your actual database file
 
-def get_context(phone_number):
-    """Fetches chat history, role, property details for the given phone number."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+# Keeps recent turns verbatim and a rolling summary of older ones
+context_builder = ContextBuilder(path=DB_PATH)
 
-    # Fetch role and associated property
-    cursor.execute("""
-        SELECT role, property_id FROM Role_map WHERE phone_number = ?
-    """, (phone_number,))
-    role_data = cursor.fetchone()
-    
-    if not role_data:
-        conn.close()
-        return None  # No role or property found
+def get_context(phone_number, budget=CONTEXT_TOKEN_BUDGET):
+    """Fetches chat history, role, property details for the given phone number within a token budget."""
+    pool = get_pool(DB_PATH)
+    with pool.connection() as conn:
+        # Fetch role and associated property
+        role_data = conn.execute("""
+            SELECT role, property_id FROM Role_map WHERE phone_number = ?
+        """, (phone_number,)).fetchone()
 
-    role, property_id = role_data
+        if not role_data:
+            return None  # No role or property found
 
-    # Fetch property details
-    cursor.execute("""
-        SELECT address, status, status_detail FROM Property WHERE property_id = ?
-    """, (property_id,))
-    property_data = cursor.fetchone()
-    
-    if not property_data:
-        conn.close()
-        return None  # No property found
+        role, property_id = role_data
 
-    property_address, property_status, property_status_details = property_data
+        # Fetch property details
+        property_data = conn.execute("""
+            SELECT address, status, status_detail FROM Property WHERE property_id = ?
+        """, (property_id,)).fetchone()
 
-    # Fetch chat history
-    cursor.execute("""
-        SELECT chat FROM Conversation WHERE phone_number = ?
-    """, (phone_number,))
-    chat_history = "\n".join(row[0] for row in cursor.fetchall())
+        if not property_data:
+            return None  # No property found
 
-    conn.close()
+        property_address, property_status, property_status_details = property_data
 
     # Construct context
-    context = f"""
+    header = f"""
     Role: {role}
     Property Address: {property_address}
     Property Status: {property_status}
     Property Status Details: {property_status_details}
     Previous Chat History:
-    {chat_history if chat_history else "No prior conversation found."}
+    """
+
+    # Fetch chat history: summary of older turns plus the most recent ones
+    chat_history = context_builder.build(phone_number, budget - estimate_tokens(header))
+
+    context = header + f"""{chat_history if chat_history else "No prior conversation found."}
     """
 
     return context
@@ -1,14 +1,23 @@
-import sqlite3
-from langchain_community.utilities import SQLDatabase
+from db import execute
+from guarded_query import run_query
+from search import search_for_caller
+import migrations
+from schema_snapshot import get_snapshot
+from tracing import get_tracer
+from tool_calls import parse_react_step, react_step_schema
+from prompt_builder import PromptBuilder, tool_manifest
 from langchain_ollama import ChatOllama
+from warmup import OLLAMA_URL, KEEP_ALIVE
 from langchain_core.prompts import PromptTemplate
 from langchain.tools import Tool
-from langchain.schema import AgentAction, AgentFinish
+from langchain.schema import AgentFinish
 from langchain.agents import create_react_agent, AgentExecutor, AgentOutputParser
 
-# Initialize database
-db = SQLDatabase.from_uri("sqlite:///real_estate.db")
-llm = ChatOllama(model="llama3:70b")
+# Initialize database: bring the schema (indexes, FTS tables) up to date first
+migrations.migrate()
+schema = get_snapshot("real_estate.db")
+tracer = get_tracer()
+llm = ChatOllama(model="llama3:70b", base_url=OLLAMA_URL, keep_alive=KEEP_ALIVE)  # stay resident between turns
 
 # Function to update property status
 def update_property_status(input_str: str):
@@ -21,26 +30,21 @@ def update_property_status(input_str: str):
         property_id = int(property_id.strip())
         status = status.strip()
 
-        with sqlite3.connect("real_estate.db") as conn:
-            cursor = conn.cursor()
-            cursor.execute("UPDATE Property SET status = ? WHERE id = ?", (status, property_id))
-            conn.commit()
-            return f"✅ Successfully updated property {property_id} to status '{status}'."
+        execute("UPDATE Property SET status = ? WHERE id = ?", (status, property_id))
+        return f"✅ Successfully updated property {property_id} to status '{status}'."
     except ValueError:
         return "Error: Property ID must be an integer."
     except Exception as e:
         return f"Error updating property: {e}"
 
+# Full-text search; this console has no logged-in caller, so past chats are not searched
+def search_records(text: str):
+    return search_for_caller(text)
+
 # Function to execute SQL query
 def query_database(query: str):
-    try:
-        with sqlite3.connect("real_estate.db") as conn:
-            cursor = conn.cursor()
-            cursor.execute(query)
-            results = cursor.fetchall()
-            return str(results)
-    except Exception as e:
-        return f"Error querying database: {e}"
+    # Read-only, plan-checked, time- and row-limited
+    return run_query(query)
 
 # Define tools
 tools = [
@@ -52,83 +56,71 @@ tools = [
     Tool(
         name="QueryDatabase",
         func=query_database,
-        description="Executes an SQL query against the database. Input should be a valid SQL query.",
+        description="Runs a read-only SQL SELECT against the database and returns at most 200 rows. Input should be a valid SQL query. Filter on indexed columns; full scans of large tables are refused.",
+    ),
+    Tool(
+        name="SearchText",
+        func=search_records,
+        description="Full-text search over property names, addresses and status details, best matches first. Input should be the words to look for. Example: 'roof leak'",
     )
 ]
 
-# Define prompt template
-template = """
-You are an AI assistant interacting with a SQL database.
-
-### 🚨 STRICT RESPONSE FORMAT:
-1. **Tool Call:** 
-   Thought: <your reasoning>
-   Action: <tool_name>
-   Action Input: <input to tool>
-
-2. **Final Answer:** 
-   Thought: <your reasoning>
-   Final Answer: <your final answer>
-
-ONLY respond with Thought, Action, and Action Input, or Final Answer.
-
-### 📋 AVAILABLE TABLES:
-{db_tables}
-
-### 🛠️ AVAILABLE TOOLS:
-{tool_names}
-
-### USER QUERY:
-{input}
-
-{agent_scratchpad}
-"""
+# Define prompt template: static sections first so turns share a cached prefix;
+# the builder strips the markdown decoration and keeps the prefill within budget
+template = (
+    PromptBuilder("react_agent", budget=300)
+    .add("role", "You are an AI assistant interacting with a SQL database.")
+    .add("rules", """
+        ### 🚨 RESPONSE:
+        Give your thought, then either an action with its action_input, or a final_answer.
+    """)
+    .add_tools("tools", tools, placeholder="TOOLS:\n{tools}")
+    .add("tables", """
+        ### 📋 AVAILABLE TABLES:
+        {db_tables}
+    """)
+    .add("query", """
+        ### USER QUERY:
+        {input}
+
+        {agent_scratchpad}
+    """)
+    .build()
+)
 
 
 prompt = PromptTemplate(
     template=template,
-    input_variables=["input", "db_tables", "agent_scratchpad", "tool_names", "tools"]
+    input_variables=["input", "db_tables", "agent_scratchpad", "tools"]
 )
 
-# Output Parser
+# Output Parser: steps are schema-constrained JSON; a step cut short by a stop
+# sequence or the token limit still fails to parse and goes back to the model
 class CustomOutputParser(AgentOutputParser):
     def parse(self, llm_output: str):
         llm_output = llm_output.strip()
         print("\n🔍 RAW LLM OUTPUT:\n", llm_output, "\n")
+        step = parse_react_step(llm_output)
 
         # Handle forbidden phrases
         forbidden_phrases = ["I'm here to help.", "How can I assist", "Sure, I can do that."]
-        if any(phrase in llm_output for phrase in forbidden_phrases):
+        if isinstance(step, AgentFinish) and any(phrase in step.return_values["output"] for phrase in forbidden_phrases):
             return AgentFinish({"output": "Invalid response: Unnecessary filler text."}, log=llm_output)
-
-        # Handle Final Answer
-        if "Final Answer:" in llm_output:
-            final_answer = llm_output.split("Final Answer:")[-1].strip()
-            return AgentFinish({"output": final_answer}, log=llm_output)
-
-        # Handle Tool Actions
-        if "Action:" in llm_output and "Action Input:" in llm_output:
-            try:
-                action = llm_output.split("Action:")[1].split("\n")[0].strip()
-                action_input = llm_output.split("Action Input:")[1].split("\n")[0].strip()
-                return AgentAction(tool=action, tool_input=action_input, log=llm_output)
-            except Exception:
-                return AgentFinish({"output": "Invalid response format detected."}, log=llm_output)
-
-        return AgentFinish({"output": f"Unstructured response detected: '{llm_output}'"}, log=llm_output)
+        return step
 
 
 output_parser = CustomOutputParser()
 
 # Agent Setup
 agent = create_react_agent(
-    llm=llm,
+    llm=llm.bind(format=react_step_schema(tools)),
     tools=tools,
     prompt=prompt.partial(
         tool_names=", ".join([t.name for t in tools]),
-        tools=", ".join([t.description for t in tools])  # Added this line
+        tools=tool_manifest(tools)
     ),
-    output_parser=output_parser
+    output_parser=output_parser,
+    tools_renderer=tool_manifest
 )
 
 agent_executor = AgentExecutor(
@@ -138,6 +130,16 @@ agent_executor = AgentExecutor(
     handle_parsing_errors=True
 )
 
+# One turn through the agent; used by the chat loop and by benchmark.py
+def answer(user_input, conversation_history="", callbacks=()):
+    handler = tracer.langchain_handler()
+    with tracer.request(entry="react"):
+        return agent_executor.invoke({
+            "input": user_input,  # Make sure this is passed
+            "db_tables": schema.table_list(),
+            "agent_scratchpad": conversation_history,
+        }, config={"callbacks": list(callbacks) + ([handler] if handler else [])})
+
 # Interactive Chat Loop
 def interactive_chat():
     conversation_history = ""
@@ -150,14 +152,7 @@ def interactive_chat():
             break
 
         # Invoke the agent with conversation context
-        response = agent_executor.invoke({
-            "input": user_input,  # Make sure this is passed
-            "db_tables": db.get_usable_table_names(),
-            "agent_scratchpad": conversation_history,
-            "tool_names": ", ".join([t.name for t in tools])  # Added this to match prompt variables
-        })
-
-
+        response = answer(user_input, conversation_history)
 
         # Display AI's response
         print("AI:", response.get('output'))
@@ -166,4 +161,5 @@ def interactive_chat():
         conversation_history += f"\nUser: {user_input}\nAI: {response.get('output')}\n"
 
 # Start chat
-interactive_chat()
+if __name__ == "__main__":
+    interactive_chat()
@@ -1,8 +1,9 @@
-import sqlite3
+import db
 import re
 from langchain_ollama import OllamaLLM
 from langgraph.graph import StateGraph
 from typing import Dict, Any, Optional
+from prompt_builder import PromptBuilder
 
 # Initialize LLM
 llm = OllamaLLM(model="llama3:70b")  # Use an AI model for better language understanding
@@ -13,39 +14,38 @@ DB_PATH = "real_estate.db"  # Ensure this is the correct path
 def execute_query(query, params=(), fetch=False):
     """Executes a SQL query safely with proper commit and error handling."""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute(query, params)
-        
         if fetch:
-            result = cursor.fetchall()
-            conn.close()
-            return result
+            return db.get_pool(DB_PATH).fetchall(query, params)
         
-        conn.commit()
-        conn.close()
+        db.get_pool(DB_PATH).execute(query, params)
         return "Success"
     except Exception as e:
         print("[ERROR] Database operation failed:", e)
         return f"Database error: {e}"
 
+# Built once and compacted: the indented f-string used to be resent, whitespace and all, on every call
+INTENT_PROMPT = (
+    PromptBuilder("lee_intent", budget=200)
+    .add("role", "You are a real estate chatbot. Analyze the user's input and classify the intent.")
+    .add("input", 'User Input: "{user_input}"')
+    .add("intents", """
+        Possible intents:
+        - update: User wants to update a property field (e.g., status).
+        - meeting: User wants to schedule a meeting with an agent.
+    """)
+    .add("format", """
+        Extracted Format:
+        - If updating a property: ("update", property_id, status, new_value)
+        - If scheduling a meeting: ("meeting", property_id)
+        - If unknown: None
+    """)
+    .build()
+)
+
 def detect_request(user_input: str, default_property_id: Optional[str]) -> Optional[tuple]:
     """Uses an LLM to understand user input and extract intent dynamically."""
     
-    prompt = f"""
-    You are a real estate chatbot. Analyze the user's input and classify the intent.
-    
-    User Input: "{user_input}"
-    
-    Possible intents:
-    - update: User wants to update a property field (e.g., status).
-    - meeting: User wants to schedule a meeting with an agent.
-    
-    Extracted Format:
-    - If updating a property: ("update", property_id, status, new_value)
-    - If scheduling a meeting: ("meeting", property_id)
-    - If unknown: None
-    """
+    prompt = INTENT_PROMPT.format(user_input=user_input)
     
     llm_response = llm.generate([prompt])
     
@@ -1,4 +1,5 @@
-import sqlite3
+import db
+from write_queue import get_write_queue
 import re
 from langchain_ollama import OllamaLLM
 from langgraph.graph import StateGraph
@@ -10,17 +11,10 @@ DB_PATH = "real_estate.db"  # Ensure this is the correct path
 def execute_query(query, params=(), fetch=False):
     """Executes a SQL query safely with proper commit and error handling."""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute(query, params)
-        
         if fetch:
-            result = cursor.fetchall()
-            conn.close()
-            return result
+            return db.get_pool(DB_PATH).fetchall(query, params)
         
-        conn.commit()
-        conn.close()
+        db.get_pool(DB_PATH).execute(query, params)
         return "Success"
     except Exception as e:
         print("[ERROR] Database operation failed:", e)
@@ -67,12 +61,13 @@ def update_property(property_id: str, field: str, new_value: str):
     print(f"[DEBUG] Updating property {property_id} field '{field}' to '{new_value}'")
     
     query = f"UPDATE Property SET {field} = ? WHERE property_id = ?"
-    result = execute_query(query, (new_value, property_id))
-    
-    if result == "Success":
-        return f"✅ Property {property_id} updated successfully."
-    else:
-        return result
+    try:
+        # Group-committed with concurrent updates by the shared writer thread
+        get_write_queue(DB_PATH).execute(query, (new_value, property_id)).result()
+    except Exception as e:
+        print("[ERROR] Database operation failed:", e)
+        return f"Database error: {e}"
+    return f"✅ Property {property_id} updated successfully."
 
 def detect_request(user_input: str, default_property_id: Optional[str]) -> Optional[tuple]:
     """Parses user input to detect update or meeting requests."""
@@ -1,14 +1,27 @@
-import sqlite3
-from langchain_community.utilities import SQLDatabase
+from db import execute, fetchone
+from guarded_query import run_query
+from search import search_for_caller
+import migrations
+from result_format import format_record
+from schema_snapshot import get_snapshot
+from tracing import get_tracer
+from cascade import Cascade, ROUTER_MODEL
+from tool_calls import parse_react_step, react_step_schema
+from prompt_builder import PromptBuilder, tool_manifest
 from langchain_ollama import ChatOllama
+from warmup import OLLAMA_URL, KEEP_ALIVE
 from langchain_core.prompts import PromptTemplate
+from langchain_core.callbacks import BaseCallbackHandler
 from langchain.tools import Tool
-from langchain.schema import AgentAction, AgentFinish
+from langchain.schema import AgentFinish
 from langchain.agents import create_react_agent, AgentExecutor, AgentOutputParser
 
-# Initialize database and LLM
-db = SQLDatabase.from_uri("sqlite:///real_estate.db")
-llm = ChatOllama(model="llama3:70b")
+# Initialize database and LLM: bring the schema (indexes, FTS tables) up to date first
+migrations.migrate()
+schema = get_snapshot("real_estate.db")
+tracer = get_tracer()
+llm = ChatOllama(model="llama3:70b", base_url=OLLAMA_URL, keep_alive=KEEP_ALIVE)  # stay resident between turns
+router_llm = ChatOllama(model=ROUTER_MODEL, base_url=OLLAMA_URL, keep_alive=KEEP_ALIVE) if ROUTER_MODEL else None  # tried first
 
 # Utility functions
 def update_property_status(input_str: str):
@@ -17,133 +30,174 @@ def update_property_status(input_str: str):
         property_id, status = map(str.strip, input_str.split(","))
         property_id = int(property_id)
 
-        with sqlite3.connect("real_estate.db") as conn:
-            cursor = conn.cursor()
-            cursor.execute("UPDATE Property SET status = ? WHERE property_id = ?", (status, property_id))
-            conn.commit()
+        execute("UPDATE Property SET status = ? WHERE property_id = ?", (status, property_id))
         return f"✅ Successfully updated property {property_id} to status '{status}'."
     except ValueError as ve:
         return f"Error: Invalid format. Ensure input is 'property_id,status' (e.g., '1,Sold'). Details: {ve}"
     except Exception as e:
         return f"Error updating property: {e}"
 
+# The logged-in caller; SearchText only reaches their own chats
+session = {"phone_number": None}
+
+def search_records(text: str):
+    return search_for_caller(text, phone_number=session["phone_number"])
+
 def query_database(query: str):
-    try:
-        with sqlite3.connect("real_estate.db") as conn:
-            cursor = conn.cursor()
-            cursor.execute(query)
-            return str(cursor.fetchall())
-    except Exception as e:
-        return f"Error querying database: {e}"
+    # Read-only, plan-checked, time- and row-limited
+    return run_query(query)
 
 # Load property details based on phone number
 def load_property_details(phone_number: str):
     try:
-        with sqlite3.connect("real_estate.db") as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT p.property_id, p.address, p.shortcode, p.name, p.status, p.status_detail
-                FROM Property p
-                JOIN Role_map r ON p.property_id = r.property_id
-                WHERE r.phone_number = ?
-            """, (phone_number,))
-            property_details = cursor.fetchone()
-
-            if property_details:
-                return {
-                    "property_id": property_details[0],
-                    "address": property_details[1],
-                    "shortcode": property_details[2],
-                    "name": property_details[3],
-                    "status": property_details[4],
-                    "status_detail": property_details[5]
-                }
-            return None
+        property_details = fetchone("""
+            SELECT p.property_id, p.address, p.shortcode, p.name, p.status, p.status_detail
+            FROM Property p
+            JOIN Role_map r ON p.property_id = r.property_id
+            WHERE r.phone_number = ?
+        """, (phone_number,))
+
+        if property_details:
+            return {
+                "property_id": property_details[0],
+                "address": property_details[1],
+                "shortcode": property_details[2],
+                "name": property_details[3],
+                "status": property_details[4],
+                "status_detail": property_details[5]
+            }
+        return None
     except Exception as e:
         return f"Error loading property details: {e}"
 
 # Tools
 tools = [
     Tool(name="UpdatePropertyStatus", func=update_property_status, description="Updates the status of a property. Input: 'property_id,status' (e.g., '1,Sold')."),
-    Tool(name="QueryDatabase", func=query_database, description="Executes an SQL query against the database. Input: valid SQL query.")
+    Tool(name="QueryDatabase", func=query_database, description="Runs a read-only SQL SELECT against the database and returns at most 200 rows. Input: valid SQL query."),
+    Tool(name="SearchText", func=search_records, description="Ranked full-text search over property names, addresses, status details and your past chats. Input: words to look for (e.g., 'roof leak').")
 ]
 
-# Prompt Template
-template = """
-You are an AI assistant interacting with a SQL database.
-
-### PROPERTY DETAILS:
-{property_details}
-
-### 🚨 STRICT RESPONSE FORMAT:
-1. **Tool Call:** 
-   Thought: <your reasoning>
-   Action: <tool_name>
-   Action Input: <input to tool> (NO extra quotes or unnecessary characters)
-
-2. **Final Answer:** 
-   Thought: <your reasoning>
-   Final Answer: <your final answer>
-
-ONLY respond with Thought, Action, and Action Input, or Final Answer.
-Decide to use a tool ONLY if it's required based on the user's query. If no tool is needed, respond with a final answer directly.
-
-⚠️ **IMPORTANT:** Do NOT claim a task is completed unless you have successfully executed the tool and received confirmation. If an error occurs, retry with corrections before providing a final answer.
-
-### 📋 AVAILABLE TABLES:
-{db_tables}
-
-### 🛠️ AVAILABLE TOOLS:
-{tool_names}
-
-### TOOL DESCRIPTIONS:
-{tools}
-
-### USER QUERY:
-{input}
-
-{agent_scratchpad}
-"""
+# Prompt Template: static sections first so consecutive turns share a cached prefix;
+# the builder strips the markdown decoration and keeps the prefill within budget
+template = (
+    PromptBuilder("react_venkat", budget=350)
+    .add("role", "You are an AI assistant interacting with a SQL database.")
+    .add("rules", """
+        ### 🚨 RESPONSE:
+        Give your thought, then either an action with its action_input, or a final_answer.
+        Use a tool ONLY if the user's query needs one.
+        ⚠️ **IMPORTANT:** Do NOT claim a task is completed unless the tool confirmed it. If an error occurs, retry with corrections first.
+    """)
+    .add_tools("tools", tools, placeholder="TOOLS:\n{tools}")
+    .add("tables", """
+        ### 📋 AVAILABLE TABLES:
+        {db_tables}
+    """)
+    .add("property", """
+        ### PROPERTY DETAILS:
+        {property_details}
+    """)
+    .add("query", """
+        ### USER QUERY:
+        {input}
+
+        {agent_scratchpad}
+    """)
+    .build()
+)
 
 prompt = PromptTemplate(
     template=template,
-    input_variables=["input", "db_tables", "agent_scratchpad", "tool_names", "tools", "property_details"]
+    input_variables=["input", "db_tables", "agent_scratchpad", "tools", "property_details"]
 )
 
-# Custom Output Parser
+# Custom Output Parser: steps are schema-constrained JSON; a step cut short by a
+# stop sequence or the token limit still fails to parse and goes back to the model
 class CustomOutputParser(AgentOutputParser):
     def parse(self, llm_output: str):
-        llm_output = llm_output.strip()
-
-        if "Final Answer:" in llm_output:
-            if "Error" in llm_output:
-                return AgentFinish({"output": "Task not completed due to an error. Please correct and retry."}, log=llm_output)
-            return AgentFinish({"output": llm_output.split("Final Answer:")[-1].strip()}, log=llm_output)
+        step = parse_react_step(llm_output)
 
-        if "Action:" in llm_output and "Action Input:" in llm_output:
-            action = llm_output.split("Action:")[1].split("\n")[0].strip()
-            action_input = llm_output.split("Action Input:")[1].split("\n")[0].strip()
-            action_input = action_input.replace("'", "")  # Remove extra quotes
-
-            if action == "None":
-                return AgentFinish({"output": "No action required."}, log=llm_output)
-            return AgentAction(tool=action, tool_input=action_input, log=llm_output)
-
-        return AgentFinish({"output": f"Unstructured response detected: '{llm_output}'"}, log=llm_output)
+        if isinstance(step, AgentFinish) and "Error" in step.return_values["output"]:
+            return AgentFinish({"output": "Task not completed due to an error. Please correct and retry."}, log=llm_output)
+        return step
 
 # Agent Setup
 output_parser = CustomOutputParser()
-agent = create_react_agent(
-    llm=llm,
-    tools=tools,
-    prompt=prompt.partial(
-        tool_names=", ".join(t.name for t in tools),
-        tools="\n".join(t.description for t in tools)
-    ),
-    output_parser=output_parser
-)
 
-agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=True, handle_parsing_errors=True)
+def build_executor(model, **kwargs):
+    agent = create_react_agent(
+        llm=model.bind(format=react_step_schema(tools)),
+        tools=tools,
+        prompt=prompt.partial(
+            tool_names=", ".join(t.name for t in tools),
+            tools=tool_manifest(tools)
+        ),
+        output_parser=output_parser,
+        tools_renderer=tool_manifest
+    )
+    return AgentExecutor(agent=agent, tools=tools, verbose=True, handle_parsing_errors=True, **kwargs)
+
+agent_executor = build_executor(llm)
+# The small model gets a short leash: if it cannot finish quickly, the 70B takes over
+router_executor = build_executor(router_llm, max_iterations=3) if router_llm else None
+cascade = Cascade({t.name: t for t in tools}, ROUTER_MODEL)
+
+# Outputs that mean the small model did not manage the turn
+ESCALATE_ON = ("Agent stopped due to", "Task not completed")
+# Tools that change data: once the small model has started one, its answer stands
+MUTATING_TOOLS = {"UpdatePropertyStatus"}
+
+class WriteWatcher(BaseCallbackHandler):
+    """Notes whether a data-changing tool was started during one executor run."""
+
+    def __init__(self):
+        self.wrote = False
+
+    def on_tool_start(self, serialized, input_str, **kwargs):
+        if (serialized or {}).get("name", kwargs.get("name")) in MUTATING_TOOLS:
+            self.wrote = True
+
+def run_router(inputs, config):
+    """Run the turn on the small model, marking the response if it wrote.
+
+    Escalating would replay the whole turn on the 70B, writes included, so a
+    turn that already changed data is never escalated, even if it then failed.
+    """
+    watcher = WriteWatcher()
+    try:
+        response = router_executor.invoke(inputs, config={**config, "callbacks": config["callbacks"] + [watcher]})
+    except Exception as e:
+        if not watcher.wrote:
+            raise
+        response = {"output": f"Error after updating the property: {e}"}
+    return {**response, "wrote": watcher.wrote}
+
+def needs_escalation(response):
+    if response.get("wrote"):
+        return None
+    output = str(response.get("output", ""))
+    for marker in ESCALATE_ON:
+        if marker in output:
+            return marker
+    return None
+
+# One turn: the small model first, the 70B when it falls short; used by the
+# chat loop and by benchmark.py
+def answer(user_input, phone_number=None, property_details="", conversation_history="", callbacks=()):
+    session["phone_number"] = phone_number
+    handler = tracer.langchain_handler()
+    inputs = {
+        "input": user_input,
+        "db_tables": schema.table_list(),
+        "agent_scratchpad": conversation_history,
+        "property_details": property_details
+    }
+    config = {"callbacks": list(callbacks) + ([handler] if handler else [])}
+    tiers = [("large", lambda: agent_executor.invoke(inputs, config=config))]
+    if router_executor:
+        tiers.insert(0, ("router", lambda: run_router(inputs, config)))
+    with tracer.request(phone_number, entry="react"):
+        return cascade.run(tiers, needs_escalation)
 
 # Interactive Chat Loop
 def interactive_chat():
@@ -165,17 +219,11 @@ def interactive_chat():
             print("👋 Goodbye!")
             break
 
-        response = agent_executor.invoke({
-            "input": user_input,
-            "db_tables": db.get_usable_table_names(),
-            "agent_scratchpad": conversation_history,
-            "tool_names": ", ".join(t.name for t in tools),
-            "tools": "\n".join(t.description for t in tools),
-            "property_details": property_details
-        })
+        response = answer(user_input, phone_number, format_record(property_details), conversation_history)
 
         print("AI:", response.get('output'))
         conversation_history += f"\nUser: {user_input}\nAI: {response.get('output')}\n"
 
 # Start chat
-interactive_chat()
+if __name__ == "__main__":
+    interactive_chat()
@@ -1,19 +1,57 @@
-import streamlit as st  # to render the user interface.
-import sqlite3  # to connect to SQLite database
+import time
 import logging  # to log model responses and tool usage
-from langchain_community.llms import Ollama  # to use Ollama llms in langchain
-from langchain_core.prompts import ChatPromptTemplate  # crafts prompts for our llm
+import streamlit as st  # to render the user interface.
 from langchain_community.chat_message_histories import StreamlitChatMessageHistory  # stores message history
-from langchain_core.tools import tool  # tools for our llm
-from langchain.tools.render import render_text_description  # to describe tools as a string
-from langchain_core.output_parsers import JsonOutputParser  # ensure JSON input for tools
-from operator import itemgetter  # to retrieve specific items in our chain.
-from langchain_ollama import ChatOllama
+import db  # pooled access to the SQLite database
+from fast_path import FastPathRouter  # answers simple intents without the LLM
+from response_cache import ResponseCache, cacheable, make_key, lookup_role  # caches repeated answers
+from streaming import LatencyTimer, ToolCallStream, stream_text  # incremental parsing and token streaming
+from async_runtime import get_runtime  # runs LLM calls on one shared event loop
+from conversation_log import ConversationWriter, load_history  # write-behind chat persistence
+from warmup import Warmer  # preloads the model at startup
+from tracing import get_tracer  # per-stage timing spans, off unless FLYP_TRACE is set
+
+
+@st.cache_resource
+def load_agent():
+    # Model client, tools, prompt and chain are built once per server process
+    start = time.perf_counter()
+    import flyp_agent
+    logging.info(f"Agent resources built in {time.perf_counter() - start:.3f}s")
+    return flyp_agent
+
+
+@st.cache_resource
+def get_router():
+    # Shared by all sessions so the hit rate covers the whole process
+    return FastPathRouter()
+
+
+@st.cache_resource
+def get_response_cache():
+    return ResponseCache()
+
+
+@st.cache_resource
+def get_warmer():
+    # Load and pin the model and prime the system prompt once per process
+    models = [agent.model.model] + ([agent.router_model.model] if agent.router_model else [])
+    return Warmer(models, agent.system_prompt)
+
+
+@st.cache_resource
+def get_conversation_writer():
+    # One background writer per process persists every session's turns
+    return ConversationWriter()
 
-# Configure logging
-logging.basicConfig(filename='chatbot_logs.log', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-model = ChatOllama(model="llama3.3:70b")
+agent = load_agent()
+runtime = get_runtime()
+router = get_router()
+response_cache = get_response_cache()
+conversation_writer = get_conversation_writer()
+warmer = get_warmer()
+tracer = get_tracer()
 
 # Modal to get phone number
 if 'phone_number' not in st.session_state:
@@ -24,174 +62,74 @@ if 'phone_number' not in st.session_state:
             st.session_state.phone_number = phone_number
 
 
-@tool
-def converse(input: str) -> str:
-    "Provide a natural language response using the user input."
-    return model.invoke(input)
-
-@tool
-def update_property_status(property_identifier: str, new_status: str, status_detail: str = "") -> str:
-    """Update the status and status_detail of a property in the real estate database.
-    This tool should be used when you need to change a property's status, such as marking it as 'Sold', 
-    'Available', 'Under Contract', 'Pending', etc. The status change helps track the current state of properties
-    in the real estate inventory. You can identify the property using its ID, address, shortcode, or name.
-
-    Args:
-        property_identifier (str): The property identifier - can be property_id, address, shortcode or name
-        new_status (str): The new status to set for the property (e.g. 'Sold', 'Available', 'Under Contract')
-        status_detail (str, optional): Additional details about the status change. Defaults to empty string.
-
-    Returns:
-        str: A message confirming the status update was successful, or an error message if it failed
-    """
-    try:
-        conn = sqlite3.connect('real_estate.db')
-        cursor = conn.cursor()
-        
-        # First try to find the property using the provided identifier
-        cursor.execute("""
-            SELECT property_id FROM Property 
-            WHERE property_id = ? OR address = ? OR shortcode = ? OR name = ?
-        """, (property_identifier, property_identifier, property_identifier, property_identifier))
-        
-        result = cursor.fetchone()
-        if not result:
-            return f"Error: No property found matching identifier '{property_identifier}'"
-            
-        property_id = result[0]
-        
-        # Update both status and status_detail
-        cursor.execute("""
-            UPDATE Property 
-            SET status = ?, status_detail = ?
-            WHERE property_id = ?
-        """, (new_status, status_detail, property_id))
-        
-        conn.commit()
-        conn.close()
-        
-        update_msg = f"Property {property_identifier} status successfully updated to '{new_status}'"
-        if status_detail:
-            update_msg += f" with details: '{status_detail}'"
-        return update_msg
-        
-    except Exception as e:
-        return f"Error: {str(e)}"
-
-
-@tool
-def get_property_status(property_identifier: str) -> str:
-    """Retrieve status and status details for a specific property.
-    Args:
-        property_identifier: The property's address, shortcode, or name to look up
-    Returns:
-        str: The property's status information as a string
-    """
-    try:
-        conn = sqlite3.connect('real_estate.db')
-        cursor = conn.cursor()
-        
-        # Try to find the property using the provided identifier
-        cursor.execute("""
-            SELECT status, status_detail 
-            FROM Property 
-            WHERE address = ? OR shortcode = ? OR name = ?
-        """, (property_identifier, property_identifier, property_identifier))
-        
-        result = cursor.fetchone()
-        conn.close()
-        
-        if not result:
-            return f"No property found matching identifier '{property_identifier}'"
-            
-        status, status_detail = result
-        response = f"Property '{property_identifier}' status: {status}"
-        if status_detail:
-            response += f"\nDetails: {status_detail}"
-        return response
-        
-    except Exception as e:
-        return f"Error: {str(e)}"
-
-
-@tool
-def get_meeting_link(fly_person_name: str) -> str:
-    """Retrieve a meeting link for scheduling a meeting with a specific fly person.
-    This tool helps coordinate meetings by providing the appropriate video conferencing link
-    for the specified fly team member.
-    
-    Args:
-        fly_person_name: The name of the fly team member you want to meet with
-        
-    Returns:
-        str: The meeting link for the specified person, or an error message if the person is not found
-    """
-    try:
-        conn = sqlite3.connect('real_estate.db')
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT meeting_link
-            FROM Flyp_contact 
-            WHERE fly_person_name = ?
-        """, (fly_person_name,))
-        
-        result = cursor.fetchone()
-        conn.close()
-        
-        if not result:
-            return f"No meeting link found for fly team member '{fly_person_name}'"
-            
-        meeting_link = result[0]
-        return f"Meeting link for {fly_person_name}: {meeting_link}"
-        
-    except Exception as e:
-        return f"Error retrieving meeting link: {str(e)}"
-
-
-# List of tools
-tools = [converse, update_property_status, get_property_status, get_meeting_link]
-rendered_tools = render_text_description(tools)
-
-parser = JsonOutputParser()
-
-
-system_prompt = f"""You are an assistant that has access to the following set of tools.
-Here are the names and descriptions for each tool:
-
-{rendered_tools}
-
-Given the user input, return the name and input of the tool to use.
-Return your response as a JSON blob with 'name' and 'arguments' keys.
-The value associated with the 'arguments' key should be a dictionary of parameters.
-
-{parser.get_format_instructions()}
-"""
-
-prompt = ChatPromptTemplate.from_messages([
-    ("system", system_prompt),
-    ("user", "{input}")
-])
-
-
-def tool_chain(model_output):
-    tool_map = {tool.name: tool for tool in tools}
-    chosen_tool = tool_map[model_output["name"]]
-
-    # Log the tool selection and arguments
-    logging.info(f"Model selected tool: {model_output['name']} with arguments: {model_output['arguments']}")
-
-    return itemgetter("arguments") | chosen_tool
-
-chain = prompt | model | JsonOutputParser() | tool_chain 
+def answer_turn(input, input_with_phone, phone_number, timer, callbacks):
+    """Pick a tool, render its answer in the chat and return (tool name, content)."""
+    # Answer simple intents directly, fall back to the LLM when unsure.
+    with tracer.span("fast_path") as span:
+        route = router.route(input)
+        span.set(hit=route is not None)
+    logging.info(f"Fast path stats: {router.stats()}")
+    if route:
+        logging.info(f"Fast path selected tool: {route.name} with arguments: {route.arguments}")
+        selection = {"name": route.name, "arguments": route.arguments}
+    else:
+        selection = None
+        if agent.cascade.enabled:
+            # The small model routes first; None means the turn needs the large model.
+            with tracer.span("route", model=agent.cascade.router_model) as span:
+                selection = agent.cascade.route(runtime.iterate(agent.astream_route(input_with_phone, callbacks)))
+                span.set(escalated=selection is None)
+        if selection is None:
+            with agent.cascade.timed("large"):
+                # Stream the tool selection and stop as soon as the JSON blob is complete.
+                with tracer.span("select"):
+                    call = ToolCallStream(runtime.iterate(agent.astream_selection(input_with_phone, callbacks)))
+                    name = call.name()
+                if agent.SINGLE_PASS and name == "converse":
+                    # Single pass: the reply is streamed straight out of the tool call.
+                    with tracer.span("respond", tool="converse"):
+                        tokens = stream_text(call.argument_deltas("response"), timer)
+                        content = st.chat_message("assistant").write_stream(tokens)
+                    logging.info(f"Model selected tool: converse with arguments: {call.partial.get('arguments')}")
+                    return "converse", content
+                with tracer.span("parse"):
+                    selection = agent.parser.validate(call.result(), call.raw)
+
+    if selection["name"] == "converse" and "response" not in selection["arguments"]:
+        # Stream the natural language answer token by token.
+        logging.info(f"Model selected tool: converse with arguments: {selection['arguments']}")
+        with tracer.span("respond", tool="converse"):
+            tokens = stream_text(runtime.iterate(agent.astream_converse(selection["arguments"]["input"], callbacks)), timer)
+            return "converse", st.chat_message("assistant").write_stream(tokens)
+
+    with tracer.span("dispatch", tool=selection["name"]):
+        response = runtime.run(agent.adispatch(selection, callbacks, phone_number))
+
+    # Extract the content from AIMessage object
+    content = response.content if hasattr(response, 'content') else str(response)
+    timer.first_token()
+    st.chat_message("assistant").write(content)
+    return selection["name"], content
+
 
 # Set up message history.
 msgs = StreamlitChatMessageHistory(key="langchain_messages")
 if len(msgs.messages) == 0:
     msgs.add_ai_message("I can retreive and update your property statuses")
 
+# Restore this phone number's earlier turns once per session.
+if 'phone_number' in st.session_state and not st.session_state.get('history_loaded'):
+    for sender, chat in load_history(st.session_state.phone_number):
+        if sender == "user":
+            msgs.add_user_message(chat)
+        else:
+            msgs.add_ai_message(chat)
+    st.session_state.history_loaded = True
+
 # Set the page title.
 st.title("Flyp AI")
+if not warmer.done.is_set():
+    st.caption("Loading the model, the first answer may take a little longer...")
 
 # Render the chat history.
 for msg in msgs.messages:
@@ -206,16 +144,39 @@ if input := st.chat_input("What is up?"):
     # Display user input and save to message history.
     st.chat_message("user").write(input_with_phone)
     msgs.add_user_message(input_with_phone)
-
-    # Invoke chain to get response.
-    response = chain.invoke({'input': input_with_phone})
-
-    # Extract the content from AIMessage object
-    content = response.content if hasattr(response, 'content') else str(response)
+    conversation_writer.record(phone_number, "user", input)
+
+    timer = LatencyTimer()
+    llm_calls = agent.LLMCallCounter()
+    trace_handler = tracer.langchain_handler()
+    callbacks = [llm_calls] + ([trace_handler] if trace_handler else [])
+
+    with tracer.request(phone_number, entry="streamlit") as trace:
+        # Reuse an earlier answer to the same question if no rows changed since.
+        with tracer.span("cache"):
+            cache_key = make_key(input, phone_number, lookup_role(phone_number), db.data_version())
+            content = response_cache.get(cache_key)
+
+        if content is not None:
+            logging.info(f"Response cache hit: {response_cache.stats()}")
+            trace.set(tool="cache")
+            timer.first_token()
+            st.chat_message("assistant").write(content)
+        else:
+            tool_name, content = answer_turn(input, input_with_phone, phone_number, timer, callbacks)
+            trace.set(tool=tool_name)
+
+            if cacheable(tool_name, content):
+                response_cache.put(cache_key, content)
+
+        timer.stop()
+        trace.set(ttft_ms=round((timer.ttft or 0) * 1000, 1), llm_calls=llm_calls.calls)
+    agent.record_llm_calls(llm_calls)
 
     # Log the model response
     logging.info(f"Model response: {content}")
+    logging.info(f"Latency: {timer}")
 
-    # Display AI assistant response and save to message history.
-    st.chat_message("assistant").write(content)
+    # Save AI assistant response to message history and the database.
     msgs.add_ai_message(content)
+    conversation_writer.record(phone_number, "assistant", content)
@@ -0,0 +1,129 @@
+import db
+from token_budget import estimate_tokens, truncate_to_tokens
+
+# Newest turns kept verbatim; anything older is folded into the summary
+RECENT_TURNS = 10
+# Token budget for the whole chat-history section of the prompt
+CONTEXT_TOKEN_BUDGET = 1500
+# Upper bound for the rolling summary inside that budget
+SUMMARY_TOKEN_BUDGET = 400
+# Each folded turn keeps at most this many tokens in the extractive summary
+SUMMARY_LINE_TOKENS = 40
+
+SUMMARY_HEADER = "Summary of earlier conversation:"
+RECENT_HEADER = "Recent conversation:"
+
+
+def format_turn(sender, chat):
+    return f"{sender.capitalize() if sender else 'Note'}: {chat}"
+
+
+def extractive_summary(summary, turns, budget):
+    """Default summarizer: one clipped line per folded turn, oldest lines dropped to fit."""
+    lines = summary.splitlines() if summary else []
+    for sender, chat in turns:
+        lines.append(truncate_to_tokens(format_turn(sender, chat), SUMMARY_LINE_TOKENS))
+    while lines and estimate_tokens("\n".join(lines)) > budget:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+def llm_summarizer(llm):
+    """Build a summarizer that asks ``llm`` to extend the running summary."""
+    def summarize(summary, turns, budget):
+        new_turns = "\n".join(format_turn(sender, chat) for sender, chat in turns)
+        prompt = (
+            f"Update the running summary of a real estate conversation in at most {budget * 3 // 4} words.\n"
+            f"Keep property names, statuses, decisions and open requests.\n\n"
+            f"Current summary:\n{summary or '(empty)'}\n\nNew turns:\n{new_turns}\n\nUpdated summary:"
+        )
+        result = llm.invoke(prompt)
+        text = result.content if hasattr(result, "content") else str(result)
+        return truncate_to_tokens(text.strip(), budget)
+    return summarize
+
+
+class ContextBuilder:
+    """Builds the chat-history part of a prompt within a token budget.
+
+    The last ``recent_turns`` turns are kept verbatim. Older turns are folded
+    into a rolling summary stored per phone number in Conversation_summary;
+    only turns that have not been folded yet are read and summarized.
+    """
+
+    def __init__(self, recent_turns=RECENT_TURNS, budget=CONTEXT_TOKEN_BUDGET,
+                 summary_budget=SUMMARY_TOKEN_BUDGET, summarize=extractive_summary, path=db.DB_PATH):
+        self.recent_turns = recent_turns
+        self.budget = budget
+        self.summary_budget = summary_budget
+        self.summarize = summarize
+        self.pool = db.get_pool(path)
+
+    def update_summary(self, phone_number):
+        """Fold turns that left the verbatim window into the stored summary and return it."""
+        row = self.pool.fetchone(
+            "SELECT summary, last_conversation_id FROM Conversation_summary WHERE phone_number = ?",
+            (phone_number,),
+        )
+        summary, last_id = row if row else ("", 0)
+
+        # Oldest turn that still belongs to the verbatim window
+        window_start = self.pool.fetchone('''
+            SELECT conversation_id FROM Conversation WHERE phone_number = ?
+            ORDER BY conversation_id DESC LIMIT 1 OFFSET ?''', (phone_number, self.recent_turns - 1))
+        if window_start is None:
+            return summary
+
+        folded = self.pool.fetchall('''
+            SELECT conversation_id, sender, chat FROM Conversation
+            WHERE phone_number = ? AND conversation_id > ? AND conversation_id < ?
+            ORDER BY conversation_id''', (phone_number, last_id, window_start[0]))
+        if not folded:
+            return summary
+
+        # Summarize outside any transaction; the write only lands if no other
+        # session folded the same turns in the meantime.
+        summary = self.summarize(summary, [(sender, chat) for _, sender, chat in folded], self.summary_budget)
+        new_last_id = folded[-1][0]
+        with self.pool.transaction() as conn:
+            conn.execute('''
+                INSERT INTO Conversation_summary (phone_number, summary, last_conversation_id)
+                VALUES (?, ?, ?)
+                ON CONFLICT(phone_number) DO UPDATE SET
+                    summary = excluded.summary,
+                    last_conversation_id = excluded.last_conversation_id,
+                    updated = CURRENT_TIMESTAMP
+                WHERE Conversation_summary.last_conversation_id = ?''',
+                (phone_number, summary, new_last_id, last_id))
+        return summary
+
+    def recent(self, phone_number):
+        rows = self.pool.fetchall('''
+            SELECT sender, chat FROM Conversation WHERE phone_number = ?
+            ORDER BY conversation_id DESC LIMIT ?''', (phone_number, self.recent_turns))
+        return rows[::-1]
+
+    def build(self, phone_number, budget=None):
+        """Return the chat history text, fitting ``budget`` tokens (default: the builder's)."""
+        budget = self.budget if budget is None else budget
+        budget -= estimate_tokens(SUMMARY_HEADER) + estimate_tokens(RECENT_HEADER)
+        summary = truncate_to_tokens(self.update_summary(phone_number), min(self.summary_budget, budget))
+        budget -= estimate_tokens(summary)
+
+        # Newest turns first, so the most recent ones survive a tight budget
+        kept = []
+        for sender, chat in reversed(self.recent(phone_number)):
+            line = format_turn(sender, chat)
+            cost = estimate_tokens(line) + 1
+            if cost > budget:
+                break
+            kept.append(line)
+            budget -= cost
+        kept.reverse()
+
+        sections = []
+        if summary:
+            sections.append(f"{SUMMARY_HEADER}\n{summary}")
+        if kept:
+            sections.append(RECENT_HEADER + "\n" + "\n".join(kept))
+        return "\n\n".join(sections)
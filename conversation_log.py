@@ -0,0 +1,124 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+import db
+
+# One chat message waiting to be written to the Conversation table
+Turn = namedtuple("Turn", ["phone_number", "sender", "chat", "timestamp"])
+
+# Flush when this many turns are pending, or after FLUSH_INTERVAL seconds
+BATCH_SIZE = 64
+FLUSH_INTERVAL = 1.0
+
+_STOP = object()
+
+
+class ConversationWriter:
+    """Write-behind persistence of chat turns into ``Conversation``.
+
+    ``record`` only puts the turn on an in-memory queue; a background thread
+    group-commits queued turns in batches, so the request path never waits on
+    the disk. Pending turns are flushed on ``close`` and at interpreter exit.
+    """
+
+    def __init__(self, path=db.DB_PATH, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._links = {}  # phone number -> (property_id, contractor_id)
+        self.written = 0
+        self.batches = 0
+        self._thread = threading.Thread(target=self._run, name="conversation-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def record(self, phone_number, sender, chat):
+        """Queue a turn; returns immediately."""
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._queue.put(Turn(phone_number, sender, chat, timestamp))
+
+    def _run(self):
+        while True:
+            batch = []
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            deadline = time.monotonic() + self.flush_interval
+            while item is not _STOP:
+                if isinstance(item, threading.Event):
+                    # Explicit flush request: write what we have, then signal
+                    self._write(batch)
+                    batch = []
+                    item.set()
+                else:
+                    batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            self._write(batch)
+            if item is _STOP:
+                return
+
+    def _link(self, conn, phone_number):
+        """Property and contractor a phone number belongs to (None when unknown)."""
+        if phone_number in self._links:
+            return self._links[phone_number]
+        role = conn.execute(
+            "SELECT property_id FROM Role_map WHERE phone_number = ?", (phone_number,)
+        ).fetchone()
+        contractor = conn.execute(
+            "SELECT contractor_id FROM Contractor WHERE phone_number = ?", (phone_number,)
+        ).fetchone()
+        link = (role[0] if role else None, contractor[0] if contractor else None)
+        if role:
+            # Unknown numbers are looked up again in case they get registered later
+            self._links[phone_number] = link
+        return link
+
+    def _write(self, batch):
+        if not batch:
+            return
+        try:
+            with db.get_pool(self.path).transaction() as conn:
+                rows = [
+                    (*self._link(conn, turn.phone_number), turn.chat, turn.timestamp, turn.phone_number, turn.sender)
+                    for turn in batch
+                ]
+                conn.executemany('''
+                INSERT INTO Conversation (property_id, contractor_id, chat, timestamp, phone_number, sender)
+                VALUES (?, ?, ?, ?, ?, ?)''', rows)
+            self.written += len(batch)
+            self.batches += 1
+        except Exception as e:
+            logging.error(f"Failed to persist {len(batch)} chat turns: {e}")
+
+    def flush(self, timeout=None):
+        """Block until every turn queued so far is committed."""
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+
+def load_history(phone_number, limit=50, path=db.DB_PATH):
+    """Return the last ``limit`` (sender, chat) turns stored for a phone number, oldest first."""
+    rows = db.get_pool(path).fetchall('''
+        SELECT sender, chat FROM Conversation
+        WHERE phone_number = ? AND sender IS NOT NULL
+        ORDER BY timestamp DESC, conversation_id DESC
+        LIMIT ?''', (phone_number, limit))
+    return rows[::-1]
@@ -2,61 +2,21 @@ import sqlite3
 import random
 from datetime import datetime, timedelta
 
-# Connect to SQLite database (or create it if it doesn't exist)
+from migrations import migrate
+
+# Create or upgrade the schema in place (never drops existing data)
+migrate("real_estate.db")
+
+# Connect to SQLite database
 conn = sqlite3.connect("real_estate.db")
 cursor = conn.cursor()
 
-# Drop tables if they already exist (forces recreation)
-cursor.execute("DROP TABLE IF EXISTS Conversation")
-cursor.execute("DROP TABLE IF EXISTS Property")
-cursor.execute("DROP TABLE IF EXISTS Contractor")
-cursor.execute("DROP TABLE IF EXISTS Role_map")
-
-# Create Property table
-cursor.execute('''
-CREATE TABLE Property (
-    property_id INTEGER PRIMARY KEY AUTOINCREMENT,
-    address TEXT NOT NULL,
-    shortcode TEXT NOT NULL,
-    name TEXT NOT NULL,
-    status TEXT NOT NULL,
-    status_detail TEXT NOT NULL
-)
-''')
-
-# Create Contractor table
-cursor.execute('''
-CREATE TABLE Contractor (
-    contractor_id INTEGER PRIMARY KEY AUTOINCREMENT,
-    name TEXT NOT NULL,
-    address TEXT NOT NULL,
-    area TEXT NOT NULL,
-    phone_number TEXT NOT NULL
-)
-''')
-
-# Create Conversation table
-cursor.execute('''
-CREATE TABLE Conversation (
-    conversation_id INTEGER PRIMARY KEY AUTOINCREMENT,
-    property_id INTEGER NOT NULL,
-    contractor_id INTEGER NOT NULL,
-    chat TEXT NOT NULL,
-    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-    phone_number TEXT NOT NULL,
-    FOREIGN KEY (property_id) REFERENCES Property(property_id),
-    FOREIGN KEY (contractor_id) REFERENCES Contractor(contractor_id)
-)
-''')
-
-# Create Role_map table
-cursor.execute('''
-CREATE TABLE Role_map (
-    phone_number TEXT PRIMARY KEY,
-    role TEXT NOT NULL,
-    property_id INTEGER NOT NULL
-)
-''')
+# Only seed sample data into an empty database
+cursor.execute("SELECT COUNT(*) FROM Property")
+if cursor.fetchone()[0]:
+    conn.close()
+    print("\nDatabase already has data, skipping sample data.")
+    raise SystemExit(0)
 
 # Insert sample data for Property table
 properties = [
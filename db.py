@@ -0,0 +1,287 @@
+import os
+import sqlite3
+import threading
+import time
+import atexit
+from urllib.request import pathname2url
+from contextlib import contextmanager
+
+from tracing import get_tracer
+
+# Database Connection
+DB_PATH = "real_estate.db"
+
+# Pragmas applied to every pooled connection. WAL lets readers run while a
+# writer commits, NORMAL sync is safe under WAL and skips an fsync per commit.
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,
+    "cache_size": -16000,  # 16 MB page cache
+    "temp_store": "MEMORY",
+    "mmap_size": 268435456,  # 256 MB
+}
+
+# Number of prepared statements kept per connection by sqlite3
+STATEMENT_CACHE_SIZE = 256
+
+
+class ConnectionPool:
+    """Bounded pool of SQLite connections shared by all chatbot tools.
+
+    A thread checks a connection out for the duration of a ``with`` block and
+    gets it back on exit, even if the block raised. Nested checkouts on the
+    same thread reuse the connection already held by that thread.
+    """
+
+    def __init__(self, path=DB_PATH, max_size=8, timeout=30.0, read_only=False):
+        self.path = path
+        self.read_only = read_only
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle = []
+        self._all = set()
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self._closed = False
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.busy_time = 0.0
+
+    def _open(self):
+        if self.read_only:
+            # mode=ro makes SQLite itself refuse writes; query_only covers ATTACH tricks
+            target = f"file:{pathname2url(os.path.abspath(self.path))}?mode=ro"
+        else:
+            target = self.path
+        conn = sqlite3.connect(
+            target,
+            timeout=PRAGMAS["busy_timeout"] / 1000,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+            uri=self.read_only,
+        )
+        for name, value in PRAGMAS.items():
+            if self.read_only and name == "journal_mode":
+                continue
+            conn.execute(f"PRAGMA {name} = {value}")
+        if self.read_only:
+            conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    def _acquire(self):
+        with self._cond:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Connection pool is closed")
+            if self._idle:
+                self.hits += 1
+                return self._idle.pop()
+            if len(self._all) < self.max_size:
+                self.misses += 1
+                # Reserve the slot before releasing the lock to open the file
+                placeholder = object()
+                self._all.add(placeholder)
+            else:
+                placeholder = None
+                start = time.perf_counter()
+                self.waits += 1
+                while not self._idle:
+                    if not self._cond.wait(self.timeout):
+                        self.wait_time += time.perf_counter() - start
+                        raise TimeoutError("Timed out waiting for a database connection")
+                self.wait_time += time.perf_counter() - start
+                self.hits += 1
+                return self._idle.pop()
+        try:
+            conn = self._open()
+        except Exception:
+            with self._cond:
+                self._all.discard(placeholder)
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._all.discard(placeholder)
+            self._all.add(conn)
+        return conn
+
+    def _release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        with self._cond:
+            if self._closed:
+                self._all.discard(conn)
+                conn.close()
+                return
+            self._idle.append(conn)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection for the current thread."""
+        held = getattr(self._local, "conn", None)
+        if held is not None:
+            self._local.depth += 1
+            try:
+                yield held
+            finally:
+                self._local.depth -= 1
+            return
+
+        with get_tracer().span("sqlite", db=os.path.basename(self.path)):
+            conn = self._acquire()
+            self._local.conn = conn
+            self._local.depth = 1
+            start = time.perf_counter()
+            try:
+                yield conn
+            finally:
+                self._local.conn = None
+                self._local.depth = 0
+                self._release(conn)
+                with self._cond:
+                    self.busy_time += time.perf_counter() - start
+
+    @contextmanager
+    def transaction(self):
+        """Run a block in a single write transaction, rolling back on error."""
+        with self.connection() as conn:
+            if conn.in_transaction:
+                # Already inside an outer transaction on this thread
+                yield conn
+                return
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+
+    def fetchone(self, query, params=()):
+        with self.connection() as conn:
+            return conn.execute(query, params).fetchone()
+
+    def fetchall(self, query, params=()):
+        with self.connection() as conn:
+            return conn.execute(query, params).fetchall()
+
+    def execute(self, query, params=()):
+        """Execute a write statement in its own transaction and return the rowcount."""
+        with self.transaction() as conn:
+            return conn.execute(query, params).rowcount
+
+    def executemany(self, query, seq_of_params):
+        with self.transaction() as conn:
+            return conn.executemany(query, seq_of_params).rowcount
+
+    def stats(self):
+        """Return pool hit/miss, wait-time and busy-time counters."""
+        with self._cond:
+            checkouts = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / checkouts if checkouts else 0.0,
+                "waits": self.waits,
+                "wait_time_s": self.wait_time,
+                "busy_time_s": self.busy_time,
+                "open": sum(1 for c in self._all if isinstance(c, sqlite3.Connection)),
+                "idle": len(self._idle),
+            }
+
+    def close_all(self):
+        """Close every idle connection; busy ones are closed when released."""
+        with self._cond:
+            self._closed = True
+            for conn in self._idle:
+                self._all.discard(conn)
+                conn.close()
+            self._idle.clear()
+            self._cond.notify_all()
+
+
+# Columns a user may use to refer to a property, in match priority order.
+# One indexed SELECT per column joined with UNION ALL lets SQLite stop at the
+# first hit instead of scanning Property for a multi-column OR.
+PROPERTY_IDENTIFIER_COLUMNS = ("property_id", "shortcode", "address", "name")
+
+
+def property_lookup_sql(columns):
+    branches = [
+        f"SELECT {columns} FROM Property WHERE {column} = ?1"
+        for column in PROPERTY_IDENTIFIER_COLUMNS
+    ]
+    return "\nUNION ALL\n".join(branches) + "\nLIMIT 1"
+
+
+def find_property(identifier, columns="property_id", conn=None):
+    """Return the first Property row matching ``identifier`` by id, shortcode, address or name."""
+    query = property_lookup_sql(columns)
+    if conn is not None:
+        return conn.execute(query, (identifier,)).fetchone()
+    return fetchone(query, (identifier,))
+
+
+def data_version(conn=None):
+    """Return a number that changes whenever a versioned table is written."""
+    query = "SELECT COALESCE(SUM(version), 0) FROM Data_version"
+    if conn is not None:
+        return conn.execute(query).fetchone()[0]
+    return fetchone(query)[0]
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path=DB_PATH, read_only=False):
+    """Return the process-wide pool for ``path``, creating it on first use."""
+    with _pools_lock:
+        pool = _pools.get((path, read_only))
+        if pool is None or pool._closed:
+            pool = _pools[(path, read_only)] = ConnectionPool(path, read_only=read_only)
+        return pool
+
+
+def busy_time():
+    """Total seconds connections of every pool have been checked out."""
+    with _pools_lock:
+        return sum(pool.busy_time for pool in _pools.values())
+
+
+@atexit.register
+def close_all():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close_all()
+
+
+# Shortcuts against the default database
+def connection():
+    return get_pool().connection()
+
+
+def transaction():
+    return get_pool().transaction()
+
+
+def fetchone(query, params=()):
+    return get_pool().fetchone(query, params)
+
+
+def fetchall(query, params=()):
+    return get_pool().fetchall(query, params)
+
+
+def execute(query, params=()):
+    return get_pool().execute(query, params)
+
+
+def executemany(query, seq_of_params):
+    return get_pool().executemany(query, seq_of_params)
+
+
+def stats():
+    return get_pool().stats()
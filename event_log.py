@@ -0,0 +1,139 @@
+import atexit
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import threading
+from datetime import datetime, timezone
+
+LOG_PATH = "chatbot_logs.log"
+# Rotate by size unless a time interval ("midnight", "H", ...) is given
+MAX_BYTES = 10 * 1024 * 1024
+BACKUP_COUNT = 10
+# Records waiting for the writer thread; beyond this they are dropped, not waited on
+QUEUE_SIZE = 10_000
+
+# Keep one record in N from chatty library loggers (warnings and errors are always kept)
+NOISY_LOGGERS = {"httpx": 20, "httpcore": 100, "urllib3": 20}
+
+# Attributes every LogRecord has; anything else came in through ``extra=``
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, extra fields."""
+
+    def format(self, record):
+        event = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and not key.startswith("_"):
+                event[key] = value
+        if record.exc_info:
+            event["exc"] = self.formatException(record.exc_info)
+        return json.dumps(event, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Pass one record in N for the configured logger prefixes."""
+
+    def __init__(self, rates=NOISY_LOGGERS):
+        super().__init__()
+        self.rates = dict(rates)
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        for prefix, every in self.rates.items():
+            if record.name == prefix or record.name.startswith(prefix + "."):
+                with self._lock:
+                    seen = self._seen[prefix] = self._seen.get(prefix, 0) + 1
+                if (seen - 1) % every:
+                    return False
+                record.sampled = every
+                return True
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records when the queue is full instead of blocking."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _gzip_rotator(source, dest):
+    with open(source, "rb") as src, gzip.open(dest, "wb") as out:
+        shutil.copyfileobj(src, out)
+    os.remove(source)
+
+
+def _file_handler(path, max_bytes, backup_count, when):
+    if when:
+        handler = logging.handlers.TimedRotatingFileHandler(path, when=when, backupCount=backup_count, encoding="utf-8")
+    else:
+        handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+    # Rotated segments are compressed on the writer thread
+    handler.namer = lambda name: name + ".gz"
+    handler.rotator = _gzip_rotator
+    handler.setFormatter(JsonFormatter())
+    return handler
+
+
+_listener = None
+_handler = None
+_lock = threading.Lock()
+
+
+def configure(path=LOG_PATH, level=logging.INFO, max_bytes=MAX_BYTES, backup_count=BACKUP_COUNT,
+              when=None, sample=NOISY_LOGGERS):
+    """Route the root logger through a queue to a rotating JSON-lines file.
+
+    Callers only format and enqueue a record; a listener thread does the file
+    I/O, rotation and compression. Safe to call more than once.
+    """
+    global _listener, _handler
+    with _lock:
+        if _listener is not None:
+            return _handler
+        log_queue = queue.Queue(QUEUE_SIZE)
+        _handler = DroppingQueueHandler(log_queue)
+        if sample:
+            _handler.addFilter(SamplingFilter(sample))
+        _listener = logging.handlers.QueueListener(log_queue, _file_handler(path, max_bytes, backup_count, when))
+        _listener.start()
+
+        root = logging.getLogger()
+        root.setLevel(level)
+        root.addHandler(_handler)
+        atexit.register(shutdown)
+        return _handler
+
+
+def shutdown():
+    """Flush queued records and stop the writer thread."""
+    global _listener, _handler
+    with _lock:
+        if _listener is None:
+            return
+        logging.getLogger().removeHandler(_handler)
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = _handler = None
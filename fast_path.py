@@ -0,0 +1,156 @@
+import re
+import threading
+from collections import namedtuple, Counter
+
+import db
+from property_resolver import get_resolver
+
+# A tool call decided without the LLM
+Route = namedtuple("Route", ["name", "arguments", "rule"])
+
+# Statuses the update rule accepts; anything else goes to the LLM
+KNOWN_STATUSES = {
+    "sold": "Sold",
+    "available": "Available",
+    "under contract": "Under Contract",
+    "pending": "Pending",
+    "off market": "Off Market",
+}
+
+# Pattern rules, tried in order. Each takes (text, router) and returns a Route
+# only when it is certain; returning None hands the turn to the next rule.
+RULES = []
+
+
+def rule(func):
+    RULES.append(func)
+    return func
+
+
+GREETING = re.compile(r"^(hi|hello|hey|hiya|good (morning|afternoon|evening))[\s!.,]*$", re.IGNORECASE)
+STATUS = re.compile(
+    r"^(?:(?:what(?:'s| is)|get|show|check)\s+)?(?:the\s+)?(?:current\s+)?status\s+(?:of|for)\s+(?P<ref>.+?)[\s?.!]*$",
+    re.IGNORECASE,
+)
+UPDATE = re.compile(
+    r"^(?:please\s+)?(?:mark|set|update|change)\s+(?:the\s+status\s+of\s+)?(?P<ref>.+?)\s+(?:as|to)\s+"
+    r"(?P<status>" + "|".join(KNOWN_STATUSES) + r")\b(?:\s*(?:[,:;-]|with details?|because)\s*(?P<detail>.+?))?[\s.!]*$",
+    re.IGNORECASE,
+)
+LIST_SEPARATOR = re.compile(r"\s*(?:,\s*(?:and\s+)?|\s+and\s+|\s*&\s*)", re.IGNORECASE)
+ALL_WITH_STATUS = re.compile(
+    r"^(?:all|every)\s+(?:(?:the\s+)?properties\s+(?:that\s+are\s+|with\s+status\s+)?)?(?P<current>"
+    + "|".join(KNOWN_STATUSES) + r")(?:\s+propert(?:y|ies))?$",
+    re.IGNORECASE,
+)
+MEETING = re.compile(
+    r"^(?:(?:get|send|give me|what(?:'s| is))\s+)?(?:the\s+|a\s+)?(?:meeting\s+link|meeting|link|call)\s+(?:with|for)\s+(?P<name>.+?)[\s?.!]*$",
+    re.IGNORECASE,
+)
+
+
+@rule
+def greeting(text, router):
+    if GREETING.match(text):
+        return Route("converse", {"input": text}, "greeting")
+
+
+@rule
+def property_status(text, router):
+    match = STATUS.match(text)
+    if match and router.resolver.best(match["ref"]) is not None:
+        return Route("get_property_status", {"property_identifier": match["ref"]}, "property_status")
+
+
+@rule
+def status_update(text, router):
+    match = UPDATE.match(text)
+    if not match:
+        return None
+    new_status = KNOWN_STATUSES[match["status"].lower()]
+    detail = {"status_detail": match["detail"]} if match["detail"] else {}
+
+    scope = ALL_WITH_STATUS.match(match["ref"])
+    if scope:
+        arguments = {"new_status": new_status, "current_status": KNOWN_STATUSES[scope["current"].lower()], **detail}
+        return Route("bulk_update_property_status", arguments, "bulk_status_update")
+
+    # Writes skip the model only when every reference names a property exactly;
+    # near-misses go to the LLM, whose tools answer with a "did you mean"
+    refs = [ref for ref in LIST_SEPARATOR.split(match["ref"]) if ref]
+    if len(refs) > 1 and all(router.resolver.exact(ref) is not None for ref in refs):
+        arguments = {"new_status": new_status, "property_identifiers": refs, **detail}
+        return Route("bulk_update_property_status", arguments, "bulk_status_update")
+    if router.resolver.exact(match["ref"]) is not None:
+        arguments = {"property_identifier": match["ref"], "new_status": new_status, **detail}
+        return Route("update_property_status", arguments, "status_update")
+
+
+@rule
+def meeting_link(text, router):
+    match = MEETING.match(text)
+    if match:
+        name = router.contact_name(match["name"])
+        if name:
+            return Route("get_meeting_link", {"fly_person_name": name}, "meeting_link")
+
+
+class FastPathRouter:
+    """Answers high-confidence intents with a direct tool call.
+
+    Rules are plain functions; anything they are unsure about returns None so
+    the caller falls back to the LLM tool-selection chain.
+    """
+
+    def __init__(self, rules=None, path=db.DB_PATH):
+        self.rules = list(RULES if rules is None else rules)
+        self.path = path
+        self._contacts = None
+        self._lock = threading.Lock()
+        self.attempts = 0
+        self.hits = Counter()
+
+    @property
+    def resolver(self):
+        return get_resolver(self.path)
+
+    def contact_name(self, text):
+        """Return the canonical Flyp_contact name for ``text``, if any."""
+        if self._contacts is None:
+            rows = db.get_pool(self.path).fetchall("SELECT DISTINCT fly_person_name FROM Flyp_contact")
+            self._contacts = {name.lower(): name for (name,) in rows}
+        return self._contacts.get(" ".join(text.lower().split()))
+
+    def invalidate_contacts(self):
+        self._contacts = None
+
+    def add_rule(self, func, first=False):
+        if first:
+            self.rules.insert(0, func)
+        else:
+            self.rules.append(func)
+        return func
+
+    def route(self, text):
+        """Return a Route for ``text`` or None when the LLM should decide."""
+        text = text.strip()
+        route = None
+        for func in self.rules:
+            route = func(text, self)
+            if route is not None:
+                break
+        with self._lock:
+            self.attempts += 1
+            if route is not None:
+                self.hits[route.rule] += 1
+        return route
+
+    def stats(self):
+        with self._lock:
+            hits = sum(self.hits.values())
+            return {
+                "attempts": self.attempts,
+                "hits": hits,
+                "hit_rate": hits / self.attempts if self.attempts else 0.0,
+                "by_rule": dict(self.hits),
+            }
@@ -0,0 +1,330 @@
+"""Process-wide agent resources for the Flyp AI Streamlit app.
+
+Streamlit re-executes chatbot_agent_venkat_2.py on every interaction, but an
+imported module runs only once per server process. Everything that does not
+depend on the session (model client, tools, rendered prompt, chain) lives
+here so reruns only pay for rendering and the request itself.
+"""
+import logging  # to log model responses and tool usage
+from typing import Annotated, Literal, Optional
+from operator import itemgetter  # to retrieve specific items in our chain.
+
+import httpx  # connection pool settings for the Ollama client
+
+from langchain_core.prompts import ChatPromptTemplate  # crafts prompts for our llm
+from langchain_core.tools import tool, InjectedToolArg  # tools for our llm; injected args are hidden from it
+from langchain_core.callbacks import BaseCallbackHandler  # counts model calls per turn
+from langchain_ollama import ChatOllama
+
+import db  # pooled access to the SQLite database
+import migrations  # brings the database schema up to date
+from property_resolver import get_resolver, refresh_property  # in-memory property lookups
+from async_runtime import get_runtime  # shared event loop and bounded DB executor
+from warmup import OLLAMA_URL, KEEP_ALIVE  # Ollama endpoint and model residency
+from bulk_updates import bulk_update_status, summarize  # many status changes in one transaction
+import event_log  # queued, rotating JSON-lines log
+from write_queue import get_write_queue  # single writer thread with group commit
+from search import search_for_caller  # ranked full-text search over FTS5 indexes
+from cascade import Cascade, ROUTER_MODEL, CONFIDENCE_INSTRUCTIONS  # small-model routing with escalation
+from tool_calls import ToolCallParser, tool_call_schema  # schema-constrained, typed tool calls
+from prompt_builder import PromptBuilder, tool_manifest  # compact prompts with token accounting
+
+# Configure logging: records are queued and written, rotated and compressed off the request thread
+event_log.configure('chatbot_logs.log')
+
+migrations.migrate()
+
+# One keep-alive connection pool to Ollama shared by every session
+client_kwargs = {
+    "limits": httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=300),
+    "timeout": httpx.Timeout(300.0, connect=5.0),
+}
+
+# keep_alive stops Ollama from unloading the model between turns
+model = ChatOllama(model="llama3.3:70b", base_url=OLLAMA_URL, keep_alive=KEEP_ALIVE, client_kwargs=client_kwargs)
+# Picks tools and extracts arguments first; the 70B model only sees escalated turns
+router_model = ChatOllama(model=ROUTER_MODEL, base_url=OLLAMA_URL, keep_alive=KEEP_ALIVE,
+                          client_kwargs=client_kwargs) if ROUTER_MODEL else None
+
+
+# When True the tool-selection call writes small-talk replies itself, so a
+# converse turn costs one model call instead of two.
+SINGLE_PASS = True
+
+
+@tool
+def converse(input: str) -> str:
+    "Provide a natural language response using the user input."
+    return model.invoke(input)
+
+
+@tool("converse")
+def reply(response: str) -> str:
+    """Reply to the user directly. Use this for greetings, small talk and any question
+    the other tools cannot answer.
+
+    Args:
+        response: Your complete natural language reply to the user
+    """
+    return response
+
+
+@tool
+def update_property_status(property_identifier: str, new_status: str, status_detail: str = "") -> str:
+    """Update the status and status_detail of a property in the real estate database.
+    This tool should be used when you need to change a property's status, such as marking it as 'Sold', 
+    'Available', 'Under Contract', 'Pending', etc. The status change helps track the current state of properties
+    in the real estate inventory. You can identify the property using its ID, address, shortcode, or name.
+
+    Args:
+        property_identifier (str): The property identifier - can be property_id, address, shortcode or name
+        new_status (str): The new status to set for the property (e.g. 'Sold', 'Available', 'Under Contract')
+        status_detail (str, optional): Additional details about the status change. Defaults to empty string.
+
+    Returns:
+        str: A message confirming the status update was successful, or an error message if it failed
+    """
+    try:
+        # Only an exact reference may change a row; near-misses get a "did you mean"
+        resolver = get_resolver()
+        property_id = resolver.exact(property_identifier)
+        if property_id is None:
+            return "Error: " + resolver.describe(property_identifier, resolver.resolve(property_identifier, 3))
+
+        # Update both status and status_detail; the shared writer group-commits
+        # this with other sessions' updates and we wait for our own result
+        updated = get_write_queue().execute("""
+            UPDATE Property 
+            SET status = ?, status_detail = ?
+            WHERE property_id = ?
+        """, (new_status, status_detail, property_id)).result()
+
+        if not updated:
+            refresh_property(property_id)
+            return f"Error: No property found matching identifier '{property_identifier}'"
+        
+        update_msg = f"Property {resolver.label(property_id)} status successfully updated to '{new_status}'"
+        if status_detail:
+            update_msg += f" with details: '{status_detail}'"
+        return update_msg
+        
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+
+@tool
+def bulk_update_property_status(new_status: str, property_identifiers: Optional[list[str]] = None, current_status: str = "", status_detail: str = "") -> str:
+    """Update the status of many properties at once, in a single transaction.
+    Use this instead of update_property_status when the user names several properties,
+    or asks to change every property that currently has some status.
+
+    Args:
+        new_status: The new status to set (e.g. 'Sold', 'Available', 'Under Contract')
+        property_identifiers: Property ids, addresses, shortcodes or names to update
+        current_status: Also update every property whose status is currently this value
+        status_detail: Additional details about the status change. Defaults to empty string.
+    """
+    try:
+        if not property_identifiers and not current_status:
+            return "Error: Provide property_identifiers or current_status"
+        results = bulk_update_status(new_status, status_detail, property_identifiers or (), current_status or None)
+        return summarize(results, new_status)
+
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+
+@tool
+def get_property_status(property_identifier: str) -> str:
+    """Retrieve status and status details for a specific property.
+    Args:
+        property_identifier: The property's address, shortcode, or name to look up
+    Returns:
+        str: The property's status information as a string
+    """
+    try:
+        # Resolve the identifier in memory, tolerating near-misses
+        resolver = get_resolver()
+        property_id = resolver.best(property_identifier)
+        if property_id is None:
+            return resolver.describe(property_identifier, resolver.resolve(property_identifier, 3))
+
+        result = db.fetchone("SELECT status, status_detail FROM Property WHERE property_id = ?", (property_id,))
+        
+        if not result:
+            refresh_property(property_id)
+            return f"No property found matching identifier '{property_identifier}'"
+            
+        status, status_detail = result
+        response = f"Property {resolver.label(property_id)} status: {status}"
+        if status_detail:
+            response += f"\nDetails: {status_detail}"
+        return response
+        
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+
+@tool
+def get_meeting_link(fly_person_name: str) -> str:
+    """Retrieve a meeting link for scheduling a meeting with a specific fly person.
+    This tool helps coordinate meetings by providing the appropriate video conferencing link
+    for the specified fly team member.
+    
+    Args:
+        fly_person_name: The name of the fly team member you want to meet with
+        
+    Returns:
+        str: The meeting link for the specified person, or an error message if the person is not found
+    """
+    try:
+        result = db.fetchone("""
+            SELECT meeting_link
+            FROM Flyp_contact 
+            WHERE fly_person_name = ?
+        """, (fly_person_name,))
+        
+        if not result:
+            return f"No meeting link found for fly team member '{fly_person_name}'"
+            
+        meeting_link = result[0]
+        return f"Meeting link for {fly_person_name}: {meeting_link}"
+        
+    except Exception as e:
+        return f"Error retrieving meeting link: {str(e)}"
+
+
+@tool
+def search_records(query: str, scope: Literal["all", "properties", "conversations"] = "all", page: int = 1,
+                   phone_number: Annotated[Optional[str], InjectedToolArg] = None) -> str:
+    """Full-text search over property names, addresses, status details and past conversations.
+    Use this when the user describes something in words rather than naming a property,
+    e.g. "which listing had the roof leak" or "what did we say about the inspection".
+
+    Args:
+        query: The words to search for
+        scope: 'properties', 'conversations' or 'all'. Defaults to 'all'.
+        page: Results page, starting at 1, for when the previous reply says more results exist
+        phone_number: The caller's phone number, set by the app, never by the model
+    Returns:
+        str: The best matches with highlighted snippets and bm25 scores (lower is better)
+    """
+    # Conversations are only ever searched within the caller's own chats
+    return search_for_caller(query, scope, page, phone_number)
+
+
+# List of tools
+tools = [reply if SINGLE_PASS else converse, update_property_status, bulk_update_property_status, get_property_status,
+         get_meeting_link, search_records]
+rendered_tools = tool_manifest(tools)
+tool_map = {tool.name: tool for tool in tools}
+# Tools that take the caller's phone number as an injected argument
+CALLER_SCOPED_TOOLS = {"search_records"}
+
+# Ollama decodes tool selections against a JSON schema built from the tool
+# signatures, so the output always parses; the parser then types the arguments.
+parser = ToolCallParser(tool_map=tool_map)
+selection_model = model.bind(format=tool_call_schema(tools))
+router_selection_model = router_model.bind(format=tool_call_schema(tools, confidence=True)) if router_model else None
+
+
+# Every turn prefills this; the builder keeps it compact and within budget
+system_sections = (
+    PromptBuilder("selection", budget=400)
+    .add("task", "Choose the tool for the user's message and fill in its arguments. Tools (? = optional):")
+    .add_tools("tools", tools)
+)
+system_prompt = system_sections.build()
+# The router shares the whole selection prompt as a prefix and adds its confidence rule
+router_system_prompt = system_sections.copy("router", budget=450).add("confidence", CONFIDENCE_INSTRUCTIONS).build()
+
+prompt = ChatPromptTemplate.from_messages([
+    ("system", system_prompt),
+    ("user", "{input}")
+])
+
+
+# Same prompt for the router, plus the confidence key it reports for escalation
+router_prompt = ChatPromptTemplate.from_messages([
+    ("system", router_system_prompt),
+    ("user", "{input}")
+])
+
+
+cascade = Cascade(tool_map, ROUTER_MODEL)
+
+
+def tool_chain(model_output):
+    chosen_tool = tool_map[model_output["name"]]
+
+    # Log the tool selection and arguments
+    logging.info(f"Model selected tool: {model_output['name']} with arguments: {model_output['arguments']}")
+
+    return itemgetter("arguments") | chosen_tool
+
+# Raw model output for streamed tool selection; chain is the blocking equivalent
+selection_stream = prompt | selection_model
+router_stream = router_prompt | router_selection_model if router_model else None
+chain = selection_stream | parser | tool_chain
+
+
+# Async path: LLM calls are awaited on the shared event loop, DB tools run on
+# the runtime's bounded executor instead of blocking a thread per request.
+def with_caller(selection, phone_number):
+    """Arguments for the selected tool, plus the caller's phone number if the tool takes it.
+
+    The phone number is an injected argument: it is not in the schema the
+    model decodes against, so a selection cannot name someone else's.
+    """
+    arguments = selection["arguments"]
+    if selection["name"] in CALLER_SCOPED_TOOLS:
+        arguments = {**arguments, "phone_number": phone_number}
+    return arguments
+
+
+async def adispatch(selection, callbacks=None, phone_number=None):
+    logging.info(f"Model selected tool: {selection['name']} with arguments: {selection['arguments']}")
+    if selection["name"] == "converse" and "response" not in selection["arguments"]:
+        # Legacy two-pass converse, or a fast-path turn that still needs a reply
+        return await model.ainvoke(selection["arguments"]["input"], config={"callbacks": callbacks})
+    chosen_tool = tool_map[selection["name"]]
+    return await get_runtime().to_db(chosen_tool.invoke, with_caller(selection, phone_number))
+
+
+async def astream_selection(input, callbacks=None):
+    async for chunk in selection_stream.astream({'input': input}, config={"callbacks": callbacks}):
+        yield chunk
+
+
+async def astream_route(input, callbacks=None):
+    async for chunk in router_stream.astream({'input': input}, config={"callbacks": callbacks}):
+        yield chunk
+
+
+async def astream_converse(input, callbacks=None):
+    async for chunk in model.astream(input, config={"callbacks": callbacks}):
+        yield chunk
+
+
+class LLMCallCounter(BaseCallbackHandler):
+    """Counts model calls made while handling one turn."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self.calls += 1
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.calls += 1
+
+
+# Process-wide LLM calls per turn, to compare single-pass against two-pass
+llm_call_stats = {"turns": 0, "calls": 0}
+
+
+def record_llm_calls(counter):
+    llm_call_stats["turns"] += 1
+    llm_call_stats["calls"] += counter.calls
+    average = llm_call_stats["calls"] / llm_call_stats["turns"]
+    logging.info(f"LLM calls this turn: {counter.calls} (average {average:.2f}, single_pass={SINGLE_PASS})")
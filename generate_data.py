@@ -0,0 +1,272 @@
+import argparse
+import itertools
+import os
+import random
+import re
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+from migrations import FTS_TABLES, migrate
+
+# Rows per executemany call and rows per committed transaction
+CHUNK_ROWS = 50_000
+COMMIT_ROWS = 1_000_000
+
+# Pragmas for the duration of the load only: no fsyncs, the rollback journal
+# kept in memory, one exclusive lock and a large page cache. The normal WAL
+# settings are restored afterwards.
+LOAD_PRAGMAS = {
+    "journal_mode": "MEMORY",
+    "synchronous": "OFF",
+    "locking_mode": "EXCLUSIVE",
+    "cache_size": -262144,  # 256 MB
+    "temp_store": "MEMORY",
+}
+
+STREETS = ["Main", "Oak", "Pine", "Elm", "Cedar", "Maple", "Washington", "Lake", "Hill", "Park", "Sunset",
+           "River", "Church", "Spring", "Ridge", "Highland", "Meadow", "Forest", "Willow", "Chestnut",
+           "Walnut", "Jackson", "Lincoln", "Franklin", "Madison", "Adams", "Jefferson", "Center", "Mill", "Union"]
+SUFFIXES = ["St", "Ave", "Rd", "Blvd", "Ln", "Dr", "Ct", "Way", "Pl", "Ter"]
+NAME_WORDS = ["Sunset", "Maple", "Pine", "Elm", "Cedar", "Oak", "Willow", "Harbor", "Summit", "Garden",
+              "River", "Lake", "Meadow", "Park", "Crest", "Grove", "Bay", "Stone", "Silver", "Golden"]
+NAME_KINDS = ["Villa", "Residency", "Heights", "Homes", "Court", "Towers", "Gardens", "Place", "Manor", "Lofts"]
+STATUSES = {"Available": 40, "Sold": 25, "Under Contract": 15, "Pending": 10, "Under Renovation": 7, "Off Market": 3}
+DETAILS = ["Ready to move", "Under renovation", "Newly constructed", "Pending approval", "Furnished",
+           "Awaiting inspection", "Price reduced", "Open house this weekend", ""]
+FIRST_NAMES = ["John", "Jane", "Mike", "Sarah", "David", "Alice", "Bob", "Charlie", "Diana", "Edward",
+               "Maria", "James", "Linda", "Robert", "Patricia", "Wei", "Priya", "Ahmed", "Sofia", "Kenji"]
+LAST_NAMES = ["Doe", "Smith", "Johnson", "Lee", "Kim", "Davis", "Ross", "Green", "Garcia", "Brown",
+              "Miller", "Wilson", "Moore", "Taylor", "Anderson", "Thomas", "Patel", "Chen", "Nguyen", "Lopez"]
+AREAS = ["Downtown", "Uptown", "Suburb", "Midtown", "Old Town", "Harbor", "University", "Airport", "Riverside", "Hills"]
+ROLES = {"User": 80, "Manager": 15, "Admin": 5}
+# A handful of area codes dominate, like a real metro customer base
+AREA_CODES = {"212": 30, "646": 20, "718": 20, "917": 15, "347": 10, "201": 5}
+CHATS = [
+    "What is the status of {name}?",
+    "Please update {shortcode} to {status}.",
+    "Can I schedule a meeting about {address}?",
+    "{name} is now {status}.",
+    "Any news on the inspection for {shortcode}?",
+    "Thanks, that works for me.",
+    "Who is my contact for {name}?",
+]
+
+
+def zipf_weights(n, s=1.1):
+    """Cumulative weights giving rank r probability proportional to 1 / r**s."""
+    return list(itertools.accumulate(1 / (rank ** s) for rank in range(1, n + 1)))
+
+
+# Low-numbered streets are far more common than the rest
+STREET_WEIGHTS = zipf_weights(len(STREETS), 0.8)
+
+
+def phone_number(index, area_codes):
+    # Multiplying by a number coprime with 10**7 spreads sequential indexes
+    # over the 7-digit space without ever repeating one.
+    return f"{area_codes[index % len(area_codes)]}{(index * 7919 + 1234567) % 10**7:07d}"
+
+
+def property_row(rng, property_id):
+    street = rng.choices(STREETS, cum_weights=STREET_WEIGHTS)[0]
+    address = f"{rng.randint(1, 9999)} {street} {rng.choice(SUFFIXES)}"
+    name = f"{rng.choice(NAME_WORDS)} {rng.choice(NAME_KINDS)}"
+    status = rng.choices(list(STATUSES), weights=list(STATUSES.values()))[0]
+    return (property_id, address, f"P{property_id:07d}", name, status, rng.choice(DETAILS))
+
+
+def chunks(rows, size):
+    iterator = iter(rows)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+class Loader:
+    """Bulk-inserts generated rows and keeps per-table throughput figures."""
+
+    def __init__(self, conn, chunk_rows=CHUNK_ROWS, commit_rows=COMMIT_ROWS):
+        self.conn = conn
+        self.chunk_rows = chunk_rows
+        self.commit_rows = commit_rows
+        self.report = []
+
+    def load(self, table, query, rows):
+        start = time.perf_counter()
+        count = pending = 0
+        self.conn.execute("BEGIN")
+        for chunk in chunks(rows, self.chunk_rows):
+            self.conn.executemany(query, chunk)
+            count += len(chunk)
+            pending += len(chunk)
+            if pending >= self.commit_rows:
+                self.conn.execute("COMMIT")
+                self.conn.execute("BEGIN")
+                pending = 0
+        self.conn.execute("COMMIT")
+        elapsed = time.perf_counter() - start
+        self.report.append((table, count, elapsed))
+        print(f"{table:<14}{count:>12,} rows {elapsed:>8.2f}s {count / elapsed if elapsed else 0:>12,.0f} rows/s")
+        return count
+
+
+def drop_indexes(conn, tables):
+    """Drop the indexes of ``tables`` and return their SQL so they can be rebuilt after the load."""
+    placeholders = ", ".join("?" for _ in tables)
+    indexes = conn.execute(f'''
+        SELECT name, sql FROM sqlite_master
+        WHERE type = 'index' AND sql IS NOT NULL AND tbl_name IN ({placeholders})''', tables).fetchall()
+    for name, _ in indexes:
+        conn.execute(f'DROP INDEX "{name}"')
+    return [sql for _, sql in indexes]
+
+
+def drop_fts_triggers(conn, tables):
+    """Drop the triggers that feed the full-text indexes and return their SQL.
+
+    Indexing row by row through the triggers is several times slower than one
+    'rebuild' of each FTS table after the load.
+    """
+    placeholders = ", ".join("?" for _ in tables)
+    triggers = conn.execute(f'''
+        SELECT name, sql FROM sqlite_master
+        WHERE type = 'trigger' AND name LIKE '%\\_fts' ESCAPE '\\' AND tbl_name IN ({placeholders})''', tables).fetchall()
+    for name, _ in triggers:
+        conn.execute(f'DROP TRIGGER "{name}"')
+    return [sql for _, sql in triggers]
+
+
+def restore_indexes(conn, index_sql, trigger_sql):
+    """Rebuild the indexes and full-text indexes dropped before a load, then restore the FTS triggers."""
+    if index_sql:
+        index_start = time.perf_counter()
+        for sql in index_sql:
+            conn.execute(sql)
+        print(f"{'indexes':<14}{len(index_sql):>12,} built {time.perf_counter() - index_start:>8.2f}s")
+    if trigger_sql:
+        fts_start = time.perf_counter()
+        for fts, _, _, _ in FTS_TABLES:
+            conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+        for sql in trigger_sql:
+            conn.execute(sql)
+        print(f"{'fts':<14}{len(FTS_TABLES):>12,} built {time.perf_counter() - fts_start:>8.2f}s")
+
+
+def generate(path="load_test.db", properties=10_000, contractors=1_000, users=None, conversations=100_000,
+             contacts_per_property=2, start="2024-01-01", days=365, seed=42, defer_indexes=True,
+             chunk_rows=CHUNK_ROWS, commit_rows=COMMIT_ROWS):
+    """Append a deterministic synthetic data set to ``path`` and print insert throughput."""
+    migrate(path)
+    rng = random.Random(seed)
+    users = properties if users is None else users
+    conn = sqlite3.connect(path, isolation_level=None)
+    for name, value in LOAD_PRAGMAS.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+
+    # Continue after existing rows so reruns add data instead of colliding
+    base_property = conn.execute("SELECT COALESCE(MAX(property_id), 0) FROM Property").fetchone()[0]
+    base_contractor = conn.execute("SELECT COALESCE(MAX(contractor_id), 0) FROM Contractor").fetchone()[0]
+    base_phone = conn.execute("SELECT COUNT(*) FROM Role_map").fetchone()[0] + base_contractor
+
+    tables = ["Property", "Contractor", "Role_map", "Flyp_contact", "Conversation"]
+    index_sql = drop_indexes(conn, tables) if defer_indexes else []
+    trigger_sql = drop_fts_triggers(conn, tables) if defer_indexes else []
+    loader = Loader(conn, chunk_rows, commit_rows)
+    area_codes = [code for code, weight in AREA_CODES.items() for _ in range(weight)]
+    started = time.perf_counter()
+    try:
+        loader.load("Property", '''
+            INSERT INTO Property (property_id, address, shortcode, name, status, status_detail)
+            VALUES (?, ?, ?, ?, ?, ?)''',
+            (property_row(rng, base_property + i) for i in range(1, properties + 1)))
+
+        def contractor_rows():
+            for i in range(1, contractors + 1):
+                name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+                address = f"{rng.randint(1, 9999)} {rng.choice(STREETS)} {rng.choice(SUFFIXES)}"
+                yield (base_contractor + i, name, address, rng.choice(AREAS), phone_number(base_phone + i, area_codes))
+
+        loader.load("Contractor", '''
+            INSERT INTO Contractor (contractor_id, name, address, area, phone_number)
+            VALUES (?, ?, ?, ?, ?)''', contractor_rows())
+
+        # Each user owns one property; user phones follow the contractors' in the sequence
+        user_phones = [phone_number(base_phone + contractors + i, area_codes) for i in range(1, users + 1)]
+        user_property = [base_property + rng.randint(1, properties) for _ in range(users)]
+        roles = list(ROLES)
+        role_weights = list(ROLES.values())
+        loader.load("Role_map", '''
+            INSERT OR IGNORE INTO Role_map (phone_number, role, property_id) VALUES (?, ?, ?)''',
+            ((phone, rng.choices(roles, weights=role_weights)[0], prop)
+             for phone, prop in zip(user_phones, user_property)))
+
+        fly_people = [f"{first} {last}" for first in FIRST_NAMES for last in LAST_NAMES]
+
+        def contact_rows():
+            for property_id in range(base_property + 1, base_property + properties + 1):
+                for person in rng.sample(fly_people, contacts_per_property):
+                    slug = re.sub(r"\W+", "-", person.lower())
+                    yield (property_id, person, f"https://calendly.com/{slug}")
+
+        loader.load("Flyp_contact", '''
+            INSERT OR IGNORE INTO Flyp_contact (property_id, fly_person_name, meeting_link) VALUES (?, ?, ?)''',
+            contact_rows())
+
+        # A few users account for most of the traffic; ids grow with time
+        user_weights = zipf_weights(users)
+        start_time = datetime.fromisoformat(start)
+        step = days * 86400 / max(conversations, 1)
+
+        def conversation_rows():
+            for i in range(conversations):
+                user = rng.choices(range(users), cum_weights=user_weights)[0]
+                property_id = user_property[user]
+                chat = rng.choice(CHATS).format(
+                    name=f"{rng.choice(NAME_WORDS)} {rng.choice(NAME_KINDS)}", shortcode=f"P{property_id:07d}",
+                    status=rng.choice(list(STATUSES)), address=f"{rng.randint(1, 9999)} {rng.choice(STREETS)} St")
+                timestamp = (start_time + timedelta(seconds=i * step)).strftime("%Y-%m-%d %H:%M:%S")
+                yield (property_id, base_contractor + rng.randint(1, contractors), chat, timestamp,
+                       user_phones[user], "user" if i % 2 == 0 else "assistant")
+
+        loader.load("Conversation", '''
+            INSERT INTO Conversation (property_id, contractor_id, chat, timestamp, phone_number, sender)
+            VALUES (?, ?, ?, ?, ?, ?)''', conversation_rows())
+    finally:
+        # Also after a failed or interrupted load: committed chunks stay, and the
+        # database must not be left without its lookup indexes, FTS triggers or WAL
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        restore_indexes(conn, index_sql, trigger_sql)
+        conn.execute("ANALYZE")
+        # Back to the settings the application expects
+        conn.execute("PRAGMA locking_mode = NORMAL")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.close()
+
+    total_rows = sum(count for _, count, _ in loader.report)
+    elapsed = time.perf_counter() - started
+    size = os.path.getsize(path) / 1024 / 1024
+    print(f"{'total':<14}{total_rows:>12,} rows {elapsed:>8.2f}s {total_rows / elapsed:>12,.0f} rows/s, {size:,.1f} MB")
+    return loader.report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fill the database with deterministic synthetic data for load tests.")
+    parser.add_argument("--db", default="load_test.db")
+    parser.add_argument("--properties", type=int, default=10_000)
+    parser.add_argument("--contractors", type=int, default=1_000)
+    parser.add_argument("--users", type=int, help="phone numbers in Role_map (default: one per property)")
+    parser.add_argument("--conversations", type=int, default=100_000)
+    parser.add_argument("--contacts-per-property", type=int, default=2)
+    parser.add_argument("--start", default="2024-01-01", help="date of the first conversation")
+    parser.add_argument("--days", type=int, default=365, help="time span of the conversations")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--commit-rows", type=int, default=COMMIT_ROWS)
+    parser.add_argument("--keep-indexes", action="store_true", help="insert with indexes in place instead of rebuilding")
+    args = parser.parse_args()
+
+    generate(args.db, args.properties, args.contractors, args.users, args.conversations,
+             args.contacts_per_property, args.start, args.days, args.seed, not args.keep_indexes,
+             args.chunk_rows, args.commit_rows)
@@ -0,0 +1,193 @@
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+import db
+from result_format import format_rows
+
+# Full scans are refused on tables with more rows than this
+LARGE_TABLE_ROWS = 10_000
+# Wall-clock limit for one query
+DEADLINE_SECONDS = 2.0
+# Rows returned to the model at most
+MAX_ROWS = 200
+# Rows pulled from SQLite per fetchmany call
+FETCH_BATCH = 50
+# SQLite VM instructions between deadline checks
+PROGRESS_STEPS = 10_000
+
+# An FTS5 table answers MATCH from its own index ("VIRTUAL TABLE INDEX n:M..."),
+# so only its unconstrained scans count as full scans
+SCAN = re.compile(r"^SCAN (?:TABLE )?(?P<table>\w+)\b(?! VIRTUAL TABLE INDEX \d+:\S*M)")
+# The plan names a table by its alias ("SCAN c"), so aliases and CTE names are
+# read from the query text and mapped back to the tables SQLite reads
+ALIAS = re.compile(r'(?:\bFROM|\bJOIN|,)\s*(?:"?\w+"?\.)?"?(?P<table>\w+)"?(?:\s+AS)?\s+"?(?P<alias>\w+)"?', re.I)
+CTE = re.compile(r'(?:\bWITH(?:\s+RECURSIVE)?|,)\s*"?(?P<name>\w+)"?\s*(?:\([^)]*\))?\s*AS\s*'
+                 r'(?:NOT\s+)?(?:MATERIALIZED\s*)?\(', re.I)
+
+
+class QueryRejected(Exception):
+    """Raised when a query is refused before it runs."""
+
+
+def single_statement(query):
+    """Return ``query`` without its closing semicolon, or None unless it is exactly one statement.
+
+    Semicolons inside string literals, identifiers or comments do not end a
+    statement, so ``WHERE chat LIKE '%;%'`` is one statement.
+    """
+    query = query.strip()
+    for end, char in enumerate(query):
+        if char == ";" and sqlite3.complete_statement(query[:end + 1]):
+            statement, rest = query[:end].strip(), query[end + 1:].strip(" \t\r\n;")
+            return statement if statement and not rest else None
+    return query if query and sqlite3.complete_statement(query + ";") else None
+
+
+class GuardedExecutor:
+    """Runs model-written SQL with hard limits.
+
+    Queries run on read-only connections, are inspected with EXPLAIN QUERY
+    PLAN before execution (full scans of large tables are refused), are
+    interrupted through SQLite's progress handler once the deadline passes,
+    and are streamed with fetchmany up to a row cap.
+    """
+
+    def __init__(self, path=db.DB_PATH, large_table_rows=LARGE_TABLE_ROWS,
+                 deadline=DEADLINE_SECONDS, max_rows=MAX_ROWS):
+        self.pool = db.get_pool(path, read_only=True)
+        self.large_table_rows = large_table_rows
+        self.deadline = deadline
+        self.max_rows = max_rows
+        self._sizes = {}  # table -> (estimated rows, measured at)
+        self._lock = threading.Lock()
+        self.metrics = Counter()
+
+    def _table_rows(self, conn, table):
+        """Cheap row estimate: MAX(rowid) is a single b-tree seek."""
+        cached = self._sizes.get(table)
+        if cached and time.monotonic() - cached[1] < 60:
+            return cached[0]
+        try:
+            rows = conn.execute(f'SELECT MAX(rowid) FROM "{table}"').fetchone()[0] or 0
+        except sqlite3.Error:
+            # WITHOUT ROWID tables and views; fall back to an exact count
+            rows = conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+        self._sizes[table] = (rows, time.monotonic())
+        return rows
+
+    def check_plan(self, conn, query, params=()):
+        """Raise QueryRejected if the plan fully scans a large table."""
+        read = set()
+
+        def authorize(action, table, column, database, trigger):
+            if action == sqlite3.SQLITE_READ and table:
+                read.add(table)
+            return sqlite3.SQLITE_OK
+
+        conn.set_authorizer(authorize)
+        try:
+            plan = [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params)]
+        except sqlite3.Error as e:
+            raise QueryRejected(f"Invalid query: {e}")
+        finally:
+            conn.set_authorizer(None)
+        tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        ctes = {m["name"] for m in CTE.finditer(query)}
+        aliases = {m["alias"]: m["table"] for m in ALIAS.finditer(query) if m["table"] in read | ctes}
+        for line in plan:
+            match = SCAN.match(line)
+            if not match:
+                continue
+            target = match["table"]
+            if target not in tables:
+                target = aliases.get(target, target)
+            if target in tables:
+                scanned = [target]
+            elif target in ctes:
+                # The CTE body's own scans are separate plan lines
+                continue
+            else:
+                # Unknown target: assume it may be any table the query reads
+                scanned = sorted(read & tables)
+            for table in scanned:
+                rows = self._table_rows(conn, table)
+                if rows > self.large_table_rows:
+                    raise QueryRejected(
+                        f"Query would scan all ~{rows} rows of {table}; "
+                        f"filter on an indexed column"
+                    )
+        return plan
+
+    def _count(self, key):
+        with self._lock:
+            self.metrics[key] += 1
+
+    def execute(self, query, params=()):
+        """Run ``query`` and return ``(columns, rows, truncated)``."""
+        query = single_statement(query)
+        if query is None:
+            self._count("rejected")
+            raise QueryRejected("Only a single SQL statement is allowed")
+
+        with self.pool.connection() as conn:
+            try:
+                self.check_plan(conn, query, params)
+            except QueryRejected:
+                self._count("rejected")
+                raise
+
+            deadline = time.monotonic() + self.deadline
+            conn.set_progress_handler(lambda: time.monotonic() > deadline, PROGRESS_STEPS)
+            try:
+                cursor = conn.execute(query, params)
+                columns = [d[0] for d in cursor.description or ()]
+                rows = []
+                while len(rows) <= self.max_rows:
+                    batch = cursor.fetchmany(FETCH_BATCH)
+                    if not batch:
+                        break
+                    rows.extend(batch)
+                cursor.close()
+            except sqlite3.OperationalError as e:
+                if "interrupted" in str(e):
+                    self._count("cancelled")
+                    raise QueryRejected(f"Query cancelled after {self.deadline:.1f}s deadline")
+                self._count("errors")
+                raise
+            finally:
+                conn.set_progress_handler(None, 0)
+
+        truncated = len(rows) > self.max_rows
+        if truncated:
+            self._count("truncated")
+        self._count("accepted")
+        return columns, rows[:self.max_rows], truncated
+
+    def stats(self):
+        with self._lock:
+            return dict(self.metrics)
+
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(path=db.DB_PATH):
+    with _executors_lock:
+        if path not in _executors:
+            _executors[path] = GuardedExecutor(path)
+        return _executors[path]
+
+
+def run_query(query, path=db.DB_PATH):
+    """Tool helper: run model-written SQL under the guard and return text for the model."""
+    try:
+        columns, rows, truncated = get_executor(path).execute(query)
+    except QueryRejected as e:
+        return f"Query rejected: {e}"
+    except sqlite3.Error as e:
+        return f"Error querying database: {e}"
+    return format_rows(columns, rows, complete=not truncated)
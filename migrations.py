@@ -0,0 +1,291 @@
+import sqlite3
+import sys
+
+from db import DB_PATH, property_lookup_sql
+
+# Schema migrations, applied in order. The applied version is stored in
+# PRAGMA user_version so each step runs exactly once per database file and
+# existing rows are never dropped.
+MIGRATIONS = []
+
+
+def migration(version, description):
+    def register(func):
+        MIGRATIONS.append((version, description, func))
+        return func
+    return register
+
+
+@migration(1, "base schema")
+def create_base_schema(conn):
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS Property (
+        property_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        address TEXT NOT NULL,
+        shortcode TEXT NOT NULL,
+        name TEXT NOT NULL,
+        status TEXT NOT NULL,
+        status_detail TEXT NOT NULL
+    )''')
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS Contractor (
+        contractor_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        address TEXT NOT NULL,
+        area TEXT NOT NULL,
+        phone_number TEXT NOT NULL
+    )''')
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS Conversation (
+        conversation_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        property_id INTEGER NOT NULL,
+        contractor_id INTEGER NOT NULL,
+        chat TEXT NOT NULL,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+        phone_number TEXT NOT NULL,
+        FOREIGN KEY (property_id) REFERENCES Property(property_id),
+        FOREIGN KEY (contractor_id) REFERENCES Contractor(contractor_id)
+    )''')
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS Role_map (
+        phone_number TEXT PRIMARY KEY,
+        role TEXT NOT NULL,
+        property_id INTEGER NOT NULL
+    )''')
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS "Flyp_contact" (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        property_id INTEGER NOT NULL,
+        fly_person_name TEXT NOT NULL,
+        meeting_link TEXT NOT NULL,
+        FOREIGN KEY (property_id) REFERENCES Property(property_id)
+    )''')
+
+
+@migration(2, "lookup indexes")
+def add_lookup_indexes(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_property_address ON Property(address)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_property_shortcode ON Property(shortcode)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_property_name ON Property(name)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_conversation_phone ON Conversation(phone_number, timestamp)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_flyp_contact_person ON Flyp_contact(fly_person_name)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_role_map_property ON Role_map(property_id)")
+
+
+@migration(3, "unique Flyp_contact rows")
+def dedupe_flyp_contact(conn):
+    # add_tables_lee.py used to insert its mock rows again on every run;
+    # keep the oldest copy of each contact before adding the constraint.
+    conn.execute('''
+    DELETE FROM Flyp_contact WHERE id NOT IN (
+        SELECT MIN(id) FROM Flyp_contact GROUP BY property_id, fly_person_name
+    )''')
+    conn.execute('''
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_flyp_contact_property_person
+    ON Flyp_contact(property_id, fly_person_name)''')
+
+
+# Tables whose rows feed tool answers; any write to them bumps Data_version
+VERSIONED_TABLES = ("Property", "Contractor", "Role_map", "Flyp_contact")
+
+
+@migration(4, "data version counters")
+def add_data_version(conn):
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS Data_version (
+        table_name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    )''')
+    for table in VERSIONED_TABLES:
+        conn.execute("INSERT OR IGNORE INTO Data_version (table_name) VALUES (?)", (table,))
+        for op in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{table.lower()}_{op.lower()}_version
+            AFTER {op} ON {table}
+            BEGIN
+                UPDATE Data_version SET version = version + 1 WHERE table_name = '{table}';
+            END''')
+
+
+@migration(5, "property status index")
+def add_status_index(conn):
+    # Bulk updates select properties by their current status
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_property_status ON Property(status)")
+
+
+@migration(6, "chat sender column")
+def add_conversation_sender(conn):
+    # Chat turns persisted by the bots record who spoke ('user' or 'assistant')
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(Conversation)")]
+    if "sender" not in columns:
+        conn.execute("ALTER TABLE Conversation ADD COLUMN sender TEXT")
+
+
+@migration(7, "rolling conversation summaries")
+def add_conversation_summary(conn):
+    # Older turns per phone number, folded into a summary as new turns arrive
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS Conversation_summary (
+        phone_number TEXT PRIMARY KEY,
+        summary TEXT NOT NULL,
+        last_conversation_id INTEGER NOT NULL,
+        updated DATETIME DEFAULT CURRENT_TIMESTAMP
+    )''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_conversation_phone_id ON Conversation(phone_number, conversation_id)")
+
+
+# External-content FTS5 indexes: (fts table, source table, rowid column, indexed columns)
+FTS_TABLES = (
+    ("Conversation_fts", "Conversation", "conversation_id", ("chat",)),
+    ("Property_fts", "Property", "property_id", ("name", "address", "status_detail")),
+)
+
+
+@migration(8, "full-text search")
+def add_full_text_search(conn):
+    # The FTS tables only hold the index; text stays in the source tables.
+    # Triggers keep them in sync, and status-only updates do not touch them.
+    for fts, table, key, columns in FTS_TABLES:
+        column_list = ", ".join(columns)
+        new_values = ", ".join(f"new.{c}" for c in columns)
+        old_values = ", ".join(f"old.{c}" for c in columns)
+        conn.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+            {column_list}, content='{table}', content_rowid='{key}', tokenize='porter unicode61'
+        )''')
+        conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{table.lower()}_insert_fts AFTER INSERT ON {table}
+        BEGIN
+            INSERT INTO {fts} (rowid, {column_list}) VALUES (new.{key}, {new_values});
+        END''')
+        conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{table.lower()}_delete_fts AFTER DELETE ON {table}
+        BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {column_list}) VALUES ('delete', old.{key}, {old_values});
+        END''')
+        conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{table.lower()}_update_fts AFTER UPDATE OF {column_list} ON {table}
+        BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {column_list}) VALUES ('delete', old.{key}, {old_values});
+            INSERT INTO {fts} (rowid, {column_list}) VALUES (new.{key}, {new_values});
+        END''')
+        # Index the rows that already exist
+        conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+
+# Columns the in-memory property resolver indexes
+PROPERTY_IDENTIFIERS = ("property_id", "address", "shortcode", "name")
+
+
+@migration(9, "property identifier version")
+def add_property_identifier_version(conn):
+    # Bumped only when a property is added, removed or renamed, so status
+    # updates do not make the resolver rebuild its index
+    conn.execute("INSERT OR IGNORE INTO Data_version (table_name) VALUES ('Property_identifiers')")
+    for op, event in (("insert", "INSERT"), ("delete", "DELETE"),
+                      ("rename", f"UPDATE OF {', '.join(PROPERTY_IDENTIFIERS)}")):
+        conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_property_{op}_identifiers_version
+        AFTER {event} ON Property
+        BEGIN
+            UPDATE Data_version SET version = version + 1 WHERE table_name = 'Property_identifiers';
+        END''')
+
+
+@migration(10, "nullable conversation links")
+def allow_unlinked_conversations(conn):
+    # Turns from phone numbers without a property or contractor used to be
+    # stored with id 0, pointing at no row. SQLite cannot drop NOT NULL in
+    # place, so the table is rebuilt with the same rowids (the FTS index stays
+    # valid) and its indexes and triggers are recreated.
+    dependents = [sql for (sql,) in conn.execute(
+        "SELECT sql FROM sqlite_master WHERE tbl_name = 'Conversation' AND type IN ('index', 'trigger') "
+        "AND sql IS NOT NULL")]
+    conn.execute('''
+    CREATE TABLE Conversation_new (
+        conversation_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        property_id INTEGER,
+        contractor_id INTEGER,
+        chat TEXT NOT NULL,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+        phone_number TEXT NOT NULL,
+        sender TEXT,
+        FOREIGN KEY (property_id) REFERENCES Property(property_id),
+        FOREIGN KEY (contractor_id) REFERENCES Contractor(contractor_id)
+    )''')
+    conn.execute('''
+    INSERT INTO Conversation_new (conversation_id, property_id, contractor_id, chat, timestamp, phone_number, sender)
+    SELECT conversation_id, NULLIF(property_id, 0), NULLIF(contractor_id, 0), chat, timestamp, phone_number, sender
+    FROM Conversation''')
+    conn.execute("DROP TABLE Conversation")
+    conn.execute("ALTER TABLE Conversation_new RENAME TO Conversation")
+    for sql in dependents:
+        conn.execute(sql)
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(path=DB_PATH):
+    """Apply every pending migration to ``path`` and return the resulting version."""
+    conn = sqlite3.connect(path, isolation_level=None)
+    try:
+        current = schema_version(conn)
+        for version, description, func in sorted(MIGRATIONS, key=lambda m: m[0]):
+            if version <= current:
+                continue
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                func(conn)
+                conn.execute(f"PRAGMA user_version = {version}")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            print(f"[MIGRATE] Applied {version}: {description}")
+            current = version
+        return current
+    finally:
+        conn.close()
+
+
+def query_plan(conn, query, params=()):
+    """Return the EXPLAIN QUERY PLAN detail lines for a query."""
+    return [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params)]
+
+
+# Hot lookups that must be served by an index once migrations are applied
+INDEXED_LOOKUPS = {
+    "Property by identifier": (property_lookup_sql("property_id"), ("P001",)),
+    "Conversation by phone": ("SELECT chat FROM Conversation WHERE phone_number = ?", ("1234567890",)),
+    "Flyp_contact by name": ("SELECT meeting_link FROM Flyp_contact WHERE fly_person_name = ?", ("Alice Johnson",)),
+    "Flyp_contact by property": ("SELECT fly_person_name, meeting_link FROM Flyp_contact WHERE property_id = ?", (1,)),
+    "Role_map by property": ("SELECT phone_number FROM Role_map WHERE property_id = ?", (1,)),
+    "Property by status": ("SELECT property_id FROM Property WHERE status = ?", ("Under Contract",)),
+}
+
+
+def check_query_plans(path=DB_PATH):
+    """Verify with EXPLAIN QUERY PLAN that no hot lookup falls back to a table scan."""
+    failures = []
+    conn = sqlite3.connect(path)
+    try:
+        for label, (query, params) in INDEXED_LOOKUPS.items():
+            plan = query_plan(conn, query, params)
+            scans = [line for line in plan if line.startswith("SCAN")]
+            print(f"{label}: {'; '.join(plan)}")
+            if scans:
+                failures.append(label)
+    finally:
+        conn.close()
+    return failures
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else DB_PATH
+    print(f"Schema version: {migrate(path)}")
+    failures = check_query_plans(path)
+    if failures:
+        print("Full table scans in:", ", ".join(failures))
+        sys.exit(1)
@@ -0,0 +1,171 @@
+import argparse
+import json
+import re
+import socket
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Returned when no scripted response matches: a single-pass converse selection
+DEFAULT_RESPONSE = json.dumps({"name": "converse", "arguments": {"response": "OK"}})
+
+
+class MockOllama(ThreadingHTTPServer):
+    """Local stand-in for the Ollama HTTP API, for offline benchmarks.
+
+    Serves ``/api/chat`` and ``/api/generate`` (streamed NDJSON or a single
+    JSON body), plus ``/api/version``, ``/api/tags`` and ``/api/ps`` so the
+    readiness checks work. Each request waits ``ttft`` seconds before the
+    first chunk and ``token_delay`` seconds per following chunk. The reply is
+    the first scripted response whose pattern matches the last user message.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, ttft=0.0, token_delay=0.0, default=DEFAULT_RESPONSE):
+        super().__init__((host, port), _Handler)
+        self.ttft = ttft
+        self.token_delay = token_delay
+        self.default = default
+        self.script = []  # [(compiled pattern, response)]
+        self.requests = 0
+        self.models_seen = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def add(self, pattern, response):
+        """Answer prompts whose last user message matches ``pattern`` (a regex) with ``response``."""
+        with self._lock:
+            self.script.append((re.compile(pattern), response))
+
+    def add_exact(self, text, response):
+        self.add(f"^{re.escape(text.strip())}$", response)
+
+    def load_script(self, path):
+        """Load ``[{"match": regex, "response": text}, ...]`` from a JSON file."""
+        with open(path) as f:
+            for entry in json.load(f):
+                response = entry["response"]
+                self.add(entry["match"], response if isinstance(response, str) else json.dumps(response))
+
+    def respond(self, prompt):
+        with self._lock:
+            self.requests += 1
+            for pattern, response in self.script:
+                if pattern.search(prompt.strip()):
+                    return response
+        return self.default
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name="mock-ollama", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # Streamed chunks are tiny; without this Nagle + delayed ACK add ~40ms per request
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, body, status=200):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/api/version":
+            self._send_json({"version": "0.0.0-mock"})
+        elif self.path in ("/api/tags", "/api/ps"):
+            self._send_json({"models": [{"name": name, "model": name} for name in self.server.models_seen]})
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        if self.path not in ("/api/chat", "/api/generate"):
+            self._send_json({"error": "not found"}, 404)
+            return
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        model = request.get("model", "")
+        self.server.models_seen.add(model)
+        chat = self.path == "/api/chat"
+        if chat:
+            users = [m.get("content", "") for m in request.get("messages", []) if m.get("role") == "user"]
+            prompt = users[-1] if users else ""
+        else:
+            prompt = request.get("prompt", "")
+
+        start = time.perf_counter()
+        text = self.server.respond(prompt)
+        pieces = re.findall(r"\S+\s*|\s+", text) or [""]
+        time.sleep(self.server.ttft)
+
+        def chunk(piece, done):
+            body = {"model": model, "created_at": datetime.now(timezone.utc).isoformat(), "done": done}
+            if chat:
+                body["message"] = {"role": "assistant", "content": piece}
+            else:
+                body["response"] = piece
+            if done:
+                body.update(done_reason="stop", total_duration=int((time.perf_counter() - start) * 1e9),
+                            prompt_eval_count=len(prompt) // 4, eval_count=len(pieces))
+            return body
+
+        if not request.get("stream", True):
+            time.sleep(self.server.token_delay * (len(pieces) - 1))
+            self._send_json(chunk(text, True))
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for i, piece in enumerate(pieces):
+                if i:
+                    time.sleep(self.server.token_delay)
+                self._write_chunk(chunk(piece, False))
+            self._write_chunk(chunk("", True))
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped reading once it had what it needed, as the agent does
+            self.close_connection = True
+
+    def _write_chunk(self, body):
+        data = json.dumps(body).encode() + b"\n"
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a mock Ollama API with scripted responses.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--ttft", type=float, default=0.0, help="seconds before the first chunk")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="seconds between chunks")
+    parser.add_argument("--script", help='JSON file of [{"match": regex, "response": text}]')
+    args = parser.parse_args()
+
+    server = MockOllama(args.host, args.port, args.ttft, args.token_delay)
+    if args.script:
+        server.load_script(args.script)
+    print(f"Mock Ollama listening on {server.url}")
+    server.serve_forever()
@@ -0,0 +1,159 @@
+import logging
+import re
+import textwrap
+
+from langchain_core.tools import Tool, render_text_description
+
+from token_budget import estimate_tokens
+
+# Default prefill budget for the static part of one prompt
+PROMPT_TOKEN_BUDGET = 600
+
+# Decoration that costs tokens and tells the model nothing
+EMOJI = re.compile("[\U0001F300-\U0001FAFF\u2600-\u27BF\uFE0F]")
+HEADER = re.compile(r"^#+\s*")
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[A-Z])")
+
+# Every prompt built in this process, by name
+_reports = {}
+
+
+class PromptBudgetExceeded(ValueError):
+    """Raised when a built prompt is over its token budget."""
+
+
+def compact(text):
+    """Dedent, drop emoji and markdown emphasis, collapse whitespace and blank lines."""
+    lines = []
+    for line in textwrap.dedent(text).splitlines():
+        line = HEADER.sub("", EMOJI.sub("", line).replace("**", ""))
+        line = " ".join(line.split())
+        if line or (lines and lines[-1]):
+            lines.append(line)
+    return "\n".join(lines).strip()
+
+
+def summary(description):
+    """First sentence of a tool description, plus any sentence telling the model when to use it."""
+    text = " ".join(description.split("Args:")[0].split())
+    sentences = SENTENCE_END.split(text)
+    return " ".join(sentences[:1] + [s for s in sentences[1:] if s.startswith("Use this")])
+
+
+def tool_manifest(tools):
+    """One line per tool: ``name(arg, optional_arg?): summary``.
+
+    Argument types are left out; the JSON schema the model decodes against
+    already enforces them. Single-input ReAct tools keep their description,
+    which is written for the prompt and says what the input looks like.
+    """
+    lines = []
+    for tool in tools:
+        if isinstance(tool, Tool):
+            lines.append(f"{tool.name}: {' '.join(tool.description.split())}")
+            continue
+        schema = tool.tool_call_schema.model_json_schema()
+        required = set(schema.get("required", ()))
+        arguments = ", ".join(name if name in required else f"{name}?" for name in schema.get("properties", {}))
+        lines.append(f"{tool.name}({arguments}): {summary(tool.description)}")
+    return "\n".join(lines)
+
+
+class PromptBuilder:
+    """Assembles a prompt from named sections and accounts for their tokens.
+
+    Sections are compacted, and a line already present in an earlier section
+    is dropped, so a rule stated twice is paid for once. Tokens are kept per
+    section before and after compaction; ``build`` refuses prompts over the
+    budget and logs what each turn saves in prefill.
+    """
+
+    def __init__(self, name, budget=PROMPT_TOKEN_BUDGET):
+        self.name = name
+        self.budget = budget
+        # (section, text, source tokens, prompt tokens)
+        self.sections = []
+        self._seen = set()
+
+    def add(self, section, text):
+        """Add a text section; lines holding ``{placeholders}`` are kept as they are."""
+        lines = []
+        for line in compact(text).splitlines():
+            key = line.lower()
+            if key and "{" not in line:
+                if key in self._seen:
+                    continue
+                self._seen.add(key)
+            lines.append(line)
+        kept = "\n".join(lines).strip()
+        # Measured without the source's indentation, which is not part of the authored text
+        self.sections.append((section, kept, estimate_tokens(textwrap.dedent(text).strip()), estimate_tokens(kept)))
+        return self
+
+    def add_tools(self, section, tools, placeholder=None):
+        """Add the tool manifest, measured against LangChain's full-docstring rendering.
+
+        With ``placeholder`` the prompt keeps that variable (e.g. ``{tools}``
+        for a ReAct prompt that renders the manifest itself) and only the
+        accounting uses the manifest.
+        """
+        manifest = tool_manifest(tools)
+        self.sections.append((section, placeholder or manifest,
+                              estimate_tokens(render_text_description(tools)), estimate_tokens(manifest)))
+        return self
+
+    def copy(self, name, budget=None):
+        """Start another prompt with the same leading sections, e.g. to share a cached prefix."""
+        other = PromptBuilder(name, self.budget if budget is None else budget)
+        other.sections = list(self.sections)
+        other._seen = set(self._seen)
+        return other
+
+    def report(self):
+        source = sum(s[2] for s in self.sections)
+        tokens = sum(s[3] for s in self.sections)
+        return {
+            "name": self.name,
+            "budget": self.budget,
+            "tokens": tokens,
+            "source_tokens": source,
+            "saved_per_turn": source - tokens,
+            "sections": {section: (before, after) for section, _, before, after in self.sections},
+        }
+
+    def build(self):
+        report = self.report()
+        if report["tokens"] > self.budget:
+            sizes = ", ".join(f"{section}={after}" for section, (_, after) in report["sections"].items())
+            raise PromptBudgetExceeded(
+                f"Prompt {self.name} is ~{report['tokens']} tokens, over its budget of {self.budget} ({sizes})"
+            )
+        _reports[self.name] = report
+        logging.info(f"Prompt {self.name}: ~{report['tokens']}/{self.budget} tokens, "
+                     f"{report['saved_per_turn']} prefill tokens saved per turn")
+        return "\n\n".join(text for _, text, _, _ in self.sections)
+
+
+def reports():
+    return list(_reports.values())
+
+
+def print_report(entries):
+    print(f"{'prompt / section':<28}{'source':>8}{'prompt':>8}{'saved':>8}")
+    for entry in entries:
+        print(f"{entry['name']:<28}{entry['source_tokens']:>8}{entry['tokens']:>8}{entry['saved_per_turn']:>8}"
+              f"  (budget {entry['budget']})")
+        for section, (before, after) in entry["sections"].items():
+            print(f"  {section:<26}{before:>8}{after:>8}{before - after:>8}")
+    print("(estimated tokens of prefill per turn)")
+
+
+if __name__ == "__main__":
+    # Prefill saved by the compact prompts of the Streamlit agent: python prompt_builder.py
+    # flyp_agent registers its prompts with the imported module, not with __main__
+    import importlib
+
+    importlib.import_module("flyp_agent")
+    import prompt_builder
+
+    print_report(prompt_builder.reports())
@@ -0,0 +1,258 @@
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import namedtuple, defaultdict
+from difflib import SequenceMatcher
+
+import db
+
+# A ranked match for a user-supplied property reference
+Candidate = namedtuple("Candidate", ["property_id", "score", "matched"])
+
+# Common street suffixes, so "123 Main Street" and "123 main st" share a key
+ABBREVIATIONS = {
+    "street": "st",
+    "avenue": "ave",
+    "road": "rd",
+    "boulevard": "blvd",
+    "lane": "ln",
+    "drive": "dr",
+    "court": "ct",
+    "place": "pl",
+    "north": "n",
+    "south": "s",
+    "east": "e",
+    "west": "w",
+}
+
+# Row layout the index is loaded from
+PROPERTY_COLUMNS = "property_id, address, shortcode, name"
+
+# Seconds between checks of the identifier version; within them lookups do
+# not touch the database, so a rename by another process shows up this late
+VERSION_CHECK_SECONDS = 1.0
+
+# Scores at or above this are treated as the user's intended property
+CONFIDENT_SCORE = 0.85
+# ... provided the runner-up trails by at least this much
+CONFIDENT_MARGIN = 0.1
+
+
+def normalize(text):
+    """Lowercase, drop punctuation and canonicalise street suffixes."""
+    words = re.sub(r"[^a-z0-9]+", " ", str(text).lower()).split()
+    return " ".join(ABBREVIATIONS.get(word, word) for word in words)
+
+
+def trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class PropertyResolver:
+    """In-memory index over property ids, shortcodes, addresses and names.
+
+    Exact references are answered from a normalized hash index, prefixes from
+    a sorted key list and near-misses from a trigram index re-ranked with
+    difflib. With a ``path``, a reference the index does not know is looked
+    up in the database once and indexed, so rows written by another process
+    are found too.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.loaded = False
+        self.version = None  # property_version() when the index was loaded
+        self.checked = None  # time.monotonic() of the last version check
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._labels = {}  # property id -> (shortcode, name, address)
+        self._exact = defaultdict(set)  # normalized key -> property ids
+        self._keys_by_id = {}  # property id -> its normalized keys
+        self._sorted_keys = []
+        self._trigrams = defaultdict(set)  # trigram -> normalized keys
+
+    def load(self, rows):
+        """Rebuild the index from (property_id, address, shortcode, name) rows."""
+        with self._lock:
+            self._reset()
+            for row in rows:
+                self._add(*row)
+
+    def upsert(self, property_id, address, shortcode, name):
+        with self._lock:
+            self._remove(property_id)
+            self._add(property_id, address, shortcode, name)
+
+    def remove(self, property_id):
+        with self._lock:
+            self._remove(property_id)
+
+    def _add(self, property_id, address, shortcode, name):
+        keys = {normalize(value) for value in (property_id, address, shortcode, name)}
+        keys.discard("")
+        self._keys_by_id[property_id] = keys
+        self._labels[property_id] = (shortcode, name, address)
+        for key in keys:
+            if not self._exact[key]:
+                self._sorted_keys.insert(bisect_left(self._sorted_keys, key), key)
+                for gram in trigrams(key):
+                    self._trigrams[gram].add(key)
+            self._exact[key].add(property_id)
+
+    def _remove(self, property_id):
+        self._labels.pop(property_id, None)
+        for key in self._keys_by_id.pop(property_id, ()):
+            ids = self._exact[key]
+            ids.discard(property_id)
+            if ids:
+                continue
+            del self._exact[key]
+            del self._sorted_keys[bisect_left(self._sorted_keys, key)]
+            for gram in trigrams(key):
+                self._trigrams[gram].discard(key)
+
+    def _prefix_keys(self, query, limit):
+        start = bisect_left(self._sorted_keys, query)
+        for key in self._sorted_keys[start:start + limit]:
+            if not key.startswith(query):
+                break
+            yield key
+
+    def _fuzzy_keys(self, query, limit):
+        overlap = defaultdict(int)
+        for gram in trigrams(query):
+            for key in self._trigrams.get(gram, ()):
+                overlap[key] += 1
+        return sorted(overlap, key=overlap.get, reverse=True)[:limit]
+
+    def _fetch(self, text):
+        """Index the row ``text`` names exactly in the database; return its id or None."""
+        if self.path is None:
+            return None
+        with db.get_pool(self.path).connection() as conn:
+            row = db.find_property(str(text).strip(), PROPERTY_COLUMNS, conn=conn)
+        if row is None:
+            return None
+        self.upsert(*row)
+        return row[0]
+
+    def exact(self, text):
+        """Return the id of the one property ``text`` names exactly (after normalizing), or None.
+
+        Writes resolve through this; a near-miss is never good enough to
+        change a row.
+        """
+        with self._lock:
+            ids = self._exact.get(normalize(text))
+            if ids:
+                return next(iter(ids)) if len(ids) == 1 else None
+        return self._fetch(text)
+
+    def resolve(self, text, limit=5):
+        """Return up to ``limit`` candidates for ``text``, best first."""
+        query = normalize(text)
+        if not query:
+            return []
+        scores = {}
+
+        def offer(key, score):
+            for property_id in self._exact.get(key, ()):
+                if score > scores.get(property_id, (0, None))[0]:
+                    scores[property_id] = (score, key)
+
+        with self._lock:
+            offer(query, 1.0)
+            for key in self._prefix_keys(query, limit * 4):
+                offer(key, 0.8 + 0.15 * len(query) / len(key))
+            for key in self._fuzzy_keys(query, limit * 4):
+                offer(key, 0.95 * SequenceMatcher(None, query, key).ratio())
+
+        ranked = sorted(scores.items(), key=lambda item: item[1][0], reverse=True)
+        return [Candidate(pid, round(score, 3), key) for pid, (score, key) in ranked[:limit]]
+
+    def best(self, text):
+        """Return the property id ``text`` confidently refers to, or None.
+
+        Near-misses count, so this is for reads only; writes use ``exact``.
+        """
+        with self._lock:
+            exact = self._exact.get(normalize(text))
+            if exact and len(exact) == 1:
+                return next(iter(exact))
+        if not exact:
+            fetched = self._fetch(text)
+            if fetched is not None:
+                return fetched
+        candidates = self.resolve(text, limit=2)
+        if not candidates or candidates[0].score < CONFIDENT_SCORE:
+            return None
+        if len(candidates) > 1 and candidates[0].score - candidates[1].score < CONFIDENT_MARGIN:
+            return None
+        return candidates[0].property_id
+
+    def label(self, property_id):
+        """``shortcode (name, address)`` of an indexed property, for confirmations."""
+        with self._lock:
+            labels = self._labels.get(property_id)
+        return "{} ({}, {})".format(*labels) if labels else str(property_id)
+
+    def describe(self, identifier, candidates):
+        """Render a 'did you mean' hint so the model can retry without guessing."""
+        if not candidates:
+            return f"No property found matching identifier '{identifier}'"
+        with self._lock:
+            options = "; ".join(
+                "{} ({}, {})".format(*self._labels[c.property_id])
+                for c in candidates if c.property_id in self._labels
+            )
+        return f"No exact property match for '{identifier}'. Did you mean: {options}?"
+
+    def __len__(self):
+        return len(self._keys_by_id)
+
+
+_resolvers = {}
+_resolvers_lock = threading.Lock()
+
+
+def property_version(path=db.DB_PATH):
+    """Version that moves whenever a property is added, removed or renamed (see migration 9)."""
+    row = db.get_pool(path).fetchone("SELECT version FROM Data_version WHERE table_name = 'Property_identifiers'")
+    return row[0] if row else None
+
+
+def get_resolver(path=db.DB_PATH):
+    """Return the process-wide resolver for ``path``.
+
+    The index is (re)built on first use and whenever a property was added,
+    removed or renamed since, by this process or another one. The version is
+    checked at most every VERSION_CHECK_SECONDS.
+    """
+    with _resolvers_lock:
+        resolver = _resolvers.get(path)
+        if resolver is None:
+            resolver = _resolvers[path] = PropertyResolver(path)
+        if resolver.loaded and time.monotonic() - resolver.checked < VERSION_CHECK_SECONDS:
+            return resolver
+    version = property_version(path)
+    with _resolvers_lock:
+        if not resolver.loaded or resolver.version != version:
+            resolver.load(db.get_pool(path).fetchall(f"SELECT {PROPERTY_COLUMNS} FROM Property"))
+            resolver.loaded, resolver.version = True, version
+        resolver.checked = time.monotonic()
+        return resolver
+
+
+def refresh_property(property_id, path=db.DB_PATH):
+    """Re-index a single property after this process inserted, changed or deleted its row."""
+    resolver = get_resolver(path)
+    row = db.get_pool(path).fetchone(f"SELECT {PROPERTY_COLUMNS} FROM Property WHERE property_id = ?", (property_id,))
+    if row:
+        resolver.upsert(*row)
+    else:
+        resolver.remove(property_id)
+
@@ -0,0 +1,146 @@
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import db
+
+# Tools that change data; their answers are never cached
+MUTATING_TOOLS = {"update_property_status", "bulk_update_property_status"}
+# Tools reading tables Data_version does not track, so a cached answer could go
+# stale unnoticed. Conversation gains rows every turn; versioning it would
+# invalidate the whole cache on every turn instead.
+UNVERSIONED_TOOLS = {"search_records"}
+
+# Tools report failures as text starting with this, e.g. "Error: database is locked"
+FAILURE_PREFIX = "Error"
+
+# Separate file so cache writes never contend with the real estate data
+CACHE_DB_PATH = "response_cache.db"
+
+
+def normalize_text(text):
+    """Lowercase, collapse whitespace and drop trailing punctuation."""
+    return re.sub(r"\s+", " ", text.strip().lower()).rstrip("?!. ")
+
+
+def cacheable(tool_name, content):
+    """Whether a turn answered by ``tool_name`` with ``content`` may be replayed from the cache.
+
+    Failures are often transient (a locked database, a model timeout), so
+    they are never cached and the next identical question tries again.
+    """
+    if tool_name in MUTATING_TOOLS or tool_name in UNVERSIONED_TOOLS or not isinstance(content, str):
+        return False
+    return not content.lstrip().startswith(FAILURE_PREFIX)
+
+
+def make_key(text, phone_number, role, data_version):
+    raw = "\x1f".join([normalize_text(text), str(phone_number), str(role), str(data_version)])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """LRU + TTL cache of final chatbot responses.
+
+    Entries live in an in-process OrderedDict and, when ``path`` is given, in
+    a local SQLite table so they survive restarts. The key carries the
+    database data version, so any write to the underlying rows makes older
+    entries unreachable; LRU and TTL eviction then drop them.
+    """
+
+    def __init__(self, max_entries=1024, ttl=300.0, path=CACHE_DB_PATH):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (created, value)
+        self._lock = threading.Lock()
+        self._pool = None
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        if path:
+            self._pool = db.get_pool(path)
+            self._pool.execute('''
+            CREATE TABLE IF NOT EXISTS Response_cache (
+                cache_key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                created REAL NOT NULL
+            )''')
+
+    def _expired(self, created):
+        return time.time() - created > self.ttl
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry[0]):
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+        if self._pool is not None:
+            row = self._pool.fetchone(
+                "SELECT created, response FROM Response_cache WHERE cache_key = ?", (key,)
+            )
+            if row and not self._expired(row[0]):
+                with self._lock:
+                    self._remember(key, row)
+                    self.hits += 1
+                return row[1]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, value):
+        entry = (time.time(), value)
+        with self._lock:
+            self._remember(key, entry)
+            self.stores += 1
+            prune = self.stores % 100 == 0
+        if self._pool is not None:
+            self._pool.execute(
+                "INSERT OR REPLACE INTO Response_cache (cache_key, response, created) VALUES (?, ?, ?)",
+                (key, value, entry[0]),
+            )
+            if prune:
+                self._prune_table()
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _prune_table(self):
+        with self._pool.transaction() as conn:
+            conn.execute("DELETE FROM Response_cache WHERE created < ?", (time.time() - self.ttl,))
+            conn.execute('''
+            DELETE FROM Response_cache WHERE cache_key NOT IN (
+                SELECT cache_key FROM Response_cache ORDER BY created DESC LIMIT ?
+            )''', (self.max_entries,))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self._pool is not None:
+            self._pool.execute("DELETE FROM Response_cache")
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+            }
+
+
+def lookup_role(phone_number):
+    row = db.fetchone("SELECT role FROM Role_map WHERE phone_number = ?", (phone_number,))
+    return row[0] if row else None
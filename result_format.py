@@ -0,0 +1,77 @@
+import sys
+
+from token_budget import estimate_tokens, truncate_to_tokens
+
+# Token budget for one tool result fed back to the model
+RESULT_TOKEN_BUDGET = 600
+# Longest single cell kept verbatim
+CELL_TOKENS = 40
+DELIMITER = "|"
+
+
+def _cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        value = f"{value:g}"
+    text = " ".join(str(value).split()).replace(DELIMITER, "/")
+    return truncate_to_tokens(text, CELL_TOKENS)
+
+
+def format_rows(columns, rows, budget=RESULT_TOKEN_BUDGET, complete=True):
+    """Render query rows for the model: column header once, then one delimited line per row.
+
+    Rows that do not fit ``budget`` tokens are dropped and counted in a
+    trailing note. Pass ``complete=False`` when ``rows`` was already capped
+    by the caller, so the note says more rows exist.
+    """
+    if not rows:
+        return "(no rows)"
+    lines = [DELIMITER.join(columns)] if columns else []
+    # Leave room for the omitted-rows note
+    remaining = budget - estimate_tokens("\n".join(lines)) - 12
+    shown = 0
+    for row in rows:
+        line = DELIMITER.join(_cell(value) for value in row)
+        cost = estimate_tokens(line) + 1
+        if cost > remaining:
+            break
+        lines.append(line)
+        remaining -= cost
+        shown += 1
+
+    omitted = len(rows) - shown
+    if omitted or not complete:
+        more = f"{omitted}+" if not complete else str(omitted)
+        lines.append(f"({more} more rows omitted; narrow the query)")
+    return "\n".join(lines)
+
+
+def format_record(record, budget=RESULT_TOKEN_BUDGET):
+    """Render one mapping as ``key: value`` lines, skipping empty values."""
+    if not record:
+        return "(none)"
+    text = "\n".join(f"{key}: {_cell(value)}" for key, value in record.items() if value not in (None, ""))
+    return truncate_to_tokens(text, budget)
+
+
+def savings(columns, rows, budget=RESULT_TOKEN_BUDGET):
+    """Compare the token cost of ``str(rows)`` with ``format_rows``."""
+    before = estimate_tokens(str(rows))
+    after = estimate_tokens(format_rows(columns, rows, budget))
+    return {"rows": len(rows), "repr_tokens": before, "compact_tokens": after,
+            "saved": f"{1 - after / before:.0%}" if before else "0%"}
+
+
+if __name__ == "__main__":
+    # Report the savings on real tables: python result_format.py [db_path]
+    import db
+
+    path = sys.argv[1] if len(sys.argv) > 1 else db.DB_PATH
+    pool = db.get_pool(path, read_only=True)
+    for table in ("Property", "Contractor", "Role_map", "Flyp_contact", "Conversation"):
+        with pool.connection() as conn:
+            cursor = conn.execute(f"SELECT * FROM {table} LIMIT 200")
+            columns = [d[0] for d in cursor.description]
+            rows = cursor.fetchall()
+        print(table, savings(columns, rows))
@@ -0,0 +1,95 @@
+import threading
+
+import db
+
+# Bookkeeping tables maintained by migrations and triggers, not data to query
+INTERNAL_TABLES = frozenset({"Data_version", "Conversation_summary"})
+
+
+def user_tables(rows):
+    """Names from ``(name, sql)`` sqlite_master rows, minus virtual tables, their shadow tables and INTERNAL_TABLES.
+
+    A full-text index such as Conversation_fts keeps its data in shadow
+    tables named ``Conversation_fts_data``, ``_idx``, ``_docsize``, ``_config``;
+    none of them is something the model should query.
+    """
+    rows = list(rows)
+    virtual = [name for name, sql in rows if (sql or "").upper().startswith("CREATE VIRTUAL TABLE")]
+    return [
+        name for name, _ in rows
+        if name not in INTERNAL_TABLES and not name.startswith("sqlite_")
+        and not any(name == vtab or name.startswith(vtab + "_") for vtab in virtual)
+    ]
+
+
+class SchemaSnapshot:
+    """Table and column metadata read once and reused across turns.
+
+    Only tables holding data are listed; see ``user_tables``.
+
+    Rendered prompt fragments are cached alongside the metadata. Both are
+    dropped only when SQLite's ``PRAGMA schema_version`` changes, which
+    happens on any CREATE/ALTER/DROP; checking it is a header read, not a
+    reflection of the schema.
+    """
+
+    def __init__(self, path=db.DB_PATH):
+        self.pool = db.get_pool(path, read_only=True)
+        self._lock = threading.Lock()
+        self._version = None
+        self._tables = {}  # table -> [(column, type)]
+        self._fragments = {}
+        self.reloads = 0
+
+    def _current(self):
+        with self.pool.connection() as conn:
+            version = conn.execute("PRAGMA schema_version").fetchone()[0]
+            with self._lock:
+                if version == self._version:
+                    return self._tables
+                names = user_tables(conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'table' ORDER BY name"))
+                self._tables = {
+                    name: [(row[1], row[2]) for row in conn.execute(f'PRAGMA table_info("{name}")')]
+                    for name in names
+                }
+                self._fragments = {}
+                self._version = version
+                self.reloads += 1
+                return self._tables
+
+    def tables(self):
+        """Mapping of table name to its (column, type) pairs."""
+        return self._current()
+
+    def table_names(self):
+        return list(self._current())
+
+    def fragment(self, key, render):
+        """Return ``render(tables)``, cached until the schema changes."""
+        tables = self._current()
+        with self._lock:
+            if key not in self._fragments:
+                self._fragments[key] = render(tables)
+            return self._fragments[key]
+
+    def table_list(self):
+        """Prompt fragment: comma separated table names."""
+        return self.fragment("table_list", lambda tables: ", ".join(tables))
+
+    def table_columns(self):
+        """Prompt fragment: one ``Table(column type, ...)`` line per table."""
+        return self.fragment("table_columns", lambda tables: "\n".join(
+            f"{name}({', '.join(f'{col} {kind}'.strip() for col, kind in columns)})"
+            for name, columns in tables.items()
+        ))
+
+
+_snapshots = {}
+_snapshots_lock = threading.Lock()
+
+
+def get_snapshot(path=db.DB_PATH):
+    with _snapshots_lock:
+        if path not in _snapshots:
+            _snapshots[path] = SchemaSnapshot(path)
+        return _snapshots[path]
@@ -0,0 +1,139 @@
+import re
+
+import db
+from result_format import format_rows
+
+PAGE_SIZE = 10
+# Words of context around each match in a snippet
+SNIPPET_TOKENS = 12
+# Up to this many conversations, a phone-filtered search probes the FTS index
+# once per conversation; beyond it, ranking every match and joining is cheaper
+PROBE_LIMIT = 32
+
+TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_query(text):
+    """Turn free text into a safe FTS5 query: every word must match, the last one as a prefix.
+
+    Quoting each word keeps FTS5 operators and punctuation in user input from
+    being parsed as query syntax.
+    """
+    words = TOKEN.findall(text or "")
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def _page(rows, page_size):
+    """Split the extra look-ahead row off, so no COUNT(*) is needed to know if more pages exist."""
+    return rows[:page_size], len(rows) > page_size
+
+
+def search_conversations(text, phone_number=None, page=1, page_size=PAGE_SIZE, path=db.DB_PATH):
+    """Best-matching chat turns by bm25, optionally limited to one phone number.
+
+    Returns ``(rows, has_more)`` where each row is
+    ``(conversation_id, timestamp, phone_number, snippet, score)``.
+    """
+    query = fts_query(text)
+    if query is None:
+        return [], False
+    # Rank and page inside the FTS table first so snippets are only built,
+    # and Conversation only read, for the rows on this page
+    pool = db.get_pool(path, read_only=True)
+    source, owner = "Conversation_fts", ""
+    if phone_number:
+        turns = pool.fetchone("SELECT COUNT(*) FROM Conversation WHERE phone_number = ?", (phone_number,))[0]
+        if turns <= PROBE_LIMIT:
+            owner = " AND rowid IN (SELECT conversation_id FROM Conversation WHERE phone_number = ?)"
+        else:
+            source = "Conversation_fts JOIN Conversation ON conversation_id = Conversation_fts.rowid"
+            owner = " AND phone_number = ?"
+    sql = f'''
+        SELECT c.conversation_id, c.timestamp, c.phone_number, hit.snippet, round(hit.score, 3)
+        FROM (
+            SELECT Conversation_fts.rowid AS rowid, rank AS score,
+                   snippet(Conversation_fts, 0, '[', ']', ' ... ', {SNIPPET_TOKENS}) AS snippet
+            FROM {source}
+            WHERE Conversation_fts MATCH ?{owner}
+            ORDER BY rank
+            LIMIT ? OFFSET ?
+        ) AS hit
+        JOIN Conversation c ON c.conversation_id = hit.rowid
+        ORDER BY hit.score'''
+    params = [query] + ([phone_number] if phone_number else []) + [page_size + 1, (page - 1) * page_size]
+    return _page(pool.fetchall(sql, params), page_size)
+
+
+def search_properties(text, page=1, page_size=PAGE_SIZE, path=db.DB_PATH):
+    """Best-matching properties by bm25 over name, address and status_detail.
+
+    Returns ``(rows, has_more)`` where each row is
+    ``(property_id, shortcode, name, status, snippet, score)``.
+    """
+    query = fts_query(text)
+    if query is None:
+        return [], False
+    sql = f'''
+        SELECT p.property_id, p.shortcode, p.name, p.status, hit.snippet, round(hit.score, 3)
+        FROM (
+            SELECT rowid, rank AS score,
+                   snippet(Property_fts, -1, '[', ']', ' ... ', {SNIPPET_TOKENS}) AS snippet
+            FROM Property_fts
+            WHERE Property_fts MATCH ?
+            ORDER BY rank
+            LIMIT ? OFFSET ?
+        ) AS hit
+        JOIN Property p ON p.property_id = hit.rowid
+        ORDER BY hit.score'''
+    rows = db.get_pool(path, read_only=True).fetchall(sql, (query, page_size + 1, (page - 1) * page_size))
+    return _page(rows, page_size)
+
+
+def render(columns, rows, has_more, page):
+    """Tool output: compact rows plus a hint for fetching the next page."""
+    text = format_rows(columns, rows)
+    if has_more:
+        text += f"\n(more results: page={page + 1})"
+    return text
+
+
+def search_text(text, scope="all", page=1, phone_number=None, path=db.DB_PATH):
+    """Search properties and/or conversations and render the results for a tool reply.
+
+    With ``phone_number`` only that number's conversations are searched, and
+    the phone column is left out of the reply.
+    """
+    page = max(1, int(page))
+    sections = []
+    if scope in ("all", "properties"):
+        rows, more = search_properties(text, page, path=path)
+        sections.append("Properties:\n" + render(["property_id", "shortcode", "name", "status", "match", "score"],
+                                                   rows, more, page))
+    if scope in ("all", "conversations"):
+        rows, more = search_conversations(text, phone_number, page, path=path)
+        columns = ["conversation_id", "timestamp", "phone", "match", "score"]
+        if phone_number:
+            rows = [row[:2] + row[3:] for row in rows]
+            del columns[2]
+        sections.append("Conversations:\n" + render(columns, rows, more, page))
+    return "\n\n".join(sections) if sections else f"Error: unknown scope '{scope}'"
+
+
+def search_for_caller(text, scope="all", page=1, phone_number=None, path=db.DB_PATH):
+    """Tool helper: ``search_text`` limited to what the caller may see, with errors returned as text.
+
+    Conversations are only ever searched within the caller's own chats; with
+    no known phone number only properties are searched.
+    """
+    try:
+        if not phone_number:
+            if scope == "conversations":
+                return "Error: Conversations can only be searched for a known phone number"
+            scope = "properties" if scope == "all" else scope
+        return search_text(text, scope, page, phone_number=phone_number, path=path)
+    except Exception as e:
+        return f"Error: {e}"
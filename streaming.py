@@ -0,0 +1,156 @@
+import json
+import time
+
+from langchain_core.utils.json import parse_partial_json
+
+
+class JsonObjectStream:
+    """Incrementally scans streamed text for the first complete JSON object.
+
+    Tracks brace depth outside of string literals, so the object can be parsed
+    the moment its closing brace arrives instead of after the model finishes.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._start = None
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._pos = 0
+
+    def feed(self, chunk):
+        """Add ``chunk`` and return the parsed object once it is complete."""
+        self.text += chunk
+        while self._pos < len(self.text):
+            char = self.text[self._pos]
+            self._pos += 1
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"' and self._start is not None:
+                self._in_string = True
+            elif char == "{":
+                if self._start is None:
+                    self._start = self._pos - 1
+                self._depth += 1
+            elif char == "}" and self._start is not None:
+                self._depth -= 1
+                if self._depth == 0:
+                    candidate = self.text[self._start:self._pos]
+                    try:
+                        return json.loads(candidate)
+                    except ValueError:
+                        # Not valid JSON after all; keep scanning for the next object
+                        self._start = None
+        return None
+
+
+def chunk_text(chunk):
+    return chunk.content if hasattr(chunk, "content") else str(chunk)
+
+
+class ToolCallStream:
+    """Reads a streamed ``{"name": ..., "arguments": {...}}`` tool call.
+
+    Exposes the partially parsed call while it is being generated, so a reply
+    embedded in the arguments can be shown token by token and the tool can be
+    dispatched as soon as the object is complete.
+    """
+
+    def __init__(self, chunks):
+        self._source = chunks
+        self._chunks = iter(chunks)
+        self._scanner = JsonObjectStream()
+        self.partial = {}
+        self.selection = None
+
+    @property
+    def raw(self):
+        return self._scanner.text
+
+    def _pull(self):
+        """Read one more chunk; return False once the call is complete or the stream ended."""
+        if self.selection is not None:
+            return False
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            return False
+        obj = self._scanner.feed(chunk_text(chunk))
+        if obj is not None:
+            self.selection = self.partial = obj
+            if hasattr(self._source, "close"):
+                self._source.close()
+            return True
+        start = self._scanner.text.find("{")
+        if start != -1:
+            parsed = parse_partial_json(self._scanner.text[start:])
+            if isinstance(parsed, dict):
+                self.partial = parsed
+        return True
+
+    def name(self):
+        """Return the tool name once it can no longer change."""
+        while self.selection is None and "arguments" not in self.partial and self._pull():
+            pass
+        return self.partial.get("name")
+
+    def result(self):
+        """Consume the rest of the stream and return the complete call, or None."""
+        while self._pull():
+            pass
+        return self.selection
+
+    def argument_deltas(self, key):
+        """Yield newly generated text of the string argument ``key``."""
+        sent = ""
+        while True:
+            arguments = self.partial.get("arguments")
+            value = arguments.get(key) if isinstance(arguments, dict) else None
+            if isinstance(value, str) and len(value) > len(sent) and value.startswith(sent):
+                yield value[len(sent):]
+                sent = value
+            if not self._pull():
+                break
+
+
+class LatencyTimer:
+    """Measures time-to-first-token and total latency of a turn."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.first_token_at = None
+        self.end = None
+
+    def first_token(self):
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+
+    def stop(self):
+        self.first_token()
+        self.end = time.perf_counter()
+
+    @property
+    def ttft(self):
+        return (self.first_token_at or time.perf_counter()) - self.start
+
+    @property
+    def total(self):
+        return (self.end or time.perf_counter()) - self.start
+
+    def __str__(self):
+        return f"ttft={self.ttft:.3f}s total={self.total:.3f}s"
+
+
+def stream_text(chunks, timer):
+    """Yield the text of each streamed chunk, marking the first token on ``timer``."""
+    for chunk in chunks:
+        text = chunk_text(chunk)
+        if text:
+            timer.first_token()
+            yield text
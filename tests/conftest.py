@@ -0,0 +1,52 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+# The modules live at the repository root, next to the Streamlit apps
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import migrations  # noqa: E402
+
+PROPERTIES = [
+    ("123 Main St", "P001", "Sunset Villa", "Available", "Ready to move"),
+    ("456 Oak St", "P002", "Maple Residency", "Sold", "Under renovation"),
+    ("789 Pine St", "P003", "Pine Crest", "Available", "Newly constructed"),
+    ("321 Elm St", "P004", "Elm Heights", "Under Contract", "Pending approval"),
+    ("654 Cedar St", "P005", "Cedar Homes", "Available", "Furnished"),
+]
+CONTRACTORS = [
+    ("John Doe", "789 Contractor Ave", "Downtown", "1234567890"),
+    ("Jane Smith", "456 Builder Rd", "Uptown", "9876543210"),
+]
+CONVERSATIONS = [
+    (1, 1, "The roof leak at Sunset Villa is fixed", "1234567890"),
+    (2, 2, "Inspection for Maple Residency moved to Friday", "9876543210"),
+    (1, 1, "Roof inspection passed; invoice sent", "1234567890"),
+    (3, 2, "Another roof leak reported at Pine Crest", "9876543210"),
+]
+ROLES = [("1234567890", "Admin", 1), ("9876543210", "User", 2)]
+CONTACTS = [(1, "Alice Johnson", "https://meet.example.com/alice"), (2, "Bob Brown", "https://meet.example.com/bob")]
+
+
+def sample_db(path):
+    """Migrate ``path`` and load the sample rows of create_sample_db.py."""
+    migrations.migrate(path)
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.executemany("INSERT INTO Property (address, shortcode, name, status, status_detail) VALUES (?, ?, ?, ?, ?)",
+                         PROPERTIES)
+        conn.executemany("INSERT INTO Contractor (name, address, area, phone_number) VALUES (?, ?, ?, ?)", CONTRACTORS)
+        conn.executemany("INSERT INTO Conversation (property_id, contractor_id, chat, phone_number) VALUES (?, ?, ?, ?)",
+                         CONVERSATIONS)
+        conn.executemany("INSERT INTO Role_map (phone_number, role, property_id) VALUES (?, ?, ?)", ROLES)
+        conn.executemany("INSERT INTO Flyp_contact (property_id, fly_person_name, meeting_link) VALUES (?, ?, ?)",
+                         CONTACTS)
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return sample_db(str(tmp_path / "real_estate.db"))
@@ -0,0 +1,53 @@
+import asyncio
+import threading
+
+import pytest
+
+from async_runtime import AsyncRuntime, get_runtime
+
+
+async def countdown(n):
+    while n:
+        await asyncio.sleep(0)
+        yield n
+        n -= 1
+
+
+def test_iterate_drives_an_async_generator_from_a_worker_thread():
+    runtime = get_runtime()
+    results = {}
+
+    def worker(name, n):
+        results[name] = list(runtime.iterate(countdown(n)))
+
+    threads = [threading.Thread(target=worker, args=(i, i + 3)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    assert results == {i: list(range(i + 3, 0, -1)) for i in range(4)}
+
+
+def test_iterate_reraises_errors_from_the_generator():
+    async def failing():
+        yield 1
+        raise ValueError("stream broke")
+
+    items = get_runtime().iterate(failing())
+    assert next(items) == 1
+    with pytest.raises(ValueError, match="stream broke"):
+        next(items)
+
+
+def test_db_calls_run_on_the_executor():
+    runtime = AsyncRuntime(db_workers=1)
+    try:
+        name = runtime.run(runtime.to_db(lambda: threading.current_thread().name), timeout=5)
+        assert name.startswith("db")
+        assert runtime.run(asyncio.sleep(0, result="done"), timeout=5) == "done"
+    finally:
+        runtime.close()
+
+
+def test_one_runtime_per_process():
+    assert get_runtime() is get_runtime()
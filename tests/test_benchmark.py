@@ -0,0 +1,97 @@
+import json
+import sys
+import types
+import uuid
+
+from benchmark import (REACT_FINAL_STEP, REACT_OBSERVATION, Recorder, cases_from_jsonl, cases_from_log, percentile,
+                       react_prompt, react_step, regressions, replay_react, with_confidence)
+from mock_ollama import MockOllama
+from prompt_builder import PromptBuilder
+
+
+def test_log_cases_convert_legacy_converse(tmp_path):
+    log = tmp_path / "chatbot_logs.log"
+    log.write_text(
+        "2025-01-01 INFO Model selected tool: converse with arguments: {'input': 'hello there'}\n"
+        + json.dumps({"msg": "Model selected tool: get_property_status with arguments: "
+                             "{'property_identifier': 'P001'}"}) + "\n"
+        "unrelated line\n"
+    )
+    cases = cases_from_log(str(log))
+    assert [case["input"] for case in cases] == ["hello there", "get_property_status P001"]
+    assert json.loads(cases[0]["response"]) == {"name": "converse", "arguments": {"response": "hello there"}}
+
+
+def test_jsonl_cases(tmp_path):
+    path = tmp_path / "inputs.jsonl"
+    path.write_text('{"input": "status of P001", "response": {"name": "converse", "arguments": {}}}\n\n{"title": "hi"}\n')
+    assert cases_from_jsonl(str(path)) == [
+        {"input": "status of P001", "response": '{"name": "converse", "arguments": {}}'},
+        {"input": "hi", "response": None},
+    ]
+
+
+def test_with_confidence_only_touches_tool_calls():
+    assert json.loads(with_confidence('{"name": "converse", "arguments": {}}', 0.3))["confidence"] == 0.3
+    assert with_confidence("plain text", 1.0) == "plain text"
+
+
+def test_percentile_and_regressions():
+    assert percentile(list(range(1, 101)), 90) == 90
+    baseline = {"llm": {"p50": 10.0, "p90": 20.0}}
+    assert regressions({"llm": {"p50": 10.0, "p90": 20.0}}, baseline) == []
+    assert len(regressions({"llm": {"p50": 20.0, "p90": 20.0}}, baseline)) == 1
+
+
+def test_recorder_counts_stage_errors():
+    recorder = Recorder()
+    try:
+        with recorder.stage("tool"):
+            raise ValueError("boom")
+    except ValueError:
+        pass
+    assert recorder.report()["tool"]["errors"] == 1
+
+
+def test_react_steps_follow_the_scripted_selection():
+    search = react_step('{"name": "search_records", "arguments": {"query": "roof leak"}}')
+    assert json.loads(search) == {"thought": "Search the records.", "action": "SearchText", "action_input": "roof leak"}
+    assert json.loads(react_step('{"name": "converse", "arguments": {"response": "Hi!"}}'))["final_answer"] == "Hi!"
+    assert json.loads(react_step(None))["final_answer"] == "OK"
+    assert json.loads(react_step("not json"))["final_answer"] == "OK"
+
+
+def test_mock_answers_each_react_prompt_of_a_turn():
+    template = (PromptBuilder("bench", budget=100)
+                .add("role", "You are an AI assistant.")
+                .add("query", "### USER QUERY:\n{input}\n\n{agent_scratchpad}")
+                .build())
+    server = MockOllama()
+    server.add(REACT_OBSERVATION, REACT_FINAL_STEP)
+    server.add(react_prompt("roof leak?"), react_step('{"name": "search_records", "arguments": {"query": "roof"}}'))
+    first = template.format(input="roof leak?", agent_scratchpad="")
+    assert json.loads(server.respond(first))["action"] == "SearchText"
+    second = template.format(input="roof leak?", agent_scratchpad='{"action": "SearchText"}\nObservation: ...\nThought: ')
+    assert server.respond(second) == REACT_FINAL_STEP
+    assert server.respond(template.format(input="something else", agent_scratchpad="")) == server.default
+    server.server_close()
+
+
+def test_replay_react_times_stages_and_collects_failures(monkeypatch):
+    def answer(text, callbacks=()):
+        timer, = callbacks
+        run_id = uuid.uuid4()
+        timer.on_chat_model_start({}, [], run_id=run_id)
+        timer.on_llm_end(None, run_id=run_id)
+        if text == "boom":
+            raise RuntimeError("model down")
+        tool_run = uuid.uuid4()
+        timer.on_tool_start({}, text, run_id=tool_run)
+        timer.on_tool_error(ValueError(), run_id=tool_run)
+
+    monkeypatch.setitem(sys.modules, "chatbot_agent", types.SimpleNamespace(answer=answer))
+    recorder = Recorder()
+    failures = replay_react([{"input": "hi"}, {"input": "boom"}], recorder, "react")
+    assert failures == {"boom": ["RuntimeError: model down"]}
+    report = recorder.report()
+    assert (report["react.llm"]["n"], report["react.tool"]["errors"], report["react.total"]["n"]) == (2, 1, 1)
@@ -0,0 +1,115 @@
+import json
+
+import pytest
+from langchain_core.tools import tool
+
+from cascade import Cascade
+
+
+@tool
+def get_property_status(property_identifier: str) -> str:
+    """Retrieve status for a property."""
+    return "Available"
+
+
+@tool("converse")
+def reply(response: str) -> str:
+    """Reply to the user directly."""
+    return response
+
+
+@pytest.fixture
+def cascade():
+    return Cascade({t.name: t for t in (get_property_status, reply)}, router_model="small", threshold=0.7)
+
+
+def call(name, confidence=0.9, **arguments):
+    return {"name": name, "arguments": arguments, "confidence": confidence}
+
+
+@pytest.mark.parametrize("selection, reason", [
+    (None, "parse_error"),
+    ({"name": "get_property_status"}, "parse_error"),
+    (call("drop_tables"), "unknown_tool"),
+    (call("converse", response="hi"), "quality"),
+    (call("get_property_status"), "invalid_arguments"),
+    (call("get_property_status", None, property_identifier="P001"), "no_confidence"),
+    (call("get_property_status", 0.2, property_identifier="P001"), "low_confidence"),
+    (call("get_property_status", "0.9", property_identifier="P001"), None),
+])
+def test_check(cascade, selection, reason):
+    assert cascade.check(selection) == reason
+
+
+def test_accepted_selection_loses_the_confidence_key(cascade):
+    selection = call("get_property_status", property_identifier="P001")
+    assert cascade.check(selection) is None
+    assert selection == {"name": "get_property_status", "arguments": {"property_identifier": "P001"}}
+
+
+def test_route_accepts_a_confident_streamed_call(cascade):
+    text = json.dumps(call("get_property_status", property_identifier="P001"))
+    assert cascade.route(iter([text[:10], text[10:]])) == {
+        "name": "get_property_status", "arguments": {"property_identifier": "P001"}}
+    assert cascade.stats()["escalations"] == {}
+
+
+def test_route_abandons_quality_tools_early(cascade):
+    closed = []
+
+    def chunks():
+        try:
+            yield '{"name": "converse", "arguments": {"response": "Hel'
+            yield 'lo"}}'
+        finally:
+            closed.append(True)
+
+    assert cascade.route(chunks()) is None
+    assert closed == [True]
+    assert cascade.stats()["escalations"] == {"quality": 1}
+
+
+def test_route_escalates_when_the_router_fails(cascade):
+    def broken():
+        raise ConnectionError("router down")
+        yield
+
+    assert cascade.route(broken()) is None
+    assert cascade.escalations["parse_error"] == 1
+
+
+def test_run_escalates_rejected_and_failing_tiers(cascade):
+    def fail():
+        raise RuntimeError("small model crashed")
+
+    assert cascade.run([("router", lambda: "unsure"), ("large", lambda: "answer")],
+                       lambda result: "low_confidence" if result == "unsure" else None) == "answer"
+    assert cascade.run([("router", fail), ("large", lambda: "answer")], lambda result: None) == "answer"
+    assert cascade.run([("router", lambda: "fine"), ("large", fail)], lambda result: None) == "fine"
+    assert cascade.stats()["turns"] == 3
+    assert cascade.escalations == {"low_confidence": 1, "error": 1}
+
+
+def test_run_raises_when_the_last_tier_fails(cascade):
+    def fail():
+        raise RuntimeError("large model down")
+
+    with pytest.raises(RuntimeError):
+        cascade.run([("large", fail)], lambda result: None)
+
+
+def test_timed_counts_a_turn_only_without_a_router():
+    cascade = Cascade({}, router_model="")
+    assert not cascade.enabled
+    with cascade.timed("large"):
+        pass
+    assert cascade.stats()["turns"] == 1
+    assert cascade.stats()["tiers"]["large"]["calls"] == 1
+
+
+def test_latency_is_kept_as_running_totals():
+    cascade = Cascade({}, router_model="")
+    for seconds in (0.1, 0.3):
+        cascade.record("large", seconds)
+    assert cascade.stats()["tiers"] == {"large": {"calls": 2, "mean_ms": pytest.approx(200)}}
+    assert cascade.seconds["large"] == pytest.approx(0.4)
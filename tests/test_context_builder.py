@@ -0,0 +1,98 @@
+import sqlite3
+
+import pytest
+
+from context_builder import RECENT_HEADER, SUMMARY_HEADER, ContextBuilder, extractive_summary
+from token_budget import estimate_tokens
+
+PHONE = "5550000000"
+
+
+def add_turns(db_path, chats, phone_number=PHONE):
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.executemany("INSERT INTO Conversation (chat, phone_number, sender) VALUES (?, ?, ?)",
+                         [(chat, phone_number, "user" if i % 2 == 0 else "assistant") for i, chat in enumerate(chats)])
+    conn.close()
+
+
+class RecordingSummarizer:
+    """Extractive summaries, remembering which turns each call folded."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, summary, turns, budget):
+        self.calls.append([chat for _, chat in turns])
+        return extractive_summary(summary, turns, budget)
+
+
+@pytest.fixture
+def summarizer():
+    return RecordingSummarizer()
+
+
+@pytest.fixture
+def builder(db_path, summarizer):
+    return ContextBuilder(recent_turns=3, summarize=summarizer, path=db_path)
+
+
+def test_short_histories_are_not_summarized(db_path, builder, summarizer):
+    add_turns(db_path, ["one", "two"])
+    assert builder.build(PHONE) == f"{RECENT_HEADER}\nUser: one\nAssistant: two"
+    assert summarizer.calls == []
+
+
+def test_summary_resumes_from_the_last_folded_turn(db_path, builder, summarizer):
+    add_turns(db_path, [f"turn {i}" for i in range(5)])
+    builder.build(PHONE)
+    assert summarizer.calls == [["turn 0", "turn 1"]]
+    # Nothing new left the window: no summarizer call
+    builder.build(PHONE)
+    assert len(summarizer.calls) == 1
+
+    add_turns(db_path, ["turn 5", "turn 6"])
+    text = builder.build(PHONE)
+    assert summarizer.calls[-1] == ["turn 2", "turn 3"]
+    conn = sqlite3.connect(db_path)
+    last_id = conn.execute("SELECT last_conversation_id FROM Conversation_summary WHERE phone_number = ?",
+                           (PHONE,)).fetchone()[0]
+    assert conn.execute("SELECT chat FROM Conversation WHERE conversation_id = ?", (last_id,)).fetchone() == ("turn 3",)
+    conn.close()
+    assert text.startswith(f"{SUMMARY_HEADER}\nUser: turn 0\nAssistant: turn 1\nUser: turn 2\nAssistant: turn 3")
+    assert text.endswith(f"{RECENT_HEADER}\nUser: turn 4\nUser: turn 5\nAssistant: turn 6")
+
+
+def test_a_concurrent_fold_is_not_overwritten(db_path, builder):
+    add_turns(db_path, [f"turn {i}" for i in range(5)])
+    other = ContextBuilder(recent_turns=3, summarize=lambda summary, turns, budget: "folded elsewhere",
+                           path=db_path)
+    builder.summarize = lambda summary, turns, budget: other.update_summary(PHONE) and "folded here"
+    builder.update_summary(PHONE)
+    assert builder.update_summary(PHONE) == "folded elsewhere"
+
+
+def test_callers_do_not_share_summaries(db_path, builder):
+    add_turns(db_path, [f"mine {i}" for i in range(5)])
+    add_turns(db_path, [f"theirs {i}" for i in range(5)], phone_number="5551111111")
+    assert "theirs" not in builder.build(PHONE)
+
+
+@pytest.mark.parametrize("budget", [20, 40, 80, 150])
+def test_output_stays_within_budget(db_path, budget):
+    add_turns(db_path, [f"turn {i}: " + "the roof at Sunset Villa needs another look " * (i % 4 + 1)
+                        for i in range(30)])
+    builder = ContextBuilder(recent_turns=8, summary_budget=30, path=db_path)
+    text = builder.build(PHONE, budget=budget)
+    assert estimate_tokens(text) <= budget
+    # The newest turn is the last to go
+    if RECENT_HEADER in text:
+        assert text.endswith("another look ")
+
+
+def test_tight_budgets_drop_the_oldest_recent_turns_first(db_path):
+    add_turns(db_path, [f"turn {i}" for i in range(6)])
+    builder = ContextBuilder(recent_turns=6, path=db_path)
+    full = builder.build(PHONE)
+    tight = builder.build(PHONE, budget=estimate_tokens(full) - 3)
+    assert "turn 0" not in tight and tight.endswith("turn 5")
@@ -0,0 +1,60 @@
+import sqlite3
+
+import pytest
+
+from conversation_log import ConversationWriter, load_history
+
+
+@pytest.fixture
+def writer(db_path):
+    writer = ConversationWriter(db_path, batch_size=3, flush_interval=0.05)
+    yield writer
+    writer.close()
+
+
+def turns(db_path, phone_number):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT property_id, contractor_id, sender, chat FROM Conversation "
+                        "WHERE phone_number = ? ORDER BY conversation_id", (phone_number,)).fetchall()
+    conn.close()
+    return rows
+
+
+def test_turns_are_written_in_batches(db_path):
+    writer = ConversationWriter(db_path, batch_size=3, flush_interval=60)
+    for i in range(7):
+        writer.record("5550000000", "user", f"turn {i}")
+    assert writer.flush(timeout=5)
+    # Two full batches, then the rest on the flush request
+    assert (writer.written, writer.batches) == (7, 3)
+    writer.close()
+
+
+def test_pending_turns_are_flushed_on_close(db_path):
+    writer = ConversationWriter(db_path, batch_size=100, flush_interval=60)
+    writer.record("5550000000", "user", "hello")
+    writer.record("5550000000", "assistant", "hi")
+    writer.close()
+    assert [row[2:] for row in turns(db_path, "5550000000")] == [("user", "hello"), ("assistant", "hi")]
+
+
+def test_turns_link_to_the_callers_property_and_contractor(db_path, writer):
+    writer.record("1234567890", "user", "status of P001?")
+    writer.flush(timeout=5)
+    assert turns(db_path, "1234567890")[-1] == (1, 1, "user", "status of P001?")
+
+
+def test_unknown_numbers_are_stored_without_links(db_path, writer):
+    writer.record("5550000000", "user", "who am I?")
+    writer.flush(timeout=5)
+    assert turns(db_path, "5550000000") == [(None, None, "user", "who am I?")]
+
+
+def test_history_is_oldest_first_and_skips_unattributed_turns(db_path, writer):
+    for i in range(5):
+        writer.record("9876543210", "user" if i % 2 == 0 else "assistant", f"turn {i}")
+    writer.flush(timeout=5)
+    # The sample chats of this number have no sender
+    assert load_history("9876543210", limit=3, path=db_path) == [
+        ("user", "turn 2"), ("assistant", "turn 3"), ("user", "turn 4")]
+    assert load_history("5550000000", path=db_path) == []
@@ -0,0 +1,114 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from db import ConnectionPool
+
+
+@pytest.fixture
+def pool(db_path):
+    pool = ConnectionPool(db_path, max_size=2, timeout=0.1)
+    yield pool
+    pool.close_all()
+
+
+def property_status(db_path, property_id=1):
+    conn = sqlite3.connect(db_path)
+    status = conn.execute("SELECT status FROM Property WHERE property_id = ?", (property_id,)).fetchone()[0]
+    conn.close()
+    return status
+
+
+def test_nested_checkouts_on_one_thread_share_a_connection(pool):
+    with pool.connection() as outer:
+        with pool.connection() as inner:
+            assert inner is outer
+        # Leaving the inner block does not release the outer checkout
+        assert pool.stats()["idle"] == 0
+    assert pool.stats()["idle"] == 1
+
+
+def test_nested_transactions_join_the_outer_one(pool, db_path):
+    with pytest.raises(RuntimeError):
+        with pool.transaction() as conn:
+            pool.execute("UPDATE Property SET status = 'Sold' WHERE property_id = 1")
+            assert conn.in_transaction
+            raise RuntimeError("abort")
+    assert property_status(db_path) == "Available"
+
+
+def test_release_rolls_back_an_open_transaction(pool, db_path):
+    with pool.connection() as conn:
+        conn.execute("BEGIN")
+        conn.execute("UPDATE Property SET status = 'Sold' WHERE property_id = 1")
+    assert property_status(db_path) == "Available"
+    with pool.connection() as again:
+        assert again is conn and not again.in_transaction
+
+
+def test_exhausted_pool_times_out(pool):
+    held, release = threading.Event(), threading.Event()
+
+    def hold():
+        with pool.connection():
+            held.set()
+            release.wait(5)
+
+    threads = [threading.Thread(target=hold) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+        held.wait(5)
+        held.clear()
+    try:
+        with pytest.raises(TimeoutError):
+            with pool.connection():
+                pass
+    finally:
+        release.set()
+        for thread in threads:
+            thread.join()
+    stats = pool.stats()
+    assert (stats["open"], stats["waits"]) == (2, 1)
+    assert stats["wait_time_s"] >= 0.1
+
+
+def test_waiting_thread_gets_the_released_connection(db_path):
+    pool = ConnectionPool(db_path, max_size=1, timeout=5)
+    got = []
+    with pool.connection():
+        waiter = threading.Thread(target=lambda: got.append(pool.fetchone("SELECT 1")))
+        waiter.start()
+        while not pool.stats()["waits"]:
+            time.sleep(0.001)
+    waiter.join()
+    assert got == [(1,)] and pool.stats()["open"] == 1
+    pool.close_all()
+
+
+def test_read_only_pool_refuses_writes(db_path):
+    pool = ConnectionPool(db_path, read_only=True)
+    with pytest.raises(sqlite3.OperationalError):
+        pool.execute("UPDATE Property SET status = 'Sold' WHERE property_id = 1")
+    with pytest.raises(sqlite3.OperationalError):
+        # query_only also covers writes that mode=ro does not see
+        pool.fetchone("CREATE TEMP TABLE scratch (x)")
+    assert property_status(db_path) == "Available"
+    assert pool.fetchone("SELECT COUNT(*) FROM Property") == (5,)
+    pool.close_all()
+
+
+def test_stats_count_hits_misses_and_busy_time(pool):
+    pool.fetchone("SELECT 1")
+    pool.fetchone("SELECT 1")
+    stats = pool.stats()
+    assert (stats["misses"], stats["hits"], stats["hit_rate"]) == (1, 1, 0.5)
+    assert (stats["open"], stats["idle"]) == (1, 1)
+    assert stats["busy_time_s"] > 0
+
+
+def test_closed_pool_refuses_checkouts(pool):
+    pool.close_all()
+    with pytest.raises(sqlite3.ProgrammingError):
+        pool.fetchone("SELECT 1")
@@ -0,0 +1,60 @@
+import json
+import logging
+
+import pytest
+
+import event_log
+from event_log import JsonFormatter, SamplingFilter
+
+
+def record(name="flyp", level=logging.INFO, msg="hello %s", args=("world",), **extra):
+    rec = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    rec.__dict__.update(extra)
+    return rec
+
+
+def test_records_are_one_json_object_with_extra_fields():
+    line = JsonFormatter().format(record(tool="get_meeting_link", elapsed_ms=12))
+    event = json.loads(line)
+    assert "\n" not in line
+    assert (event["level"], event["logger"], event["msg"]) == ("INFO", "flyp", "hello world")
+    assert (event["tool"], event["elapsed_ms"]) == ("get_meeting_link", 12)
+    assert event["ts"].endswith("+00:00")
+    assert "args" not in event and "pathname" not in event
+
+
+def test_noisy_loggers_are_sampled_but_warnings_always_pass():
+    sampler = SamplingFilter({"httpx": 5})
+    kept = [sampler.filter(record("httpx")) for _ in range(10)]
+    assert kept == [True, False, False, False, False] * 2
+    # Child loggers share their prefix's count
+    assert [sampler.filter(record("httpx._client")) for _ in range(2)] == [True, False]
+    assert all(sampler.filter(record("httpx", logging.WARNING)) for _ in range(10))
+    assert all(sampler.filter(record("flyp")) for _ in range(10))
+
+
+def test_sampled_records_say_how_many_they_stand_for():
+    rec = record("httpx")
+    SamplingFilter({"httpx": 5}).filter(rec)
+    assert json.loads(JsonFormatter().format(rec))["sampled"] == 5
+
+
+@pytest.fixture
+def configured(tmp_path):
+    path = tmp_path / "chatbot_logs.log"
+    level = logging.getLogger().level
+    event_log.configure(str(path), sample={"httpx": 3})
+    yield path
+    event_log.shutdown()
+    logging.getLogger().setLevel(level)
+
+
+def test_configure_writes_json_lines_through_the_queue(configured):
+    for i in range(6):
+        logging.getLogger("httpx").info("request %d", i)
+    logging.getLogger("httpx").warning("retrying")
+    logging.getLogger("flyp").info("turn", extra={"phone_hash": "abc"})
+    event_log.shutdown()
+    events = [json.loads(line) for line in configured.read_text().splitlines()]
+    assert [event["msg"] for event in events] == ["request 0", "request 3", "retrying", "turn"]
+    assert events[-1]["phone_hash"] == "abc"
@@ -0,0 +1,62 @@
+import pytest
+
+from fast_path import FastPathRouter
+
+
+@pytest.fixture
+def router(db_path):
+    return FastPathRouter(path=db_path)
+
+
+def test_greeting(router):
+    route = router.route("Good morning!")
+    assert (route.name, route.rule) == ("converse", "greeting")
+
+
+def test_status_question_for_a_known_property(router):
+    route = router.route("What's the status of P003?")
+    assert route.name == "get_property_status"
+    assert route.arguments == {"property_identifier": "P003"}
+
+
+def test_status_update_on_an_exact_reference(router):
+    route = router.route("mark 123 Main Street as sold, buyer signed")
+    assert route.name == "update_property_status"
+    assert route.arguments == {"property_identifier": "123 Main Street", "new_status": "Sold",
+                               "status_detail": "buyer signed"}
+
+
+def test_status_update_on_a_near_miss_goes_to_the_llm(router):
+    # best() would take "Sunset Vila" for Sunset Villa; a write needs an exact match
+    assert router.resolver.best("Sunset Vila") == 1
+    assert router.route("mark Sunset Vila as sold") is None
+
+
+def test_bulk_update_needs_every_reference_exact(router):
+    route = router.route("set P001, P002 and Pine Crest to pending")
+    assert route.name == "bulk_update_property_status"
+    assert route.arguments["property_identifiers"] == ["P001", "P002", "Pine Crest"]
+    assert router.route("set P001 and Pine Crst to pending") is None
+
+
+def test_bulk_update_by_current_status(router):
+    route = router.route("mark all available properties as off market")
+    assert route.name == "bulk_update_property_status"
+    assert route.arguments == {"new_status": "Off Market", "current_status": "Available"}
+
+
+def test_unknown_status_goes_to_the_llm(router):
+    assert router.route("mark P001 as haunted") is None
+
+
+def test_meeting_link_uses_the_canonical_contact_name(router):
+    route = router.route("meeting link with alice   johnson")
+    assert route.arguments == {"fly_person_name": "Alice Johnson"}
+    assert router.route("meeting link with nobody") is None
+
+
+def test_stats_count_hits_by_rule(router):
+    router.route("hello")
+    router.route("tell me a joke")
+    stats = router.stats()
+    assert (stats["attempts"], stats["hits"], stats["by_rule"]) == (2, 1, {"greeting": 1})
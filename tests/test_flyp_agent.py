@@ -0,0 +1,44 @@
+import importlib
+
+import pytest
+
+from conftest import sample_db
+
+
+@pytest.fixture(scope="module")
+def agent(tmp_path_factory):
+    # flyp_agent migrates and logs to real_estate.db and chatbot_logs.log in the working directory
+    workdir = tmp_path_factory.mktemp("agent")
+    with pytest.MonkeyPatch.context() as patch:
+        patch.chdir(workdir)
+        sample_db("real_estate.db")
+        yield importlib.import_module("flyp_agent")
+
+
+def test_update_names_the_resolved_row(agent):
+    reply = agent.update_property_status.invoke({"property_identifier": "456 oak street", "new_status": "Available"})
+    assert reply == "Property P002 (Maple Residency, 456 Oak St) status successfully updated to 'Available'"
+
+
+def test_update_refuses_a_near_miss(agent):
+    reply = agent.update_property_status.invoke({"property_identifier": "Maple Residenc", "new_status": "Sold"})
+    assert reply.startswith("Error: No exact property match for 'Maple Residenc'. Did you mean: P002")
+
+
+def test_status_read_tolerates_a_near_miss(agent):
+    assert agent.get_property_status.invoke({"property_identifier": "Pine Crst"}).startswith(
+        "Property P003 (Pine Crest, 789 Pine St) status: Available")
+
+
+def test_phone_number_is_not_part_of_the_model_schema(agent):
+    schema = agent.search_records.tool_call_schema.model_json_schema()
+    assert "phone_number" not in schema["properties"]
+    assert "phone_number" not in agent.system_prompt
+
+
+def test_dispatch_scopes_search_to_the_caller(agent):
+    selection = {"name": "search_records", "arguments": {"query": "roof", "scope": "conversations"}}
+    text = agent.search_records.invoke(agent.with_caller(selection, "1234567890"))
+    assert "Sunset Villa" in text and "Pine Crest" not in text
+    assert agent.search_records.invoke(selection["arguments"]).startswith("Error: Conversations can only be searched")
+    assert "Conversations:" not in agent.search_records.invoke({"query": "roof"})
@@ -0,0 +1,44 @@
+import sqlite3
+
+import pytest
+
+import generate_data
+from generate_data import generate
+
+
+def schema_objects(path, kind):
+    conn = sqlite3.connect(path)
+    names = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = ?", (kind,))}
+    conn.close()
+    return names
+
+
+def test_small_load_keeps_indexes_and_search_working(tmp_path):
+    path = str(tmp_path / "load_test.db")
+    generate(path, properties=50, contractors=5, conversations=200, chunk_rows=30, commit_rows=60)
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT COUNT(*) FROM Conversation").fetchone()[0] == 200
+    assert conn.execute("SELECT COUNT(*) FROM Conversation_fts WHERE Conversation_fts MATCH 'status'").fetchone()[0]
+    conn.close()
+
+
+def test_an_interrupted_load_restores_indexes_and_triggers(tmp_path, monkeypatch):
+    path = str(tmp_path / "load_test.db")
+    generate(path, properties=0, contractors=0, users=0, conversations=0)
+    indexes, triggers = schema_objects(path, "index"), schema_objects(path, "trigger")
+    load = generate_data.Loader.load
+
+    def interrupted(self, table, query, rows):
+        if table == "Conversation":
+            raise KeyboardInterrupt
+        return load(self, table, query, rows)
+
+    monkeypatch.setattr(generate_data.Loader, "load", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        generate(path, properties=20, contractors=2, conversations=10)
+    assert schema_objects(path, "index") == indexes
+    assert schema_objects(path, "trigger") == triggers
+    conn = sqlite3.connect(path)
+    # Rows committed before the interruption are in the full-text index too
+    assert conn.execute("SELECT COUNT(*) FROM Property_fts").fetchone()[0] == 20
+    conn.close()
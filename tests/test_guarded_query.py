@@ -0,0 +1,81 @@
+import sqlite3
+
+import pytest
+
+from guarded_query import GuardedExecutor, QueryRejected, run_query, single_statement
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("SELECT 1", "SELECT 1"),
+    ("  SELECT 1;  ", "SELECT 1"),
+    ("SELECT 1;;", "SELECT 1"),
+    ("SELECT chat FROM Conversation WHERE chat LIKE '%;%'", "SELECT chat FROM Conversation WHERE chat LIKE '%;%'"),
+    ('SELECT "a;b" FROM t;', 'SELECT "a;b" FROM t'),
+    ("SELECT 1; DROP TABLE Property", None),
+    ("SELECT 1; SELECT 2;", None),
+    ("SELECT 'unterminated", None),
+    (" ; ", None),
+    ("", None),
+])
+def test_single_statement(query, expected):
+    assert single_statement(query) == expected
+
+
+def test_semicolons_inside_literals_are_allowed(db_path):
+    text = run_query("SELECT chat FROM Conversation WHERE chat LIKE '%;%';", db_path)
+    assert text == "chat\nRoof inspection passed; invoice sent"
+
+
+def test_second_statements_are_rejected(db_path):
+    assert run_query("SELECT 1; DELETE FROM Property", db_path) == \
+        "Query rejected: Only a single SQL statement is allowed"
+
+
+def test_writes_fail_on_the_read_only_connection(db_path):
+    assert run_query("DELETE FROM Property", db_path).startswith("Error querying database:")
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM Property").fetchone()[0] == 5
+    conn.close()
+
+
+def test_full_scans_of_large_tables_are_refused(db_path):
+    guard = GuardedExecutor(db_path, large_table_rows=3)
+    with pytest.raises(QueryRejected, match="scan all ~5 rows of Property"):
+        guard.execute("SELECT * FROM Property WHERE status_detail = 'Furnished'")
+    # Indexed lookups and FTS matches are fine
+    assert guard.execute("SELECT name FROM Property WHERE shortcode = 'P001'")[1] == [("Sunset Villa",)]
+    assert guard.execute("SELECT rowid FROM Conversation_fts WHERE Conversation_fts MATCH 'roof'")[1]
+    assert guard.stats() == {"rejected": 1, "accepted": 2}
+
+
+def test_aliased_scans_are_mapped_to_their_table(db_path):
+    guard = GuardedExecutor(db_path, large_table_rows=3)
+    for query in ("SELECT c.chat FROM Conversation c",
+                  "SELECT c.chat FROM main.Conversation AS c",
+                  "SELECT p.name FROM Property p JOIN Conversation c ON c.property_id = p.property_id",
+                  "SELECT * FROM (SELECT chat FROM Conversation) AS sub"):
+        with pytest.raises(QueryRejected, match="rows of (Conversation|Property)"):
+            guard.execute(query)
+    assert guard.execute("SELECT c.chat FROM Conversation c WHERE c.conversation_id = 1")[1]
+
+
+def test_cte_scans_are_judged_by_their_body(db_path):
+    guard = GuardedExecutor(db_path, large_table_rows=3)
+    query = ("WITH recent AS MATERIALIZED (SELECT chat FROM Conversation WHERE conversation_id > 2) "
+             "SELECT a.chat FROM recent a, recent b")
+    assert len(guard.execute(query)[1]) == 4
+    with pytest.raises(QueryRejected, match="rows of Conversation"):
+        guard.execute("WITH everything AS MATERIALIZED (SELECT chat FROM Conversation) SELECT * FROM everything")
+
+
+def test_results_are_capped(db_path):
+    columns, rows, truncated = GuardedExecutor(db_path, max_rows=2).execute("SELECT property_id FROM Property")
+    assert (columns, len(rows), truncated) == (["property_id"], 2, True)
+
+
+def test_slow_queries_are_cancelled(db_path):
+    guard = GuardedExecutor(db_path, deadline=0.05)
+    slow = "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) SELECT COUNT(*) FROM n"
+    with pytest.raises(QueryRejected, match="deadline"):
+        guard.execute(slow)
+    assert guard.stats()["cancelled"] == 1
@@ -0,0 +1,63 @@
+import sqlite3
+
+import pytest
+
+import migrations
+
+
+def test_migrate_is_idempotent(tmp_path):
+    path = str(tmp_path / "empty.db")
+    version = migrations.migrate(path)
+    assert version == max(v for v, _, _ in migrations.MIGRATIONS)
+    assert migrations.migrate(path) == version
+
+
+@pytest.mark.parametrize("label", sorted(migrations.INDEXED_LOOKUPS))
+def test_hot_lookup_uses_an_index(db_path, label):
+    query, params = migrations.INDEXED_LOOKUPS[label]
+    conn = sqlite3.connect(db_path)
+    try:
+        plan = migrations.query_plan(conn, query, params)
+    finally:
+        conn.close()
+    assert not [line for line in plan if line.startswith("SCAN")], plan
+
+
+def test_check_query_plans_reports_no_failures(db_path):
+    assert migrations.check_query_plans(db_path) == []
+
+
+def test_check_query_plans_reports_a_scan(db_path, monkeypatch):
+    monkeypatch.setitem(migrations.INDEXED_LOOKUPS, "Contractor by area",
+                        ("SELECT name FROM Contractor WHERE area = ?", ("Uptown",)))
+    assert migrations.check_query_plans(db_path) == ["Contractor by area"]
+
+
+def test_data_version_moves_on_writes(db_path):
+    conn = sqlite3.connect(db_path)
+    with conn:
+        before = conn.execute("SELECT version FROM Data_version WHERE table_name = 'Property'").fetchone()[0]
+        conn.execute("UPDATE Property SET status = 'Sold' WHERE property_id = 1")
+        after = conn.execute("SELECT version FROM Data_version WHERE table_name = 'Property'").fetchone()[0]
+    conn.close()
+    assert after == before + 1
+
+
+def test_unlinked_conversations_become_null(tmp_path, monkeypatch):
+    path = str(tmp_path / "old.db")
+    monkeypatch.setattr(migrations, "MIGRATIONS", [m for m in migrations.MIGRATIONS if m[0] < 10])
+    migrations.migrate(path)
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute("INSERT INTO Conversation (property_id, contractor_id, chat, phone_number) "
+                     "VALUES (0, 0, 'roof leak', '555')")
+    monkeypatch.undo()
+    assert migrations.migrate(path) == 10
+    assert conn.execute("SELECT property_id, contractor_id FROM Conversation").fetchall() == [(None, None)]
+    # Triggers and indexes survive the rebuild
+    with conn:
+        conn.execute("INSERT INTO Conversation (chat, phone_number) VALUES ('another roof', '556')")
+    assert conn.execute("SELECT rowid FROM Conversation_fts WHERE Conversation_fts MATCH 'roof' "
+                        "ORDER BY rowid").fetchall() == [(1,), (2,)]
+    assert migrations.check_query_plans(path) == []
+    conn.close()
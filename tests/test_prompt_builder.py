@@ -0,0 +1,71 @@
+import pytest
+from langchain_core.tools import Tool, tool
+
+import prompt_builder
+from prompt_builder import PromptBudgetExceeded, PromptBuilder, compact, summary, tool_manifest
+
+
+@tool
+def get_property_status(property_identifier: str, verbose: bool = False) -> str:
+    """Retrieve status and status details for a specific property.
+    Use this when the user asks about one property. It reads the database.
+
+    Args:
+        property_identifier: The property's address, shortcode, or name
+        verbose: Include the status detail
+    """
+    return "Available"
+
+
+def test_compact_drops_decoration_and_blank_runs():
+    text = """
+        ### 🚨 **RESPONSE:**
+        Give   your thought.
+
+
+        Then answer.
+    """
+    assert compact(text) == "RESPONSE:\nGive your thought.\n\nThen answer."
+
+
+def test_summary_keeps_the_first_sentence_and_when_to_use():
+    assert summary(get_property_status.description) == (
+        "Retrieve status and status details for a specific property. Use this when the user asks about one property.")
+
+
+def test_manifest_marks_optional_arguments():
+    query = Tool(name="QueryDatabase", func=str, description="Runs a  read-only\n  SELECT.")
+    assert tool_manifest([get_property_status, query]).splitlines() == [
+        "get_property_status(property_identifier, verbose?): Retrieve status and status details for a specific "
+        "property. Use this when the user asks about one property.",
+        "QueryDatabase: Runs a read-only SELECT.",
+    ]
+
+
+def test_repeated_lines_are_paid_for_once_but_placeholders_stay():
+    prompt = (PromptBuilder("t", budget=100)
+              .add("a", "Be brief.\n{input}")
+              .add("b", "be brief.\nAnswer in English.\n{input}")
+              .build())
+    assert prompt == "Be brief.\n{input}\n\nAnswer in English.\n{input}"
+
+
+def test_report_accounts_tokens_per_section():
+    builder = PromptBuilder("accounting", budget=500).add_tools("tools", [get_property_status])
+    report = builder.report()
+    before, after = report["sections"]["tools"]
+    assert after < before
+    assert report["saved_per_turn"] == before - after
+
+
+def test_build_refuses_prompts_over_budget():
+    with pytest.raises(PromptBudgetExceeded, match="over its budget of 5"):
+        PromptBuilder("too_long", budget=5).add("text", "word " * 50).build()
+
+
+def test_copy_shares_the_prefix():
+    base = PromptBuilder("base", budget=100).add("task", "Choose a tool.")
+    router = base.copy("router").add("confidence", "Choose a tool.\nSay how sure you are.")
+    assert base.build() == "Choose a tool."
+    assert router.build() == "Choose a tool.\n\nSay how sure you are."
+    assert {r["name"] for r in prompt_builder.reports()} >= {"base", "router"}
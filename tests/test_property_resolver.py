@@ -0,0 +1,114 @@
+import sqlite3
+
+import pytest
+
+import property_resolver
+from property_resolver import PropertyResolver, get_resolver, normalize, property_version, refresh_property
+
+
+@pytest.fixture
+def resolver(db_path):
+    return get_resolver(db_path)
+
+
+def write(db_path, query, params=()):
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute(query, params)
+    conn.close()
+
+
+def test_normalize_canonicalises_street_suffixes():
+    assert normalize("123 Main Street!") == normalize("123 main st") == "123 main st"
+
+
+def test_exact_matches_any_identifier(resolver):
+    assert resolver.exact("P002") == 2
+    assert resolver.exact("456 oak street") == 2
+    assert resolver.exact("maple residency") == 2
+    assert resolver.exact("2") == 2
+
+
+def test_exact_rejects_near_misses_that_best_accepts(resolver):
+    assert resolver.exact("Maple Residenc") is None
+    assert resolver.best("Maple Residenc") == 2
+
+
+def test_best_is_none_when_unsure(resolver):
+    assert resolver.best("Villa") is None
+    assert resolver.best("something else entirely") is None
+
+
+def test_exact_is_none_when_ambiguous():
+    resolver = PropertyResolver()
+    resolver.load([(1, "1 A St", "X1", "Twin"), (2, "2 B St", "X2", "Twin")])
+    assert resolver.exact("twin") is None
+    assert resolver.best("twin") is None
+
+
+def test_resolve_ranks_candidates(resolver):
+    candidates = resolver.resolve("Pine Crst", 3)
+    assert candidates[0].property_id == 3
+    assert candidates == sorted(candidates, key=lambda c: c.score, reverse=True)
+
+
+def test_describe_and_label_name_the_row(resolver):
+    assert resolver.label(1) == "P001 (Sunset Villa, 123 Main St)"
+    hint = resolver.describe("Sunset Vila", resolver.resolve("Sunset Vila", 1))
+    assert "Did you mean: P001 (Sunset Villa, 123 Main St)?" in hint
+    assert resolver.describe("nothing", []) == "No property found matching identifier 'nothing'"
+
+
+def test_upsert_and_remove_keep_the_index_consistent():
+    resolver = PropertyResolver()
+    resolver.load([(1, "1 A St", "X1", "Alpha")])
+    resolver.upsert(1, "1 A St", "X1", "Beta")
+    assert resolver.exact("alpha") is None
+    assert resolver.exact("beta") == 1
+    resolver.remove(1)
+    assert len(resolver) == 0
+    assert resolver.resolve("beta") == []
+
+
+def test_miss_falls_back_to_the_database(db_path, resolver):
+    # Written behind the index's back, without a version bump
+    write(db_path, "DROP TRIGGER trg_property_insert_identifiers_version")
+    write(db_path, "INSERT INTO Property (address, shortcode, name, status, status_detail) "
+                   "VALUES ('9 Birch Rd', 'P006', 'Birch Lodge', 'Available', '')")
+    assert get_resolver(db_path) is resolver
+    assert resolver.exact("P006") == 6
+    assert resolver.label(6) == "P006 (Birch Lodge, 9 Birch Rd)"
+
+
+def test_version_is_checked_at_most_once_per_interval(db_path, resolver, monkeypatch):
+    monkeypatch.setattr(property_resolver, "property_version", lambda path: pytest.fail("version read"))
+    assert get_resolver(db_path) is resolver
+
+
+def test_reloads_when_a_property_is_renamed_elsewhere(db_path, resolver, monkeypatch):
+    monkeypatch.setattr(property_resolver, "VERSION_CHECK_SECONDS", 0)
+    write(db_path, "UPDATE Property SET name = 'Sunrise Villa' WHERE property_id = 1")
+    resolver = get_resolver(db_path)
+    assert resolver.exact("sunrise villa") == 1
+    assert resolver.exact("sunset villa") is None
+
+
+def test_status_updates_do_not_reload(db_path, resolver, monkeypatch):
+    monkeypatch.setattr(property_resolver, "VERSION_CHECK_SECONDS", 0)
+    version = property_version(db_path)
+    write(db_path, "UPDATE Property SET status = 'Sold', status_detail = 'Closed' WHERE property_id = 1")
+    assert property_version(db_path) == version
+    monkeypatch.setattr(PropertyResolver, "load", lambda self, rows: pytest.fail("index rebuilt"))
+    assert get_resolver(db_path) is resolver
+
+
+def test_refresh_property_drops_a_deleted_row(db_path, resolver):
+    write(db_path, "DROP TRIGGER trg_property_delete_identifiers_version")
+    write(db_path, "DELETE FROM Property WHERE property_id = 5")
+    assert resolver.exact("P005") == 5
+    refresh_property(5, db_path)
+    assert resolver.exact("P005") is None
+
+
+def test_one_resolver_per_path(db_path):
+    assert get_resolver(db_path) is property_resolver._resolvers[db_path]
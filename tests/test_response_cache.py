@@ -0,0 +1,68 @@
+import time
+
+import pytest
+
+import db
+from response_cache import ResponseCache, cacheable, make_key
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "response_cache.db")
+
+
+def test_keys_ignore_case_spacing_and_trailing_punctuation():
+    assert make_key("What is the status of P001?", "555", "Admin", 3) == \
+        make_key("  what is the   status of p001 ", "555", "Admin", 3)
+
+
+def test_keys_change_with_caller_role_and_data_version():
+    key = make_key("status of P001", "555", "Admin", 3)
+    assert key != make_key("status of P001", "556", "Admin", 3)
+    assert key != make_key("status of P001", "555", "User", 3)
+    assert key != make_key("status of P001", "555", "Admin", 4)
+
+
+@pytest.mark.parametrize("tool_name, content, expected", [
+    ("get_property_status", "Property P001 (Sunset Villa, 123 Main St) status: Available", True),
+    ("get_property_status", "Error: database is locked", False),
+    ("get_meeting_link", "Error retrieving meeting link: timeout", False),
+    ("update_property_status", "Property P001 status successfully updated to 'Sold'", False),
+    ("search_records", "Properties:\n(no rows)", False),
+    ("converse", None, False),
+])
+def test_cacheable(tool_name, content, expected):
+    assert cacheable(tool_name, content) is expected
+
+
+def test_entries_survive_a_restart(cache_path):
+    ResponseCache(path=cache_path).put("k", "answer")
+    cache = ResponseCache(path=cache_path)
+    assert cache.get("k") == "answer"
+    assert cache.stats()["hits"] == 1
+
+
+def test_entries_expire(cache_path, monkeypatch):
+    cache = ResponseCache(ttl=10, path=cache_path)
+    cache.put("k", "answer")
+    now = time.time()
+    monkeypatch.setattr("response_cache.time.time", lambda: now + 11)
+    assert cache.get("k") is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = ResponseCache(max_entries=2, path=None)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    cache.get("a")
+    cache.put("c", "3")
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == ("1", None, "3")
+
+
+def test_clear(cache_path):
+    cache = ResponseCache(path=cache_path)
+    cache.put("k", "answer")
+    cache.clear()
+    assert cache.get("k") is None
+    assert db.get_pool(cache_path).fetchone("SELECT COUNT(*) FROM Response_cache")[0] == 0
@@ -0,0 +1,62 @@
+import sqlite3
+
+from result_format import format_record, format_rows, savings
+from token_budget import estimate_tokens
+
+COLUMNS = ["property_id", "address", "shortcode", "name", "status", "status_detail"]
+
+
+def property_rows(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(f"SELECT {', '.join(COLUMNS)} FROM Property").fetchall()
+    finally:
+        conn.close()
+
+
+def test_header_once_then_one_line_per_row(db_path):
+    rows = property_rows(db_path)
+    lines = format_rows(COLUMNS, rows).splitlines()
+    assert lines[0] == "|".join(COLUMNS)
+    assert lines[1] == "1|123 Main St|P001|Sunset Villa|Available|Ready to move"
+    assert len(lines) == len(rows) + 1
+
+
+def test_compact_rows_cost_fewer_tokens_than_repr(db_path):
+    report = savings(COLUMNS, property_rows(db_path))
+    assert report["rows"] == 5
+    assert report["compact_tokens"] < report["repr_tokens"]
+
+
+def test_savings_grow_with_the_row_count(db_path):
+    # The header is paid once; each row then drops the tuple punctuation and quotes
+    rows = [(i, *row[1:]) for i in range(10) for row in property_rows(db_path)]
+    report = savings(COLUMNS, rows, budget=10_000)
+    assert report["rows"] == 50
+    assert report["compact_tokens"] <= 0.8 * report["repr_tokens"]
+
+
+def test_rows_over_budget_are_dropped_and_counted():
+    rows = [(i, "x" * 40) for i in range(100)]
+    text = format_rows(["id", "value"], rows, budget=100)
+    assert estimate_tokens(text) <= 100
+    shown = len(text.splitlines()) - 2
+    assert text.endswith(f"({100 - shown} more rows omitted; narrow the query)")
+
+
+def test_capped_rows_say_more_exist():
+    assert format_rows(["id"], [(1,)], complete=False).endswith("(0+ more rows omitted; narrow the query)")
+
+
+def test_cells_are_flattened_and_cannot_break_columns():
+    text = format_rows(["note"], [("a|b\n  c",), (None,), (0.5,)])
+    assert text.splitlines() == ["note", "a/b c", "", "0.5"]
+
+
+def test_empty_results():
+    assert format_rows(COLUMNS, []) == "(no rows)"
+    assert format_record({}) == "(none)"
+
+
+def test_record_skips_empty_values():
+    assert format_record({"status": "Sold", "status_detail": "", "name": None}) == "status: Sold"
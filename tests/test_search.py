@@ -0,0 +1,86 @@
+import sqlite3
+
+from schema_snapshot import SchemaSnapshot, user_tables
+from search import fts_query, search_conversations, search_for_caller, search_properties, search_text
+
+
+def test_fts_query_quotes_words_and_prefixes_the_last():
+    assert fts_query('roof "leak" OR NEAR(') == '"roof" "leak" "OR" "NEAR"*'
+    assert fts_query("  ?! ") is None
+
+
+def test_properties_are_ranked_by_bm25(db_path):
+    rows, more = search_properties("renovation", path=db_path)
+    assert [row[0] for row in rows] == [2]
+    assert "[renovation]" in rows[0][4]
+    assert not more
+
+
+def test_conversations_are_limited_to_one_phone(db_path):
+    rows, _ = search_conversations("roof", "1234567890", path=db_path)
+    assert sorted(row[0] for row in rows) == [1, 3]
+    assert {row[2] for row in rows} == {"1234567890"}
+
+
+def test_pages_have_a_look_ahead_row(db_path):
+    rows, more = search_conversations("roof", page_size=2, path=db_path)
+    assert len(rows) == 2 and more
+    rows, more = search_conversations("roof", page=2, page_size=2, path=db_path)
+    assert len(rows) == 1 and not more
+
+
+def test_scoped_reply_leaves_out_other_callers_and_phone_numbers(db_path):
+    text = search_text("roof", "conversations", phone_number="9876543210", path=db_path)
+    lines = text.splitlines()
+    assert lines[1] == "conversation_id|timestamp|match|score"
+    assert "Pine Crest" in text and "Sunset Villa" not in text
+    assert "9876543210" not in text
+
+
+def test_callers_without_a_phone_number_only_search_properties(db_path):
+    assert search_for_caller("roof", path=db_path) == search_text("roof", "properties", path=db_path)
+    assert search_for_caller("roof", "conversations", path=db_path).startswith("Error:")
+    assert "9876543210" not in search_for_caller("roof", phone_number="1234567890", path=db_path)
+
+
+def test_search_errors_come_back_as_text(tmp_path):
+    # An unmigrated database has no FTS tables
+    path = str(tmp_path / "unmigrated.db")
+    sqlite3.connect(path).execute("CREATE TABLE Property (property_id INTEGER PRIMARY KEY)")
+    assert search_for_caller("roof", path=path) == "Error: no such table: Property_fts"
+
+
+def test_unknown_scope(db_path):
+    assert search_text("roof", "everything", path=db_path) == "Error: unknown scope 'everything'"
+
+
+def test_fts_follows_property_edits(db_path):
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("UPDATE Property SET status_detail = 'Termite damage found' WHERE property_id = 5")
+    conn.close()
+    rows, _ = search_properties("termite", path=db_path)
+    assert [row[0] for row in rows] == [5]
+    assert search_properties("furnished", path=db_path)[0] == []
+
+
+def test_snapshot_lists_only_data_tables(db_path):
+    snapshot = SchemaSnapshot(db_path)
+    assert snapshot.table_list() == "Contractor, Conversation, Flyp_contact, Property, Role_map"
+    assert "Property(property_id INTEGER" in snapshot.table_columns()
+
+
+def test_user_tables_skips_virtual_and_shadow_tables():
+    rows = [("Notes_fts", "CREATE VIRTUAL TABLE Notes_fts USING fts5(body)"), ("Notes_fts_data", "CREATE TABLE ..."),
+            ("Notes", "CREATE TABLE Notes (body)"), ("sqlite_sequence", None), ("Data_version", "CREATE TABLE ...")]
+    assert user_tables(iter(rows)) == ["Notes"]
+
+
+def test_snapshot_reloads_after_a_schema_change(db_path):
+    snapshot = SchemaSnapshot(db_path)
+    snapshot.table_list()
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE Inspection (id INTEGER PRIMARY KEY)")
+    conn.close()
+    assert "Inspection" in snapshot.table_list()
+    assert snapshot.reloads == 2
@@ -0,0 +1,79 @@
+import json
+
+from streaming import JsonObjectStream, LatencyTimer, ToolCallStream, stream_text
+
+
+def pieces(text, size=3):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class Source:
+    """A chunk generator that records how far it was read and whether it was closed."""
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+        self.read = 0
+        self.closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.read == len(self.chunks):
+            raise StopIteration
+        self.read += 1
+        return self.chunks[self.read - 1]
+
+    def close(self):
+        self.closed = True
+
+
+def test_object_completes_on_its_closing_brace():
+    scanner = JsonObjectStream()
+    results = [scanner.feed(piece) for piece in pieces('noise {"a": "}{\\"", "b": {"c": 1}} trailing')]
+    complete = [r for r in results if r is not None]
+    assert complete == [{"a": '}{"', "b": {"c": 1}}]
+
+
+def test_invalid_braces_are_skipped():
+    scanner = JsonObjectStream()
+    assert scanner.feed("{not json} ") is None
+    assert scanner.feed('{"ok": true}') == {"ok": True}
+
+
+def test_tool_call_stops_reading_once_complete():
+    call = json.dumps({"name": "get_property_status", "arguments": {"property_identifier": "P001"}})
+    source = Source(pieces(call) + ["never read"])
+    stream = ToolCallStream(source)
+    assert stream.name() == "get_property_status"
+    assert stream.result() == {"name": "get_property_status", "arguments": {"property_identifier": "P001"}}
+    assert source.closed and source.read == len(pieces(call))
+
+
+def test_name_is_known_before_the_arguments_finish():
+    source = Source(pieces('{"name": "converse", "arguments": {"response": "Hello there, how can I help?"}}'))
+    stream = ToolCallStream(source)
+    assert stream.name() == "converse"
+    assert stream.selection is None
+
+
+def test_argument_deltas_rebuild_the_reply():
+    reply = "Hello there, how can I help?"
+    stream = ToolCallStream(Source(pieces(json.dumps({"name": "converse", "arguments": {"response": reply}}), 2)))
+    deltas = list(stream.argument_deltas("response"))
+    assert len(deltas) > 1
+    assert "".join(deltas) == reply
+
+
+def test_incomplete_stream_has_no_result():
+    stream = ToolCallStream(Source(pieces('{"name": "converse", "argum')))
+    assert stream.result() is None
+    assert stream.raw == '{"name": "converse", "argum'
+
+
+def test_stream_text_marks_the_first_token():
+    timer = LatencyTimer()
+    assert list(stream_text(["", "a", "b"], timer)) == ["a", "b"]
+    assert timer.first_token_at is not None
+    timer.stop()
+    assert 0 <= timer.ttft <= timer.total
@@ -0,0 +1,16 @@
+from token_budget import estimate_tokens, truncate_to_tokens
+
+
+def test_estimate_rounds_up():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("abcde") == 2
+
+
+def test_truncation_keeps_the_start_and_ends_on_a_word():
+    text = "the roof at Sunset Villa needs another look"
+    assert truncate_to_tokens(text, 100) == text
+    cut = truncate_to_tokens(text, 5)
+    assert cut == "the roof at ..."
+    assert estimate_tokens(cut) <= 5
+    assert truncate_to_tokens(text, 0) == ""
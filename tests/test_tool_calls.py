@@ -0,0 +1,82 @@
+import json
+from typing import Literal
+
+import pytest
+from langchain_core.agents import AgentAction, AgentFinish
+from langchain_core.exceptions import OutputParserException
+from langchain_core.tools import tool
+
+from tool_calls import ToolCallError, ToolCallParser, parse_react_step, tool_call_schema, validate_call
+
+
+@tool
+def search_records(query: str, scope: Literal["all", "properties"] = "all", page: int = 1) -> str:
+    """Full-text search.
+
+    Args:
+        query: The words to search for
+        scope: Where to search
+        page: Results page
+    """
+    return query
+
+
+@tool("converse")
+def reply(response: str) -> str:
+    """Reply to the user directly."""
+    return response
+
+
+TOOLS = {t.name: t for t in (search_records, reply)}
+
+
+def test_schema_has_one_branch_per_tool_without_doc_keys():
+    schema = tool_call_schema(TOOLS.values())
+    names = [branch["properties"]["name"] for branch in schema["anyOf"]]
+    assert names == [{"enum": ["search_records"]}, {"enum": ["converse"]}]
+    arguments = schema["anyOf"][0]["properties"]["arguments"]
+    assert arguments["required"] == ["query"]
+    assert arguments["properties"]["scope"] == {"enum": ["all", "properties"], "type": "string"}
+    assert "title" not in json.dumps(schema) and "description" not in json.dumps(schema)
+
+
+def test_router_schema_requires_confidence():
+    branch = tool_call_schema([reply], confidence=True)["anyOf"][0]
+    assert branch["required"] == ["name", "arguments", "confidence"]
+
+
+def test_validate_coerces_argument_types():
+    selection = validate_call({"name": "search_records", "arguments": {"query": "roof", "page": "2"}}, TOOLS)
+    assert selection["arguments"] == {"query": "roof", "page": 2}
+
+
+@pytest.mark.parametrize("selection", [
+    ["not", "an", "object"],
+    {"name": "drop_tables", "arguments": {}},
+    {"name": "search_records", "arguments": {"scope": "all"}},
+    {"name": "search_records", "arguments": {"query": "x", "scope": "everywhere"}},
+])
+def test_validate_rejects_bad_calls(selection):
+    with pytest.raises(ToolCallError):
+        validate_call(selection, TOOLS)
+
+
+def test_parser_raises_output_parser_exceptions():
+    parser = ToolCallParser(tool_map=TOOLS)
+    assert parser.parse('{"name": "converse", "arguments": {"response": "hi"}}')["arguments"] == {"response": "hi"}
+    with pytest.raises(OutputParserException):
+        parser.parse('{"name": "converse", "arguments": {"respon')
+    with pytest.raises(OutputParserException):
+        parser.parse('{"name": "converse", "arguments": {"input": "legacy"}}')
+
+
+def test_react_steps():
+    action = parse_react_step('{"thought": "t", "action": "SearchText", "action_input": " roof leak "}')
+    assert isinstance(action, AgentAction)
+    assert (action.tool, action.tool_input) == ("SearchText", "roof leak")
+    finish = parse_react_step('{"thought": "t", "final_answer": "Done."}')
+    assert isinstance(finish, AgentFinish) and finish.return_values == {"output": "Done."}
+    with pytest.raises(OutputParserException):
+        parse_react_step('{"thought": "cut short by the stop seq')
+    with pytest.raises(OutputParserException):
+        parse_react_step('{"thought": "no decision"}')
@@ -0,0 +1,54 @@
+import hashlib
+import json
+
+import pytest
+
+import tracing
+from tracing import NOOP, Tracer, hash_phone
+
+
+def test_phone_pseudonyms_are_keyed(monkeypatch):
+    pseudonym = hash_phone("5551234567")
+    assert pseudonym == hash_phone("5551234567")
+    assert "5551234567" not in pseudonym
+    # A plain hash of the number cannot be matched against the pseudonym
+    assert not hashlib.sha256(b"5551234567").hexdigest().startswith(pseudonym)
+    monkeypatch.setattr(tracing, "_trace_secret", b"another key")
+    assert hash_phone("5551234567") != pseudonym
+    assert hash_phone(None) is None
+
+
+def test_disabled_tracer_hands_out_no_op_spans():
+    tracer = Tracer()
+    assert tracer.span("select") is NOOP
+    assert tracer.request("555") is NOOP
+    assert tracer.langchain_handler() is None
+
+
+def test_spans_nest_under_their_request(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracer = Tracer(str(path))
+    with tracer.request("5551234567", entry="test") as request:
+        with tracer.span("select", tool="converse"):
+            pass
+        with pytest.raises(ValueError):
+            with tracer.span("dispatch"):
+                raise ValueError("boom")
+        request.set(tool="converse")
+    spans = [json.loads(line) for line in path.read_text().splitlines()]
+    select, dispatch, root = spans
+    assert (select["name"], dispatch["name"], root["name"]) == ("select", "dispatch", "request")
+    assert select["parent_id"] == dispatch["parent_id"] == root["span_id"]
+    assert select["trace_id"] == root["trace_id"] == root["request_id"]
+    assert dispatch["error"] == "ValueError"
+    assert root["phone_hash"] == hash_phone("5551234567")
+    assert "5551234567" not in path.read_text()
+
+
+def test_prometheus_histograms(tmp_path):
+    tracer = Tracer(str(tmp_path / "traces.jsonl"))
+    with tracer.span("select", tool="converse"):
+        pass
+    text = tracer.prometheus()
+    assert 'flyp_span_seconds_bucket{stage="select",tool="converse",le="+Inf"} 1' in text
+    assert 'flyp_span_seconds_count{stage="select",tool="converse"} 1' in text
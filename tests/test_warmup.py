@@ -0,0 +1,37 @@
+import pytest
+
+from mock_ollama import MockOllama
+from warmup import Warmer, readiness, warm_up
+
+
+@pytest.fixture
+def server():
+    server = MockOllama().start()
+    yield server
+    server.stop()
+
+
+def test_warm_up_times_each_model(server):
+    report = warm_up(["small", "large"], system_prompt="You are terse.", base_url=server.url)
+    assert set(report) == {"small", "large"}
+    assert set(report["small"]) == {"cold_s", "warm_s", "prefix_s"}
+    assert server.models_seen == {"small", "large"}
+
+
+def test_warmer_sets_done_in_the_background(server):
+    warmer = Warmer(["small"], base_url=server.url)
+    assert warmer.done.wait(10)
+    status = warmer.status()
+    assert (status["ready"], status["warming"], status["loaded"]) == (True, False, ["small"])
+    assert "cold_s" in status["report"]["small"]
+
+
+def test_readiness_reports_a_server_that_is_down():
+    status = readiness(["small"], base_url="http://127.0.0.1:9", timeout=0.5)
+    assert (status["server"], status["ready"]) == (False, False)
+    assert "error" in status
+
+
+def test_warm_up_errors_are_reported_per_model():
+    report = warm_up(["small"], base_url="http://127.0.0.1:9", timeout=0.5)
+    assert "error" in report["small"]
@@ -0,0 +1,83 @@
+import sqlite3
+import threading
+
+import pytest
+
+import db
+from bulk_updates import bulk_update_status, summarize
+from write_queue import WriteQueue, get_write_queue
+
+
+@pytest.fixture
+def writer(db_path):
+    writer = WriteQueue(db_path, flush_window=0.05)
+    yield writer
+    writer.close()
+
+
+def statuses(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return dict(conn.execute("SELECT property_id, status FROM Property"))
+    finally:
+        conn.close()
+
+
+def test_concurrent_writes_are_group_committed(db_path, writer):
+    futures = []
+    lock = threading.Lock()
+
+    def session(n):
+        future = writer.execute("UPDATE Property SET status_detail = ? WHERE property_id = ?", (f"note {n}", n % 5 + 1))
+        with lock:
+            futures.append(future)
+
+    threads = [threading.Thread(target=session, args=(n,)) for n in range(40)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert [future.result(timeout=5) for future in futures] == [1] * 40
+    stats = writer.stats()
+    assert stats["writes"] == 40
+    assert stats["batches"] < 40
+
+
+def test_a_failing_write_only_rolls_back_itself(db_path, writer):
+    def fail(conn):
+        conn.execute("UPDATE Property SET status = 'Gone' WHERE property_id = 2")
+        raise ValueError("boom")
+
+    ok = writer.execute("UPDATE Property SET status = 'Sold' WHERE property_id = 1")
+    failed = writer.submit(fail)
+    assert ok.result(timeout=5) == 1
+    with pytest.raises(ValueError, match="boom"):
+        failed.result(timeout=5)
+    assert statuses(db_path)[1] == "Sold"
+    assert statuses(db_path)[2] == "Sold"  # unchanged from the sample data
+
+
+def test_submit_returns_the_function_result(writer):
+    assert writer.submit(lambda conn, n: conn.execute("SELECT ?", (n,)).fetchone()[0], 7).result(timeout=5) == 7
+
+
+def test_bulk_update_matches_exactly_and_reports_each_item(db_path):
+    results = bulk_update_status("Pending", "", ["P001", "sunset villa", "Pine Crst", "P004"], path=db_path)
+    by_identifier = {r.identifier: r for r in results}
+    assert by_identifier["P001"].ok and by_identifier["P004"].ok
+    assert by_identifier["sunset villa"].message == "Duplicate of 'P001'"
+    assert not by_identifier["Pine Crst"].ok and "Did you mean" in by_identifier["Pine Crst"].message
+    assert statuses(db_path) == {1: "Pending", 2: "Sold", 3: "Available", 4: "Pending", 5: "Available"}
+
+    summary = summarize(results, "Pending")
+    assert summary.startswith("Updated 2 properties to 'Pending': P001 (Sunset Villa, 123 Main St), P004 (")
+    assert "Failed 'Pine Crst'" in summary
+
+
+def test_bulk_update_by_current_status_goes_through_the_writer(db_path):
+    writes = get_write_queue(db_path).stats()["writes"]
+    results = bulk_update_status("Off Market", "Paused", current_status="Available", path=db_path)
+    assert sorted(r.property_id for r in results) == [1, 3, 5]
+    assert get_write_queue(db_path).stats()["writes"] == writes + 1
+    assert db.get_pool(db_path).fetchone(
+        "SELECT COUNT(*) FROM Property WHERE status = 'Off Market' AND status_detail = 'Paused'")[0] == 3
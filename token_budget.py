@@ -0,0 +1,25 @@
+import math
+
+# Rough characters per token for llama-family tokenizers on English text.
+# Good enough for budgeting; no tokenizer download is needed.
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    """Approximate token count of ``text``."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def truncate_to_tokens(text, budget, marker=" ..."):
+    """Cut ``text`` to roughly ``budget`` tokens, keeping the start."""
+    if estimate_tokens(text) <= budget:
+        return text
+    if budget <= 0:
+        return ""
+    limit = max(0, budget * CHARS_PER_TOKEN - len(marker))
+    cut = text[:limit]
+    # Prefer ending on a word boundary
+    space = cut.rfind(" ")
+    if space > limit // 2:
+        cut = cut[:space]
+    return cut + marker
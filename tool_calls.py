@@ -0,0 +1,111 @@
+import json
+
+from langchain_core.agents import AgentAction, AgentFinish
+from langchain_core.exceptions import OutputParserException
+from langchain_core.output_parsers import BaseOutputParser
+
+# JSON schema keys that only document a schema; the decoder does not need them
+_DOC_KEYS = ("title", "description", "default")
+
+
+class ToolCallError(ValueError):
+    """Raised when a tool call names an unknown tool or its arguments do not fit the signature."""
+
+
+def _compact(schema):
+    if isinstance(schema, dict):
+        return {key: _compact(value) for key, value in schema.items() if key not in _DOC_KEYS}
+    if isinstance(schema, list):
+        return [_compact(value) for value in schema]
+    return schema
+
+
+def arguments_schema(tool):
+    """JSON schema of a tool's arguments, generated from its signature."""
+    return _compact(tool.tool_call_schema.model_json_schema())
+
+
+def tool_call_schema(tools, confidence=False):
+    """Schema that only admits ``{"name": <tool>, "arguments": {...}}`` for one of ``tools``.
+
+    Passed to Ollama as ``format``, the model can only emit a call whose
+    arguments match that tool's signature. With ``confidence`` each call also
+    carries a number from 0 to 1, for the cascade router.
+    """
+    calls = []
+    for tool in tools:
+        properties = {"name": {"enum": [tool.name]}, "arguments": arguments_schema(tool)}
+        if confidence:
+            properties["confidence"] = {"type": "number"}
+        calls.append({"type": "object", "properties": properties, "required": list(properties)})
+    return {"anyOf": calls}
+
+
+def validate_call(selection, tool_map):
+    """Check ``selection`` against the tool's typed signature and return it with coerced arguments."""
+    if not isinstance(selection, dict):
+        raise ToolCallError(f"Expected a JSON object, got {type(selection).__name__}")
+    tool = tool_map.get(selection.get("name"))
+    if tool is None:
+        raise ToolCallError(f"Unknown tool '{selection.get('name')}'")
+    try:
+        arguments = tool.tool_call_schema.model_validate(selection.get("arguments") or {})
+    except Exception as e:
+        raise ToolCallError(f"Invalid arguments for {tool.name}: {e}")
+    return {**selection, "arguments": arguments.model_dump(exclude_unset=True)}
+
+
+class ToolCallParser(BaseOutputParser):
+    """Parses a schema-constrained tool call and validates its arguments."""
+
+    tool_map: dict
+
+    def parse(self, text):
+        try:
+            selection = json.loads(text)
+        except ValueError as e:
+            raise OutputParserException(f"Tool call is not valid JSON: {e}", llm_output=text)
+        return self.validate(selection, text)
+
+    def validate(self, selection, text=""):
+        try:
+            return validate_call(selection, self.tool_map)
+        except ToolCallError as e:
+            raise OutputParserException(str(e), llm_output=text)
+
+    @property
+    def _type(self):
+        return "tool_call"
+
+
+def react_step_schema(tools):
+    """Schema for one ReAct step: a call to one of ``tools`` or a final answer."""
+    return {"anyOf": [
+        {
+            "type": "object",
+            "properties": {
+                "thought": {"type": "string"},
+                "action": {"enum": [tool.name for tool in tools]},
+                "action_input": {"type": "string"},
+            },
+            "required": ["thought", "action", "action_input"],
+        },
+        {
+            "type": "object",
+            "properties": {"thought": {"type": "string"}, "final_answer": {"type": "string"}},
+            "required": ["thought", "final_answer"],
+        },
+    ]}
+
+
+def parse_react_step(text):
+    """Turn a step produced under ``react_step_schema`` into an AgentAction or AgentFinish."""
+    try:
+        step = json.loads(text)
+    except ValueError as e:
+        raise OutputParserException(f"ReAct step is not valid JSON: {e}", llm_output=text)
+    if isinstance(step, dict) and "final_answer" in step:
+        return AgentFinish({"output": str(step["final_answer"]).strip()}, log=text)
+    if isinstance(step, dict) and "action" in step:
+        return AgentAction(tool=step["action"], tool_input=str(step.get("action_input", "")).strip(), log=text)
+    raise OutputParserException("ReAct step has neither an action nor a final answer", llm_output=text)
@@ -0,0 +1,280 @@
+import contextvars
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Set FLYP_TRACE to a file path to enable tracing and export spans there as JSONL
+TRACE_ENV = "FLYP_TRACE"
+# Set FLYP_METRICS_PORT to serve the Prometheus text format on /metrics
+METRICS_PORT_ENV = "FLYP_METRICS_PORT"
+# Key for phone pseudonyms. Set FLYP_TRACE_SECRET to keep them stable across
+# restarts; otherwise each process uses a random key.
+TRACE_SECRET_ENV = "FLYP_TRACE_SECRET"
+
+# Upper bounds (seconds) of the span duration histogram
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_current = contextvars.ContextVar("flyp_span", default=None)
+
+
+_trace_secret = (os.environ.get(TRACE_SECRET_ENV) or "").encode() or os.urandom(32)
+
+
+def hash_phone(phone_number):
+    """Keyed pseudonym for a phone number, so traces never hold the number itself.
+
+    Phone numbers are few enough to enumerate, so a plain hash could be
+    reversed by hashing them all; without the key that is not possible.
+    """
+    if not phone_number:
+        return None
+    return hmac.new(_trace_secret, str(phone_number).encode(), hashlib.sha256).hexdigest()[:16]
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start", "duration", "attributes", "_t0", "_token")
+
+    def __init__(self, name, trace_id, parent_id, attributes):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        self.duration = None
+        self._token = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "duration_ms": round(self.duration * 1000, 3),
+            **self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Returned while tracing is off; every operation is a no-op."""
+
+    def set(self, **attributes):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NOOP = _NoopSpan()
+
+
+class _SpanContext:
+    __slots__ = ("tracer", "name", "attributes", "span")
+
+    def __init__(self, tracer, name, attributes):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self):
+        self.span = self.tracer.start(self.name, **self.attributes)
+        self.span._token = _current.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self.span._token)
+        if exc_type is not None:
+            self.span.attributes["error"] = exc_type.__name__
+        self.tracer.finish(self.span)
+        return False
+
+
+class Tracer:
+    """Nested timed spans grouped per request, exported as JSONL and Prometheus text.
+
+    Disabled tracers hand out a shared no-op span, so instrumented code pays
+    one attribute check per stage.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.enabled = path is not None
+        self._lock = threading.Lock()
+        self._file = None
+        self._counts = defaultdict(int)
+        self._sums = defaultdict(float)
+        self._buckets = defaultdict(lambda: [0] * len(BUCKETS))
+
+    def span(self, name, **attributes):
+        """Context manager timing a stage as a child of the current span."""
+        if not self.enabled:
+            return NOOP
+        return _SpanContext(self, name, attributes)
+
+    def request(self, phone_number=None, **attributes):
+        """Root span of one chat turn, with a fresh request id and the hashed phone number."""
+        if not self.enabled:
+            return NOOP
+        return _SpanContext(self, "request", {
+            "request_id": uuid.uuid4().hex[:16], "phone_hash": hash_phone(phone_number), **attributes,
+        })
+
+    def start(self, name, parent=None, **attributes):
+        """Open a span by hand, for stages reported through start/end callbacks."""
+        parent = parent or _current.get()
+        trace_id = parent.trace_id if parent else attributes.get("request_id") or uuid.uuid4().hex[:16]
+        return Span(name, trace_id, parent.span_id if parent else None, attributes)
+
+    def finish(self, span):
+        span.duration = time.perf_counter() - span._t0
+        key = (span.name, span.attributes.get("tool") or "")
+        with self._lock:
+            self._counts[key] += 1
+            self._sums[key] += span.duration
+            buckets = self._buckets[key]
+            for i, bound in enumerate(BUCKETS):
+                if span.duration <= bound:
+                    buckets[i] += 1
+            if self._file is None:
+                self._file = open(self.path, "a", buffering=1)
+            self._file.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+    def prometheus(self):
+        """Span duration histograms in the Prometheus text exposition format."""
+        lines = [
+            "# HELP flyp_span_seconds Duration of traced chatbot stages.",
+            "# TYPE flyp_span_seconds histogram",
+        ]
+        with self._lock:
+            for (name, tool), count in sorted(self._counts.items()):
+                labels = f'stage="{name}"' + (f',tool="{tool}"' if tool else "")
+                for bound, hits in zip(BUCKETS, self._buckets[(name, tool)]):
+                    lines.append(f'flyp_span_seconds_bucket{{{labels},le="{bound}"}} {hits}')
+                lines.append(f'flyp_span_seconds_bucket{{{labels},le="+Inf"}} {count}')
+                lines.append(f"flyp_span_seconds_sum{{{labels}}} {self._sums[(name, tool)]:.6f}")
+                lines.append(f"flyp_span_seconds_count{{{labels}}} {count}")
+        return "\n".join(lines) + "\n"
+
+    def langchain_handler(self):
+        """A LangChain callback handler turning LLM, chain and tool runs into spans."""
+        if not self.enabled:
+            return None
+        from langchain_core.callbacks import BaseCallbackHandler
+
+        tracer = self
+
+        class TracingCallbackHandler(BaseCallbackHandler):
+            def __init__(self):
+                self.spans = {}  # run_id -> Span
+
+            def _start(self, name, run_id, parent_run_id, **attributes):
+                self.spans[run_id] = tracer.start(name, self.spans.get(parent_run_id), **attributes)
+
+            def _end(self, run_id, error=None):
+                span = self.spans.pop(run_id, None)
+                if span is not None:
+                    if error is not None:
+                        span.attributes["error"] = type(error).__name__
+                    tracer.finish(span)
+
+            def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+                self._start("llm", run_id, parent_run_id, model=(metadata or {}).get("ls_model_name"))
+
+            def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+                self._start("llm", run_id, parent_run_id, model=(metadata or {}).get("ls_model_name"))
+
+            def on_llm_end(self, response, *, run_id, **kwargs):
+                self._end(run_id)
+
+            def on_llm_error(self, error, *, run_id, **kwargs):
+                self._end(run_id, error)
+
+            def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+                runnable = kwargs.get("name") or (serialized or {}).get("name") or "chain"
+                stage = "prompt" if runnable.endswith("PromptTemplate") else \
+                    "parse" if runnable.endswith("Parser") else "chain"
+                self._start(stage, run_id, parent_run_id, runnable=runnable)
+
+            def on_chain_end(self, outputs, *, run_id, **kwargs):
+                self._end(run_id)
+
+            def on_chain_error(self, error, *, run_id, **kwargs):
+                self._end(run_id, error)
+
+            def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+                self._start("tool", run_id, parent_run_id, tool=kwargs.get("name") or (serialized or {}).get("name"))
+
+            def on_tool_end(self, output, *, run_id, **kwargs):
+                self._end(run_id)
+
+            def on_tool_error(self, error, *, run_id, **kwargs):
+                self._end(run_id, error)
+
+        return TracingCallbackHandler()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def current_span():
+    return _current.get()
+
+
+def serve_metrics(port, tracer=None, host="0.0.0.0"):
+    """Serve ``tracer.prometheus()`` on http://host:port/metrics from a daemon thread."""
+    tracer = tracer or get_tracer()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = tracer.prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer():
+    """Process-wide tracer, enabled when FLYP_TRACE names an output file."""
+    global _tracer
+    if _tracer is not None:
+        return _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer(os.environ.get(TRACE_ENV) or None)
+            port = os.environ.get(METRICS_PORT_ENV)
+            if _tracer.enabled and port:
+                serve_metrics(int(port), _tracer)
+        return _tracer
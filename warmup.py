@@ -0,0 +1,114 @@
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+
+import httpx
+
+# Override with OLLAMA_URL, e.g. to point the bots at mock_ollama.py
+OLLAMA_URL = os.environ.get("OLLAMA_URL", "http://127.0.0.1:11434")
+
+# How long Ollama keeps a model resident after its last request.
+# -1 pins it until the server stops; the default Ollama value is 5m.
+KEEP_ALIVE = -1
+
+# Models used by the chatbots
+MODELS = ("llama3.3:70b", "llama3:70b")
+
+
+def readiness(models, base_url=OLLAMA_URL, timeout=2.0):
+    """Report whether the Ollama server is up and which of ``models`` are loaded."""
+    status = {"server": False, "loaded": [], "ready": False}
+    try:
+        with httpx.Client(base_url=base_url, timeout=timeout) as client:
+            client.get("/api/version").raise_for_status()
+            status["server"] = True
+            running = client.get("/api/ps").json().get("models", [])
+    except (httpx.HTTPError, ValueError) as e:
+        status["error"] = str(e)
+        return status
+    names = {m.get("name") for m in running} | {m.get("model") for m in running}
+    status["loaded"] = [m for m in models if m in names]
+    status["ready"] = len(status["loaded"]) == len(models)
+    return status
+
+
+def _timed_chat(client, model, messages, keep_alive):
+    start = time.perf_counter()
+    response = client.post("/api/chat", json={
+        "model": model,
+        "messages": messages,
+        "stream": False,
+        "keep_alive": keep_alive,
+        "options": {"num_predict": 1},
+    })
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+
+def warm_up(models, system_prompt=None, base_url=OLLAMA_URL, keep_alive=KEEP_ALIVE, timeout=600.0):
+    """Load and pin each model, then prime the static system prompt prefix.
+
+    Returns a per-model report with the cold (first request, includes load)
+    and warm (same request, model resident) latencies, plus the time taken
+    to evaluate the system prompt once so later turns reuse its cached prefix.
+    """
+    report = {}
+    with httpx.Client(base_url=base_url, timeout=timeout) as client:
+        for model in models:
+            ping = [{"role": "user", "content": "hi"}]
+            entry = {}
+            try:
+                entry["cold_s"] = _timed_chat(client, model, ping, keep_alive)
+                entry["warm_s"] = _timed_chat(client, model, ping, keep_alive)
+                if system_prompt:
+                    primed = [{"role": "system", "content": system_prompt}] + ping
+                    entry["prefix_s"] = _timed_chat(client, model, primed, keep_alive)
+            except httpx.HTTPError as e:
+                entry["error"] = str(e)
+            report[model] = entry
+            logging.info(f"Warm-up {model}: {entry}")
+    return report
+
+
+class Warmer:
+    """Runs ``warm_up`` on a background thread so the UI can render meanwhile."""
+
+    def __init__(self, models, system_prompt=None, base_url=OLLAMA_URL, keep_alive=KEEP_ALIVE):
+        self.models = list(models)
+        self.base_url = base_url
+        self.report = None
+        self.done = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, args=(system_prompt, keep_alive), name="ollama-warmup", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, system_prompt, keep_alive):
+        try:
+            self.report = warm_up(self.models, system_prompt, self.base_url, keep_alive)
+        finally:
+            self.done.set()
+
+    def status(self):
+        status = readiness(self.models, self.base_url)
+        status["warming"] = not self.done.is_set()
+        status["report"] = self.report
+        return status
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Preload and pin Ollama models for the chatbots.")
+    parser.add_argument("models", nargs="*", default=list(MODELS))
+    parser.add_argument("--url", default=OLLAMA_URL)
+    parser.add_argument("--keep-alive", default=KEEP_ALIVE, type=lambda v: int(v) if v.lstrip("-").isdigit() else v)
+    parser.add_argument("--check", action="store_true", help="only report readiness")
+    args = parser.parse_args()
+
+    if not args.check:
+        print(json.dumps(warm_up(args.models, base_url=args.url, keep_alive=args.keep_alive), indent=2))
+    status = readiness(args.models, args.url)
+    print(json.dumps(status, indent=2))
+    raise SystemExit(0 if status["ready"] else 1)
@@ -0,0 +1,130 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future
+
+import db
+
+# Most mutations merged into one transaction, and how long the writer waits
+# for more of them after the first one arrives. With no wait, a batch is
+# whatever queued up while the previous one was committing.
+MAX_BATCH = 256
+FLUSH_WINDOW = 0.0
+
+# One queued mutation: ``func(conn, *args)`` runs inside the shared transaction
+Write = namedtuple("Write", ["func", "args", "future"])
+
+_STOP = object()
+
+
+def _statement(conn, query, params):
+    return conn.execute(query, params).rowcount
+
+
+class WriteQueue:
+    """Single writer thread that group-commits mutations from every session.
+
+    Callers ``submit`` a function and get a Future. The writer takes whatever
+    is queued (waiting up to ``flush_window`` for more, at most ``max_batch``
+    writes), runs each under its own savepoint inside one BEGIN IMMEDIATE
+    transaction and commits once, so concurrent writers share one lock
+    acquisition and one WAL append instead of racing for the lock. A failing
+    write only rolls back its own savepoint. Readers keep using their pooled
+    WAL connections meanwhile.
+    """
+
+    def __init__(self, path=db.DB_PATH, max_batch=MAX_BATCH, flush_window=FLUSH_WINDOW):
+        self.path = path
+        self.max_batch = max_batch
+        self.flush_window = flush_window
+        self._queue = queue.Queue()
+        self.writes = 0
+        self.batches = 0
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, func, *args):
+        """Queue ``func(conn, *args)``; the Future resolves to its return value after commit."""
+        future = Future()
+        self._queue.put(Write(func, args, future))
+        return future
+
+    def execute(self, query, params=()):
+        """Queue one statement; the Future resolves to its rowcount after commit."""
+        return self.submit(_statement, query, params)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            batch = []
+            deadline = time.monotonic() + self.flush_window
+            while item is not _STOP:
+                batch.append(item)
+                if len(batch) >= self.max_batch:
+                    break
+                try:
+                    if self.flush_window:
+                        item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    else:
+                        item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self._commit(batch)
+            if item is _STOP:
+                return
+
+    def _commit(self, batch):
+        results = []
+        try:
+            with db.get_pool(self.path).transaction() as conn:
+                for write in batch:
+                    conn.execute("SAVEPOINT write")
+                    try:
+                        results.append((True, write.func(conn, *write.args)))
+                        conn.execute("RELEASE write")
+                    except Exception as e:
+                        conn.execute("ROLLBACK TO write")
+                        conn.execute("RELEASE write")
+                        results.append((False, e))
+        except Exception as e:
+            logging.error(f"Failed to commit {len(batch)} queued writes: {e}")
+            for write in batch:
+                write.future.set_exception(e)
+            return
+        self.writes += len(batch)
+        self.batches += 1
+        for write, (ok, value) in zip(batch, results):
+            if ok:
+                write.future.set_result(value)
+            else:
+                write.future.set_exception(value)
+
+    def stats(self):
+        return {
+            "writes": self.writes,
+            "batches": self.batches,
+            "avg_batch": self.writes / self.batches if self.batches else 0.0,
+            "queued": self._queue.qsize(),
+        }
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def get_write_queue(path=db.DB_PATH):
+    """Return the process-wide writer for ``path``, starting it on first use."""
+    with _queues_lock:
+        if path not in _queues:
+            _queues[path] = WriteQueue(path)
+        return _queues[path]